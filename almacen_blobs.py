@@ -0,0 +1,141 @@
+# =============================================================
+# almacen_blobs.py
+# Módulo — Archivos grandes de los casos de prueba
+# =============================================================
+# Responsabilidad: que un caso pueda tener una entrada o una
+# salida esperada de varios MB sin meterla dentro del JSON.
+#
+# El contenido se guarda aparte, con su SHA-256 como nombre
+# (dos casos con la misma entrada comparten el archivo):
+#
+#     casos_de_prueba/blobs/<sha256>        ← sin comprimir
+#     casos_de_prueba/blobs/<sha256>.gz     ← comprimido con gzip
+#
+# y el caso solo guarda la referencia:
+#
+#     {"id": 1, "entrada": "", "esperado": "", "puntaje": 5,
+#      "entrada_blob":  {"sha256": "...", "bytes": 4194304, "comprimido": false},
+#      "esperado_blob": {"sha256": "...", "bytes": 12, "comprimido": true}}
+#
+# Así cargar_casos() lee un JSON pequeño. El grader pasa la
+# entrada al programa directo desde el archivo (os.sendfile si no
+# está comprimido, sin copiarla a memoria) y compara la salida
+# contra el archivo esperado por bloques (ver comparadores.py).
+#
+# Para crear un caso así, en guardar_casos:
+#     {"entrada_archivo": "datos/grande.txt", "esperado": "42", ...}
+# o simplemente un texto de más de UMBRAL_BLOB_BYTES: se mueve solo.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - hashlib    → SHA-256 mientras se copia
+#   - gzip       → compresión opcional
+#   - contextlib → abrir_entrada() como bloque "with"
+# =============================================================
+
+import contextlib
+import gzip
+import hashlib
+import io
+import os
+
+
+CARPETA_BLOBS = os.path.join("casos_de_prueba", "blobs")
+
+# Textos más largos que esto se guardan aparte automáticamente
+UMBRAL_BLOB_BYTES = 64 * 1024
+
+COMPRIMIR_POR_DEFECTO = False
+
+_TAMANO_BLOQUE = 1024 * 1024
+
+
+def ruta_blob(referencia: dict) -> str:
+    nombre = referencia["sha256"] + (".gz" if referencia.get("comprimido") else "")
+    return os.path.join(CARPETA_BLOBS, nombre)
+
+
+def _guardar_flujo(flujo, comprimir: bool) -> dict:
+    """
+    Copia un flujo binario al almacén calculando su hash al mismo tiempo
+    (una sola pasada, sin tenerlo entero en memoria).
+    """
+    os.makedirs(CARPETA_BLOBS, exist_ok=True)
+    temporal = os.path.join(CARPETA_BLOBS, f".subiendo.{os.getpid()}.{id(flujo)}")
+    sha   = hashlib.sha256()
+    total = 0
+    destino = gzip.open(temporal, "wb") if comprimir else open(temporal, "wb")
+    try:
+        with destino:
+            while True:
+                bloque = flujo.read(_TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                sha.update(bloque)
+                total += len(bloque)
+                destino.write(bloque)
+
+        referencia = {"sha256": sha.hexdigest(), "bytes": total, "comprimido": comprimir}
+        final = ruta_blob(referencia)
+        if os.path.isfile(final):
+            os.remove(temporal)   # ya lo teníamos
+        else:
+            os.replace(temporal, final)
+        return referencia
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def guardar_archivo(ruta: str, comprimir: bool = None) -> dict:
+    """Guarda el contenido de un archivo del disco. Retorna su referencia."""
+    if comprimir is None:
+        comprimir = COMPRIMIR_POR_DEFECTO
+    with open(ruta, "rb") as flujo:
+        return _guardar_flujo(flujo, comprimir)
+
+
+def guardar_texto(texto: str, comprimir: bool = None) -> dict:
+    """Guarda un texto (en UTF-8). Retorna su referencia."""
+    if comprimir is None:
+        comprimir = COMPRIMIR_POR_DEFECTO
+    return _guardar_flujo(io.BytesIO(texto.encode("utf-8")), comprimir)
+
+
+def abrir(referencia: dict):
+    """Abre el blob para leerlo en binario (descomprimiendo si hace falta)."""
+    if referencia.get("comprimido"):
+        return gzip.open(ruta_blob(referencia), "rb")
+    return open(ruta_blob(referencia), "rb")
+
+
+@contextlib.contextmanager
+def abrir_entrada(caso: dict):
+    """
+    Entrada del caso lista para el ejecutor:
+    el texto tal cual, o el archivo abierto si el caso usa un blob.
+    """
+    if not caso.get("entrada_blob"):
+        yield caso["entrada"]
+        return
+    with abrir(caso["entrada_blob"]) as archivo:
+        yield archivo
+
+
+def externalizar(caso: dict, comprimir: bool = None) -> dict:
+    """
+    Retorna una copia del caso con sus datos grandes movidos al almacén:
+      - "entrada_archivo" / "esperado_archivo" (ruta) → se guarda ese archivo
+      - "entrada" / "esperado" de más de UMBRAL_BLOB_BYTES → se guarda el texto
+    En ambos casos queda "<campo>_blob" con la referencia y "<campo>" vacío.
+    """
+    caso = dict(caso)
+    for campo in ("entrada", "esperado"):
+        ruta = caso.pop(f"{campo}_archivo", None)
+        if ruta is not None:
+            caso[f"{campo}_blob"] = guardar_archivo(ruta, comprimir)
+            caso[campo] = ""
+        elif len(caso.get(campo, "").encode("utf-8")) > UMBRAL_BLOB_BYTES:
+            caso[f"{campo}_blob"] = guardar_texto(caso[campo], comprimir)
+            caso[campo] = ""
+    return caso
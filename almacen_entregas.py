@@ -0,0 +1,331 @@
+# =============================================================
+# almacen_entregas.py
+# Módulo — Archivos entregados, sin copias repetidas
+# =============================================================
+# Responsabilidad: que entregar dos veces el mismo archivo (o que
+# 30 estudiantes entreguen la plantilla sin tocar) no guarde el
+# contenido 30 veces.
+#
+# El contenido se guarda UNA vez, con su SHA-256 como nombre:
+#
+#     archivos_subidos/.blobs/<sha256>
+#
+# (dentro de subcarpetas según el hash, ver particiones.py)
+#
+# y cada entrega es un enlace duro (hard link) a ese archivo:
+#
+#     archivos_subidos/TXN-aaa_tarea.py  ─┐
+#     archivos_subidos/TXN-bbb_tarea.py  ─┴→ .blobs/3f5a...
+#
+# Así todo lo que ya leía "archivos_subidos/TXN-..._tarea.py"
+# (grader, grader_lote, la cola) sigue funcionando igual, pero en
+# disco hay una sola copia. El contador de referencias es el del
+# propio sistema de archivos (st_nlink): un blob con st_nlink == 1
+# ya no tiene entregas y limpiar_huerfanos() lo puede borrar.
+#
+# Copia en una sola pasada: mientras se escribe se calcula el
+# hash y se cuenta el tamaño (si pasa del máximo se corta ahí
+# mismo). Si la entrega viene de un archivo del disco:
+#   - los bytes los copia el núcleo (os.copy_file_range, o
+#     os.sendfile si no existe), sin pasar por la memoria de Python
+#   - el hash se calcula sobre el archivo mapeado en memoria (mmap),
+#     también sin copiarlo
+# Con bytes o un flujo cualquiera se copia por bloques con UN solo
+# buffer reutilizado. En ningún caso la memoria usada depende del
+# tamaño del archivo ni de cuántos estudiantes suben a la vez.
+#
+# El registro de la entrega guarda ese hash en "hash_archivo": sirve
+# para detectar duplicados al instante y es el mismo SHA-256 que
+# usa cache_resultados.hash_archivo como clave de la caché.
+#
+# Ojo: como las entregas comparten el archivo, nunca se deben
+# modificar en su lugar (solo leer, reemplazar o borrar).
+#
+# Si el sistema de archivos no permite enlaces duros, cada
+# entrega queda como una copia (como antes).
+#
+# Como ejecutarlo:
+#   python almacen_entregas.py --deduplicar
+#       → convierte las entregas ya guardadas en enlaces a blobs
+#   python almacen_entregas.py --limpiar
+#       → borra los blobs que ya no usa ninguna entrega
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - hashlib  → SHA-256 mientras se escribe
+#   - mmap     → leer el archivo de origen para el hash sin copiarlo
+#   - shutil   → copia si no hay enlaces duros
+#   - argparse → opciones de línea de comandos
+# =============================================================
+
+import argparse
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import stat
+import time
+
+import particiones
+
+CARPETA_BLOBS = ".blobs"
+
+# Un blob huérfano más nuevo que esto puede estar por enlazarse: no se borra
+GRACIA_HUERFANOS_SEGUNDOS = 60
+
+_TAMANO_BLOQUE = 65536
+
+# Bloques de la copia por el núcleo (el hash avanza al mismo paso)
+_TAMANO_BLOQUE_NUCLEO = 1024 * 1024
+
+
+def _carpeta_blobs(carpeta: str) -> str:
+    return os.path.join(carpeta, CARPETA_BLOBS)
+
+
+def ruta_blob(sha256: str, carpeta: str) -> str:
+    return particiones.resolver(_carpeta_blobs(carpeta), sha256, sha256)
+
+
+def _temporal(directorio: str) -> str:
+    return os.path.join(directorio, f".subiendo.{os.getpid()}.{time.monotonic_ns()}")
+
+
+def _verificar(validar, total: int):
+    """validar(total) → (ok, mensaje), como file_validator.validar_tamano."""
+    if validar is not None:
+        ok, mensaje = validar(total)
+        if not ok:
+            raise ValueError(mensaje)
+
+
+def _descriptor_de_archivo(origen):
+    """El descriptor del origen si es un archivo normal del disco; si no, None."""
+    if not isinstance(origen, (io.BufferedReader, io.FileIO)):
+        return None
+    try:
+        descriptor = origen.fileno()
+        return descriptor if stat.S_ISREG(os.fstat(descriptor).st_mode) else None
+    except (OSError, ValueError):
+        return None
+
+
+def _copiar_rango(origen: int, destino: int, posicion: int, cantidad: int, vista) -> str:
+    """
+    Copia 'cantidad' bytes del origen (desde 'posicion') al final de destino.
+    Prueba copy_file_range, después sendfile, y si el sistema no deja,
+    escribe desde el mapa en memoria. Retorna el método que funcionó.
+    """
+    inicio, fin = posicion, posicion + cantidad
+    for metodo in ("copy_file_range", "sendfile"):
+        if not hasattr(os, metodo):
+            continue
+        try:
+            while posicion < fin:
+                if metodo == "copy_file_range":
+                    copiados = os.copy_file_range(origen, destino, fin - posicion, posicion)
+                else:
+                    copiados = os.sendfile(destino, origen, posicion, fin - posicion)
+                if copiados == 0:
+                    raise OSError("el origen se acorto mientras se copiaba")
+                posicion += copiados
+            return metodo
+        except OSError:
+            if posicion != inicio:
+                raise   # ya copió una parte: el error es real, no de soporte
+    while posicion < fin:
+        posicion += os.write(destino, vista[posicion:fin])
+    return "escritura"
+
+
+def _copiar_con_hash(origen, destino: str, validar=None) -> dict:
+    """
+    Copia 'origen' (un archivo binario abierto o cualquier flujo con
+    readinto/read) a 'destino', calculando su SHA-256 y su tamaño en
+    la misma pasada. validar(bytes_hasta_ahora) se consulta durante la
+    copia y al final; si rechaza, se lanza ValueError con su mensaje.
+    """
+    sha   = hashlib.sha256()
+    total = 0
+    descriptor = _descriptor_de_archivo(origen)
+    with open(destino, "wb") as archivo:
+        if descriptor is not None:
+            inicio = origen.tell()
+            tamano = os.fstat(descriptor).st_size - inicio
+            _verificar(validar, tamano)   # antes de copiar nada
+            if tamano > 0:
+                salida = archivo.fileno()
+                with mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ) as mapa:
+                    vista = memoryview(mapa)
+                    try:
+                        posicion = inicio
+                        while posicion < inicio + tamano:
+                            cantidad = min(_TAMANO_BLOQUE_NUCLEO, inicio + tamano - posicion)
+                            sha.update(vista[posicion:posicion + cantidad])
+                            _copiar_rango(descriptor, salida, posicion, cantidad, vista)
+                            posicion += cantidad
+                    finally:
+                        vista.release()
+                total = tamano
+                origen.seek(inicio + tamano)
+        else:
+            buffer = bytearray(_TAMANO_BLOQUE)
+            vista  = memoryview(buffer)
+            leer   = getattr(origen, "readinto", None)
+            while True:
+                if leer is not None:
+                    leidos = leer(buffer)
+                    bloque = vista[:leidos or 0]
+                else:
+                    bloque = origen.read(_TAMANO_BLOQUE)
+                    leidos = len(bloque)
+                if not leidos:
+                    break
+                total += leidos
+                _verificar(validar, total)   # corta apenas pasa del máximo
+                sha.update(bloque)
+                archivo.write(bloque)
+            _verificar(validar, total)       # p. ej. archivo vacío
+    return {"sha256": sha.hexdigest(), "bytes": total}
+
+
+def _enlazar(origen: str, destino: str):
+    """
+    Deja en 'destino' un enlace duro a 'origen' (reemplazando lo que
+    hubiera). Sin enlaces duros en este sistema de archivos, una copia.
+    """
+    temporal = _temporal(os.path.dirname(destino) or ".")
+    try:
+        os.link(origen, temporal)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def guardar(contenido, destino: str, carpeta: str, validar=None) -> dict:
+    """
+    Guarda el contenido de una entrega en el almacén y deja 'destino'
+    apuntando a él.
+
+    Parámetros:
+        contenido (bytes, ruta (str) o archivo binario abierto)
+        destino   (str): ruta de la entrega, ej: archivos_subidos/TXN-..._tarea.py
+        carpeta   (str): carpeta de las entregas (la de los blobs va adentro)
+        validar   (func): recibe el tamaño en bytes y retorna (ok, mensaje),
+                          ej: file_validator.validar_tamano. Si rechaza, no
+                          queda nada guardado y se lanza ValueError(mensaje)
+
+    Retorna dict con:
+        - sha256     (str)
+        - bytes      (int)
+        - duplicado  (bool): True si ese contenido ya estaba guardado
+    """
+    if isinstance(contenido, str):
+        with open(contenido, "rb") as origen:
+            return guardar(origen, destino, carpeta, validar)
+    if isinstance(contenido, (bytes, bytearray, memoryview)):
+        contenido = io.BytesIO(contenido)
+    directorio = _carpeta_blobs(carpeta)
+    os.makedirs(directorio, exist_ok=True)
+
+    temporal = _temporal(directorio)
+    try:
+        datos = _copiar_con_hash(contenido, temporal, validar)
+        final = ruta_blob(datos["sha256"], carpeta)
+        if os.path.isfile(final):
+            try:
+                particiones.crear(destino, lambda ruta: _enlazar(final, ruta))
+                os.remove(temporal)
+                return {**datos, "duplicado": True}
+            except FileNotFoundError:
+                pass   # limpiar_huerfanos lo borró justo ahora: se usa el nuevo
+        final = particiones.ruta(directorio, datos["sha256"], datos["sha256"])
+        particiones.crear(final, lambda ruta: os.replace(temporal, ruta))
+        particiones.crear(destino, lambda ruta: _enlazar(final, ruta))
+        return {**datos, "duplicado": False}
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def referencias(sha256: str, carpeta: str) -> int:
+    """Cuántas entregas apuntan a ese blob (0 si no existe)."""
+    try:
+        return os.stat(ruta_blob(sha256, carpeta)).st_nlink - 1
+    except FileNotFoundError:
+        return 0
+
+
+def limpiar_huerfanos(carpeta: str) -> int:
+    """
+    Borra los blobs sin entregas (y temporales abandonados).
+    Retorna cuántos archivos borró.
+    """
+    directorio = _carpeta_blobs(carpeta)
+    if not os.path.isdir(directorio):
+        return 0
+    limite  = time.time() - GRACIA_HUERFANOS_SEGUNDOS
+    temporales = [entrada.path for entrada in os.scandir(directorio)
+                  if entrada.name.startswith(".subiendo.")]
+    borrados = 0
+    for ruta in temporales + list(particiones.recorrer(directorio)):
+        estado = os.stat(ruta)
+        temporal = os.path.basename(ruta).startswith(".subiendo.")
+        if estado.st_mtime < limite and (temporal or estado.st_nlink == 1):
+            os.remove(ruta)
+            borrados += 1
+    return borrados
+
+
+def deduplicar_existentes(carpeta: str) -> dict:
+    """
+    Convierte las entregas guardadas como archivos sueltos en enlaces
+    a blobs. Se puede correr con el sistema funcionando: cada archivo
+    se reemplaza de forma atómica por un enlace al mismo contenido.
+
+    Retorna:
+        dict con revisados, deduplicados y bytes_liberados
+    """
+    resumen = {"revisados": 0, "deduplicados": 0, "bytes_liberados": 0}
+    if not os.path.isdir(carpeta):
+        return resumen
+    for ruta in particiones.recorrer(carpeta):
+        resumen["revisados"] += 1
+        if os.stat(ruta).st_nlink > 1:
+            continue   # ya es un enlace a un blob
+        with open(ruta, "rb") as flujo:
+            datos = guardar(flujo, ruta, carpeta)
+        if datos["duplicado"]:
+            resumen["deduplicados"] += 1
+            resumen["bytes_liberados"] += datos["bytes"]
+    return resumen
+
+
+def main(argumentos: list = None):
+    from transaction_service import CARPETA_ARCHIVOS
+
+    parser = argparse.ArgumentParser(
+        description="Almacen de entregas sin copias repetidas.")
+    parser.add_argument("--deduplicar", action="store_true",
+                        help="convierte las entregas ya guardadas en enlaces a blobs")
+    parser.add_argument("--limpiar", action="store_true",
+                        help="borra los blobs que ya no usa ninguna entrega")
+    parser.add_argument("--carpeta", default=CARPETA_ARCHIVOS,
+                        help=f"carpeta de las entregas (por defecto: {CARPETA_ARCHIVOS})")
+    args = parser.parse_args(argumentos)
+
+    if args.deduplicar:
+        resumen = deduplicar_existentes(args.carpeta)
+        print(f"  Revisadas: {resumen['revisados']}   Duplicadas: {resumen['deduplicados']}"
+              f"   Liberados: {resumen['bytes_liberados'] / 1024:.1f} KB")
+    if args.limpiar:
+        print(f"  Blobs borrados: {limpiar_huerfanos(args.carpeta)}")
+    if not (args.deduplicar or args.limpiar):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
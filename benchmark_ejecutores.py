@@ -0,0 +1,63 @@
+# =============================================================
+# benchmark_ejecutores.py
+# Mide cuántos casos por segundo ejecuta cada ejecutor
+# =============================================================
+# Compara:
+#   - subprocess → grader.ejecutar_programa (un Python nuevo por caso)
+#   - fork       → fork_server.ServidorFork (fork de un Python caliente)
+#
+# Como ejecutarlo:
+#   python benchmark_ejecutores.py            (200 casos por ejecutor)
+#   python benchmark_ejecutores.py 1000
+# =============================================================
+
+import os
+import sys
+import tempfile
+import time
+
+from grader import ejecutar_programa
+from fork_server import ServidorFork, FORK_DISPONIBLE
+
+
+PROGRAMA_PRUEBA = "a, b = map(int, input().split())\nprint(a + b)\n"
+
+
+def medir(ejecutor, ruta_py: str, cantidad: int) -> float:
+    """Ejecuta 'cantidad' casos seguidos y retorna casos por segundo."""
+    ejecutor(ruta_py, "1 1")   # calentamiento: no se cuenta
+    inicio = time.perf_counter()
+    for i in range(cantidad):
+        resultado = ejecutor(ruta_py, f"{i} {i}")
+        if resultado["salida"] != str(i + i):
+            raise RuntimeError(f"Salida inesperada: {resultado}")
+    return cantidad / (time.perf_counter() - inicio)
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_py = os.path.join(carpeta, "suma.py")
+        with open(ruta_py, "w", encoding="utf-8") as f:
+            f.write(PROGRAMA_PRUEBA)
+
+        print()
+        print("=" * 56)
+        print(f"  BENCHMARK DE EJECUTORES  ({cantidad} casos cada uno)")
+        print("=" * 56)
+
+        base = medir(ejecutar_programa, ruta_py, cantidad)
+        print(f"  subprocess.run : {base:8.1f} casos/s")
+
+        if not FORK_DISPONIBLE:
+            print("  fork-server    : no disponible en este sistema")
+        else:
+            with ServidorFork() as servidor:
+                fork = medir(servidor.ejecutar_programa, ruta_py, cantidad)
+            print(f"  fork-server    : {fork:8.1f} casos/s  ({fork / base:.1f}x)")
+        print("=" * 56)
+
+
+if __name__ == "__main__":
+    main()
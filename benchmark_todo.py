@@ -0,0 +1,365 @@
+# =============================================================
+# benchmark_todo.py
+# Micro-benchmarks de todos los módulos (el "test_todo" del tiempo)
+# =============================================================
+# test_todo.py dice si algo funciona; este archivo dice cuánto
+# tarda, de forma repetible, para poder comparar dos versiones.
+#
+# Cada benchmark:
+#   1. Prepara sus datos en una carpeta temporal (no toca las
+#      entregas ni las tareas reales)
+#   2. Se ejecuta CALENTAMIENTO veces sin medir
+#   3. Se mide REPETICIONES veces. Las funciones muy rápidas se
+#      ejecutan en lotes (hasta durar MIN_SEGUNDOS_REPETICION) y se
+#      divide por el tamaño del lote
+#   4. Reporta mediana, media, desviación, mínimo y máximo por
+#      llamada
+#
+# Modo regresión: se guarda una medición como base y después se
+# compara contra ella; si algún benchmark es más lento que la base
+# por más del umbral (por defecto 25%, comparando medianas) el
+# programa termina con código 1.
+#
+# Como ejecutarlo:
+#   python benchmark_todo.py
+#   python benchmark_todo.py --rapido                 (sin los de 100k archivos)
+#   python benchmark_todo.py --filtro cargar_casos
+#   python benchmark_todo.py --json resultados.json
+#   python benchmark_todo.py --guardar-base base.json
+#   python benchmark_todo.py --comparar base.json --umbral 0.25
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - time.perf_counter → reloj de alta resolución
+#   - statistics        → mediana, media y desviación
+#   - json              → resultados y base para comparar
+# =============================================================
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import grader
+from file_browser import _listar_contenido
+from file_validator import validar_archivo
+from prueba_carga import _carpeta_temporal
+from test_case_service import cargar_casos, guardar_casos, listar_tareas
+from transaction_service import (
+    generar_id_transaccion, guardar_archivo_fisico, guardar_registro,
+)
+
+
+REPETICIONES  = 15
+CALENTAMIENTO = 3
+
+# Una repetición de una función muy rápida se alarga hasta esto (lotes)
+MIN_SEGUNDOS_REPETICION = 0.01
+
+# Cantidad de archivos en las carpetas de tareas y del explorador
+TAMANOS = (10, 1000, 100000)
+TAMANOS_RAPIDO = (10, 1000)
+
+UMBRAL_REGRESION = 0.25
+
+PROGRAMA_SUMA = "a, b = map(int, input().split())\nprint(a + b)\n"
+CASOS_SUMA = [
+    {"id": 1, "entrada": "2 3",   "esperado": "5", "puntaje": 1.0},
+    {"id": 2, "entrada": "10 -4", "esperado": "6", "puntaje": 1.0},
+    {"id": 3, "entrada": "0 7",   "esperado": "7", "puntaje": 1.0},
+]
+
+
+# ── Medición ──────────────────────────────────────────────────
+
+def _calibrar_lote(funcion) -> int:
+    """Cuántas llamadas seguidas hacen falta para durar MIN_SEGUNDOS_REPETICION."""
+    lote = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(lote):
+            funcion()
+        if time.perf_counter() - inicio >= MIN_SEGUNDOS_REPETICION or lote >= 1_000_000:
+            return lote
+        lote *= 10
+
+
+def medir(funcion, repeticiones: int = REPETICIONES,
+          calentamiento: int = CALENTAMIENTO) -> dict:
+    """
+    Mide una función sin argumentos.
+    Retorna dict con segundos por llamada: mediana, media, desviacion,
+    minimo, maximo; y repeticiones y lote usados.
+    """
+    for _ in range(calentamiento):
+        funcion()
+    lote = _calibrar_lote(funcion)
+
+    muestras = []
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        for _ in range(lote):
+            funcion()
+        muestras.append((time.perf_counter() - inicio) / lote)
+
+    return {
+        "mediana":      statistics.median(muestras),
+        "media":        statistics.fmean(muestras),
+        "desviacion":   statistics.stdev(muestras) if len(muestras) > 1 else 0.0,
+        "minimo":       min(muestras),
+        "maximo":       max(muestras),
+        "repeticiones": len(muestras),
+        "lote":         lote,
+    }
+
+
+# ── Preparación de datos ──────────────────────────────────────
+
+def _crear_tareas(cantidad: int):
+    """'cantidad' tareas en casos_de_prueba (escritas directo: guardar_casos es más lento)."""
+    guardar_casos("BENCH-0", "PROF-BENCH", CASOS_SUMA)
+    with open(os.path.join("casos_de_prueba", "BENCH-0.json"), "rb") as f:
+        plantilla = f.read()
+    for i in range(1, cantidad):
+        with open(os.path.join("casos_de_prueba", f"BENCH-{i}.json"), "wb") as f:
+            f.write(plantilla)
+
+
+def _crear_carpeta_explorador(cantidad: int) -> str:
+    """Carpeta con 'cantidad' entradas: 90% archivos .py, 5% otros, 5% subcarpetas."""
+    carpeta = os.path.join("explorador", str(cantidad))
+    os.makedirs(carpeta)
+    for i in range(cantidad):
+        if i % 20 == 0:
+            os.mkdir(os.path.join(carpeta, f"sub_{i}"))
+        elif i % 20 == 1:
+            open(os.path.join(carpeta, f"notas_{i}.txt"), "w").close()
+        else:
+            open(os.path.join(carpeta, f"tarea_{i}.py"), "w").close()
+    return carpeta
+
+
+def _crear_carpetas_grandes(cantidad: int):
+    """Tareas y carpeta del explorador de un tamaño (las comparten varios benchmarks)."""
+    _crear_tareas(cantidad)
+    _crear_carpeta_explorador(cantidad)
+
+
+# ── Benchmarks ────────────────────────────────────────────────
+# Cada uno es una función que prepara sus datos (ya dentro de la
+# carpeta temporal) y retorna la función sin argumentos a medir.
+
+def _bench_validar_archivo():
+    return lambda: validar_archivo("tarea_final.py", 20 * 1024)
+
+
+def _bench_guardar_archivo_fisico():
+    contenido = PROGRAMA_SUMA.encode("utf-8")
+    return lambda: guardar_archivo_fisico(generar_id_transaccion(), "tarea.py", contenido)
+
+
+def _bench_guardar_registro():
+    return lambda: guardar_registro(generar_id_transaccion(), "tarea.py", 1024, "STU-BENCH")
+
+
+# Los de carpetas grandes reciben el tamaño y retornan su "preparar"
+# (los archivos ya los creó _crear_carpetas_grandes)
+
+def _bench_cargar_casos(cantidad: int):
+    def preparar():
+        return lambda: cargar_casos(f"BENCH-{cantidad // 2}")
+    return preparar
+
+
+def _bench_listar_tareas(cantidad: int):
+    def preparar():
+        return listar_tareas
+    return preparar
+
+
+def _bench_listar_contenido(cantidad: int):
+    def preparar():
+        carpeta = os.path.join("explorador", str(cantidad))
+        return lambda: _listar_contenido(carpeta)
+    return preparar
+
+
+def _bench_ejecutar_programa():
+    with open("suma.py", "w", encoding="utf-8") as f:
+        f.write(PROGRAMA_SUMA)
+    return lambda: grader.ejecutar_programa("suma.py", "2 3")
+
+
+def _bench_calificar():
+    guardar_casos("BENCH-CALIFICAR", "PROF-BENCH", CASOS_SUMA)
+    with open("suma.py", "w", encoding="utf-8") as f:
+        f.write(PROGRAMA_SUMA)
+    return lambda: grader.calificar("suma.py", "BENCH-CALIFICAR", usar_cache=False)
+
+
+def _bench_calificar_cache():
+    guardar_casos("BENCH-CACHE", "PROF-BENCH", CASOS_SUMA)
+    with open("suma.py", "w", encoding="utf-8") as f:
+        f.write(PROGRAMA_SUMA)
+    return lambda: grader.calificar("suma.py", "BENCH-CACHE")
+
+
+def lista_benchmarks(tamanos=TAMANOS) -> list:
+    """
+    [(nombre, datos, preparar)] en el orden en que se ejecutan.
+    'datos' es None o (función, argumento) que crea archivos compartidos:
+    los benchmarks seguidos con los mismos 'datos' usan la misma carpeta
+    temporal (crear 100k archivos una sola vez, no tres).
+    """
+    benchmarks = [
+        ("file_validator.validar_archivo",             None, _bench_validar_archivo),
+        ("transaction_service.guardar_archivo_fisico", None, _bench_guardar_archivo_fisico),
+        ("transaction_service.guardar_registro",       None, _bench_guardar_registro),
+    ]
+    for cantidad in tamanos:
+        datos = (_crear_carpetas_grandes, cantidad)
+        benchmarks += [
+            (f"test_case_service.cargar_casos[{cantidad}]",  datos, _bench_cargar_casos(cantidad)),
+            (f"test_case_service.listar_tareas[{cantidad}]", datos, _bench_listar_tareas(cantidad)),
+            (f"file_browser._listar_contenido[{cantidad}]",  datos,
+             _bench_listar_contenido(cantidad)),
+        ]
+    benchmarks += [
+        ("grader.ejecutar_programa", None, _bench_ejecutar_programa),
+        ("grader.calificar",         None, _bench_calificar),
+        ("grader.calificar[cache]",  None, _bench_calificar_cache),
+    ]
+    return benchmarks
+
+
+def ejecutar_benchmarks(filtro: str = None, tamanos=TAMANOS,
+                        repeticiones: int = REPETICIONES,
+                        calentamiento: int = CALENTAMIENTO, al_medir=None) -> dict:
+    """
+    Ejecuta los benchmarks (los que contengan 'filtro' en su nombre),
+    cada uno en su propia carpeta temporal.
+    al_medir(nombre, estadisticas) se llama al terminar cada uno.
+
+    Retorna {"entorno": {...}, "benchmarks": {nombre: estadisticas}}.
+    """
+    elegidos = [(nombre, datos, preparar) for nombre, datos, preparar
+                in lista_benchmarks(tamanos) if not filtro or filtro in nombre]
+
+    # Tandas que comparten carpeta temporal: los seguidos con los mismos
+    # datos van juntos; los que no tienen datos, cada uno por su cuenta
+    tandas = []
+    for datos, grupo in itertools.groupby(elegidos, key=lambda b: b[1]):
+        grupo = list(grupo)
+        tandas += [(datos, grupo)] if datos is not None else [(None, [b]) for b in grupo]
+
+    metricas_original = grader.REGISTRAR_METRICAS
+    grader.REGISTRAR_METRICAS = False
+    resultados = {}
+    try:
+        for datos, tanda in tandas:
+            with _carpeta_temporal():
+                if datos is not None:
+                    crear, argumento = datos
+                    crear(argumento)
+                for nombre, _, preparar in tanda:
+                    resultados[nombre] = medir(preparar(), repeticiones, calentamiento)
+                    if al_medir is not None:
+                        al_medir(nombre, resultados[nombre])
+    finally:
+        grader.REGISTRAR_METRICAS = metricas_original
+
+    return {
+        "entorno": {
+            "python":     sys.version.split()[0],
+            "plataforma": platform.platform(),
+            "nucleos":    os.cpu_count(),
+            "fecha":      time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": resultados,
+    }
+
+
+def comparar(actual: dict, base: dict, umbral: float = UMBRAL_REGRESION) -> list:
+    """
+    Compara las medianas con las de la base.
+    Retorna [(nombre, razón actual/base, es_regresion)] de los benchmarks
+    que están en ambas.
+    """
+    comparacion = []
+    for nombre, datos in actual["benchmarks"].items():
+        anterior = base["benchmarks"].get(nombre)
+        if anterior is None or anterior["mediana"] <= 0:
+            continue
+        razon = datos["mediana"] / anterior["mediana"]
+        comparacion.append((nombre, razon, razon > 1 + umbral))
+    return comparacion
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def _formatear_segundos(segundos: float) -> str:
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:9.1f} us"
+    if segundos < 1:
+        return f"{segundos * 1e3:9.2f} ms"
+    return f"{segundos:9.3f} s "
+
+
+def _mostrar_medicion(nombre: str, datos: dict):
+    desviacion = datos["desviacion"] / datos["media"] * 100 if datos["media"] else 0.0
+    print(f"  {nombre:<48}{_formatear_segundos(datos['mediana'])}  ±{desviacion:5.1f}%")
+
+
+def main(argumentos: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de todos los modulos.")
+    parser.add_argument("--filtro", help="solo los benchmarks cuyo nombre contenga esto")
+    parser.add_argument("--rapido", action="store_true",
+                        help=f"solo carpetas de {', '.join(map(str, TAMANOS_RAPIDO))} archivos")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--calentamiento", type=int, default=CALENTAMIENTO)
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    parser.add_argument("--guardar-base", help="guardar los resultados como base para comparar")
+    parser.add_argument("--comparar", help="base contra la que buscar regresiones")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                        help="cuánto más lento cuenta como regresion (0.25 = 25%%)")
+    args = parser.parse_args(argumentos)
+
+    # Las rutas se resuelven antes: los benchmarks cambian de carpeta
+    rutas = {clave: os.path.abspath(ruta) for clave, ruta in
+             (("json", args.json), ("base", args.guardar_base), ("comparar", args.comparar))
+             if ruta}
+
+    print()
+    print("=" * 72)
+    print("  BENCHMARKS (mediana por llamada)")
+    print("=" * 72)
+    resultados = ejecutar_benchmarks(args.filtro,
+                                     TAMANOS_RAPIDO if args.rapido else TAMANOS,
+                                     args.repeticiones, args.calentamiento,
+                                     al_medir=_mostrar_medicion)
+
+    for clave in ("json", "base"):
+        if clave in rutas:
+            with open(rutas[clave], "w", encoding="utf-8") as f:
+                json.dump(resultados, f, indent=4)
+
+    codigo = 0
+    if "comparar" in rutas:
+        with open(rutas["comparar"], "r", encoding="utf-8") as f:
+            base = json.load(f)
+        print("-" * 72)
+        print(f"  Comparación con la base (umbral {args.umbral * 100:.0f}%)")
+        for nombre, razon, regresion in comparar(resultados, base, args.umbral):
+            marca = "  <-- REGRESION" if regresion else ""
+            print(f"  {nombre:<48}{razon:7.2f}x{marca}")
+            if regresion:
+                codigo = 1
+    print("=" * 72)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
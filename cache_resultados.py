@@ -0,0 +1,186 @@
+# =============================================================
+# cache_resultados.py
+# Módulo — Caché persistente de calificaciones
+# =============================================================
+# Responsabilidad: si un estudiante vuelve a entregar EXACTAMENTE
+# el mismo archivo, devolver la calificación guardada en vez de
+# ejecutar otra vez todos los casos.
+#
+# La clave de cada entrada combina:
+#   - el SHA-256 de los bytes del archivo entregado
+#   - el hash de los casos de prueba de la tarea
+#   - los ajustes del ejecutor (tiempo límite, tipo de ejecutor...)
+# Si cualquiera de los tres cambia, la clave cambia y no hay acierto.
+#
+# Estructura en disco (una carpeta por tarea):
+#   cache_grader/resultados/TAREA-01/<clave>.json
+#
+# Cuando el profesor reescribe una tarea, guardar_casos() llama a
+# invalidar_tarea() y se borra la carpeta de esa tarea completa.
+#
+# Si la caché pasa de LIMITE_BYTES_CACHE se borran las entradas
+# usadas hace más tiempo (LRU): cada acierto actualiza la fecha
+# de modificación del archivo.
+#
+# Medir la caché es recorrer todas sus entradas, así que no se
+# hace en cada guardar(): cada proceso suma lo que va escribiendo
+# y recorre la carpeta solo la primera vez, cuando su cuenta pasa
+# del límite o cada ESCRITURAS_POR_REVISION escrituras (para ver
+# también lo que escribieron los demás procesos).
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - hashlib   → SHA-256
+#   - json      → guardar cada calificación
+#   - shutil    → borrar la carpeta de una tarea
+#   - threading → la cuenta de bytes se comparte entre hilos
+# =============================================================
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+CARPETA_CACHE      = os.path.join("cache_grader", "resultados")
+LIMITE_BYTES_CACHE = 50 * 1024 * 1024   # 50 MB
+
+# Cada cuántas escrituras se vuelve a medir la caché completa
+ESCRITURAS_POR_REVISION = 200
+
+# Bytes que este proceso cree que ocupa la caché (None: sin medir)
+_cuenta = {"bytes": None, "escrituras": 0}
+_candado_cuenta = threading.Lock()
+
+
+def _carpeta_tarea(cod_tarea: str) -> str:
+    return os.path.join(CARPETA_CACHE, cod_tarea)
+
+
+def hash_archivo(ruta: str) -> str:
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(65536), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def hash_datos(datos) -> str:
+    """SHA-256 de cualquier valor que se pueda guardar en JSON."""
+    texto = json.dumps(datos, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def calcular_clave(hash_entrega: str, casos: list, ajustes: dict) -> str:
+    """
+    Combina las tres partes de la clave en un solo hash.
+
+    Parámetros:
+        hash_entrega (str):  SHA-256 del archivo del estudiante
+        casos        (list): casos de prueba de la tarea
+        ajustes      (dict): ajustes del ejecutor que afectan al resultado
+    """
+    return hash_datos([hash_entrega, hash_datos(casos), ajustes])
+
+
+def buscar(cod_tarea: str, clave: str) -> dict:
+    """
+    Busca una calificación guardada.
+
+    Retorna:
+        dict: la calificación guardada
+        None: si no está en la caché
+    """
+    ruta = os.path.join(_carpeta_tarea(cod_tarea), f"{clave}.json")
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            calificacion = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Marcamos el uso para que la expulsión LRU no la borre pronto
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+    return calificacion
+
+
+def guardar(cod_tarea: str, clave: str, calificacion: dict):
+    """
+    Guarda una calificación en la caché.
+    Se escribe primero en un archivo temporal y luego se renombra,
+    así otro proceso nunca lee un JSON a medio escribir.
+    """
+    carpeta = _carpeta_tarea(cod_tarea)
+    os.makedirs(carpeta, exist_ok=True)
+
+    ruta     = os.path.join(carpeta, f"{clave}.json")
+    ruta_tmp = f"{ruta}.{threading.get_ident()}.{os.getpid()}.tmp"
+    with open(ruta_tmp, "w", encoding="utf-8") as f:
+        json.dump(calificacion, f, ensure_ascii=False)
+    tamano = os.path.getsize(ruta_tmp)
+    os.replace(ruta_tmp, ruta)
+
+    _anotar_escritura(tamano)
+
+
+def invalidar_tarea(cod_tarea: str):
+    """Borra todas las calificaciones guardadas de una tarea."""
+    shutil.rmtree(_carpeta_tarea(cod_tarea), ignore_errors=True)
+
+
+def _anotar_escritura(tamano: int):
+    """
+    Suma una escritura a la cuenta y, si hace falta, mide la caché
+    de verdad (y expulsa). Reemplazar una entrada la cuenta dos
+    veces: la cuenta solo puede pasarse, y eso adelanta una medición.
+    """
+    with _candado_cuenta:
+        _cuenta["escrituras"] += 1
+        if _cuenta["bytes"] is not None:
+            _cuenta["bytes"] += tamano
+        if (_cuenta["bytes"] is not None and _cuenta["bytes"] <= LIMITE_BYTES_CACHE
+                and _cuenta["escrituras"] < ESCRITURAS_POR_REVISION):
+            return
+        _cuenta["bytes"]      = _expulsar_si_hace_falta()
+        _cuenta["escrituras"] = 0
+
+
+def _expulsar_si_hace_falta() -> int:
+    """
+    Si la caché supera LIMITE_BYTES_CACHE, borra las entradas
+    menos usadas recientemente hasta volver a estar por debajo.
+    Retorna los bytes que ocupa la caché al terminar.
+    """
+    if not os.path.isdir(CARPETA_CACHE):
+        return 0
+
+    entradas = []   # (fecha de último uso, tamaño, ruta)
+    total    = 0
+    for tarea in os.scandir(CARPETA_CACHE):
+        if not tarea.is_dir():
+            continue
+        for entrada in os.scandir(tarea.path):
+            if not entrada.name.endswith(".json"):
+                continue
+            try:
+                info = entrada.stat()
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+    if total <= LIMITE_BYTES_CACHE:
+        return total
+
+    for _, tamano, ruta in sorted(entradas):
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamano
+        if total <= LIMITE_BYTES_CACHE:
+            break
+    return total
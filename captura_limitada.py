@@ -0,0 +1,194 @@
+# =============================================================
+# captura_limitada.py
+# Módulo — Captura de stdout/stderr con tope de bytes
+# =============================================================
+# Responsabilidad: leer lo que imprime el programa del estudiante
+# poco a poco y NUNCA guardar más de un máximo de bytes.
+#
+# Con capture_output=True, subprocess guarda TODA la salida en
+# memoria. Un programa que imprime dentro de un bucle infinito
+# puede llenar gigabytes antes de que llegue el timeout.
+#
+# Aquí cada tubería se lee por bloques en su propio hilo:
+#   - mientras no se pase del tope, el bloque se guarda
+#   - al pasarse, se guarda solo lo que cabe, se marca "truncado"
+#     y se avisa (al_exceder) para que el proceso se mate
+#
+# Lo usan grader.ejecutar_programa y fork_server.
+#
+# La entrada puede ser bytes o un archivo abierto (casos con
+# blobs, ver almacen_blobs.py). Si es un archivo real sin
+# comprimir se pasa a la tubería con os.sendfile, sin copiarlo a
+# memoria. Con un "consumidor" (ver comparadores.py) cada bloque
+# de stdout se le entrega apenas llega: así se compara una salida
+# de muchos MB guardando solo los primeros limite_bytes.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - threading → un hilo escribe stdin y otros dos leen las salidas
+#   - os        → lectura por bloques de las tuberías
+# =============================================================
+
+import io
+import os
+import threading
+
+
+# Máximo de bytes que se guardan de stdout (y otro tanto de stderr)
+LIMITE_SALIDA_BYTES = 1024 * 1024   # 1 MB
+
+_TAMANO_BLOQUE = 65536
+
+
+def a_texto(datos: bytes) -> str:
+    """
+    Bytes del programa → texto, igual que text=True en subprocess:
+    saltos de línea de Windows (\\r\\n) se vuelven \\n.
+    Un carácter cortado a la mitad por el tope se reemplaza por '?'.
+    """
+    texto = datos.decode("utf-8", errors="replace")
+    return texto.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _copiar_archivo(origen, flujo):
+    """Copia un archivo abierto a la tubería; con os.sendfile si se puede."""
+    # Solo un archivo del disco sin comprimir tiene un descriptor que
+    # sirva para sendfile (gzip también tiene fileno(), pero comprimido)
+    if isinstance(origen, (io.BufferedReader, io.FileIO)) and hasattr(os, "sendfile"):
+        flujo.flush()
+        destino, fd_origen = flujo.fileno(), origen.fileno()
+        posicion = origen.tell()
+        try:
+            while True:
+                enviados = os.sendfile(destino, fd_origen, posicion, _TAMANO_BLOQUE * 16)
+                if enviados == 0:
+                    return
+                posicion += enviados
+        except OSError as e:
+            if isinstance(e, BrokenPipeError) or posicion != origen.tell():
+                raise
+            # El sistema no permite sendfile hacia una tubería: copia normal
+
+    while True:
+        bloque = origen.read(_TAMANO_BLOQUE)
+        if not bloque:
+            return
+        flujo.write(bloque)
+
+
+class CapturaLimitada:
+    """
+    Captura en curso de un proceso. Uso:
+
+        captura = CapturaLimitada(p.stdin, p.stdout, p.stderr, b"2 3",
+                                  al_exceder=p.kill)
+        captura.iniciar()
+        ... esperar al proceso ...
+        captura.terminar()
+        captura.salida, captura.error, captura.truncado
+    """
+
+    def __init__(self, flujo_entrada, flujo_salida, flujo_error, entrada,
+                 limite_bytes: int = None, al_exceder=None, consumidor=None,
+                 limite_corte: int = None):
+        """
+        entrada:      bytes, o un archivo binario abierto
+        limite_bytes: bytes que se guardan de cada salida
+        consumidor:   función que recibe cada bloque de stdout
+        limite_corte: bytes de stdout a partir de los que se detiene el
+                      programa (por defecto limite_bytes). Entre uno y
+                      otro se sigue leyendo sin guardar.
+        """
+        self.limite_bytes = LIMITE_SALIDA_BYTES if limite_bytes is None else limite_bytes
+        self.limite_corte = self.limite_bytes if limite_corte is None else limite_corte
+        self.truncado     = False
+        self._al_exceder  = al_exceder
+        self._consumidor  = consumidor
+        self._buffers     = {"salida": bytearray(), "error": bytearray()}
+        self._candado     = threading.Lock()
+        self._hilos = [
+            threading.Thread(target=self._escribir, args=(flujo_entrada, entrada), daemon=True),
+            threading.Thread(target=self._leer, args=(flujo_salida, "salida"), daemon=True),
+            threading.Thread(target=self._leer, args=(flujo_error, "error"), daemon=True),
+        ]
+
+    # ── Hilos ──────────────────────────────────────────────────
+
+    def _escribir(self, flujo, datos):
+        """Envía la entrada al programa y cierra su stdin."""
+        try:
+            if hasattr(datos, "read"):
+                _copiar_archivo(datos, flujo)
+            else:
+                flujo.write(datos)
+            flujo.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            pass   # el programa terminó sin leer toda la entrada
+        finally:
+            try:
+                flujo.close()
+            except OSError:
+                pass
+
+    def _leer(self, flujo, nombre: str):
+        """Lee una tubería hasta EOF guardando como mucho limite_bytes."""
+        buffer = self._buffers[nombre]
+        consumidor = self._consumidor if nombre == "salida" else None
+        corte = self.limite_corte if nombre == "salida" else self.limite_bytes
+        leidos = 0
+        fd = flujo.fileno()
+        try:
+            while True:
+                bloque = os.read(fd, _TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                leidos += len(bloque)
+                if consumidor is not None and not self.truncado:
+                    consumidor(bloque)
+                espacio = self.limite_bytes - len(buffer)
+                if len(bloque) <= espacio:
+                    buffer += bloque
+                    continue
+                # Se pasó del tope: guardamos lo que cabe y seguimos
+                # leyendo (y descartando) hasta que el proceso muera
+                buffer += bloque[:max(espacio, 0)]
+                if leidos > corte:
+                    self._marcar_truncado()
+        except OSError:
+            pass
+        finally:
+            flujo.close()
+
+    def _marcar_truncado(self):
+        with self._candado:
+            if self.truncado:
+                return
+            self.truncado = True
+        if self._al_exceder is not None:
+            try:
+                self._al_exceder()
+            except OSError:
+                pass
+
+    # ── API ────────────────────────────────────────────────────
+
+    def iniciar(self):
+        for hilo in self._hilos:
+            hilo.start()
+
+    def terminar(self, timeout: float = None):
+        """Espera a que los hilos terminen (las tuberías llegaron a EOF)."""
+        for hilo in self._hilos:
+            hilo.join(timeout)
+
+    @property
+    def salida(self) -> str:
+        return a_texto(bytes(self._buffers["salida"]))
+
+    @property
+    def error(self) -> str:
+        texto = a_texto(bytes(self._buffers["error"]))
+        if self.truncado:
+            aviso = (f"Salida truncada: el programa imprimio mas de "
+                     f"{self.limite_bytes} bytes y se detuvo.")
+            texto = f"{texto}\n{aviso}" if texto.strip() else aviso
+        return texto
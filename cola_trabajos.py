@@ -0,0 +1,665 @@
+# =============================================================
+# cola_trabajos.py
+# Módulo — Cola persistente de calificaciones (SQLite)
+# =============================================================
+# Responsabilidad: que una calificación larga sobreviva a un
+# corte. Si el proceso muere a la mitad de la noche de entrega,
+# al volver a levantarlo se sigue donde quedó.
+#
+# Cada trabajo es (id_transaccion, cod_tarea) y pasa por estados:
+#
+#     en_cola → ejecutando → terminado
+#                         ↘ fallido   (tras MAX_INTENTOS caídas)
+#
+# Mientras un trabajo se ejecuta, cada caso terminado se guarda
+# como "checkpoint" y un hilo aparte renueva su "latido" cada
+# INTERVALO_LATIDO_SEGUNDOS (aunque ningún caso termine en ese
+# rato: la precompilación o las mediciones de rendimiento.py
+# pueden tardar minutos). Si el trabajador se cae:
+#   - otro trabajador ve que su proceso ya no existe (o que dejó
+#     de dar señales hace LATIDO_VENCIDO_SEGUNDOS) y lo devuelve
+#     a la cola
+#   - al retomarlo, los casos con checkpoint NO se vuelven a
+#     ejecutar (si el caso no cambió desde entonces)
+#
+# Los trabajadores son procesos independientes de la interfaz:
+# se pueden lanzar tantos como se quiera, en otras terminales.
+# Qué trabajo toma cada uno lo decide planificador.py (reparto
+# justo entre estudiantes y tareas, carril prioritario para las
+# entregas finales).
+#
+# Como ejecutarlo:
+#   python cola_trabajos.py encolar TAREA-01
+#       → encola todas las entregas de registros_entregas
+#   python cola_trabajos.py encolar TAREA-01 --transacciones TXN-aaa TXN-bbb
+#   python cola_trabajos.py encolar TAREA-01 --practica
+#       → carril de práctica (se atiende después de las finales)
+#   python cola_trabajos.py trabajar --procesos 4
+#       → procesa la cola hasta vaciarla (--esperar: no termina nunca)
+#   python cola_trabajos.py estado
+#       → profundidad de la cola y tiempos de espera
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - sqlite3         → base de datos en un solo archivo, con transacciones
+#   - multiprocessing → varios trabajadores desde un solo comando
+#   - socket          → nombre de la máquina de cada trabajador
+#   - threading       → latido mientras se califica
+# =============================================================
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import planificador
+from grader import calificar
+from test_case_service import cargar_casos
+from transaction_service import (
+    cargar_registro, guardar_calificacion, listar_registros, ruta_archivo_subido,
+)
+
+
+CARPETA_COLA = "cola_calificacion"
+ARCHIVO_COLA = "trabajos.db"
+
+# Un trabajo "ejecutando" sin señales por más de esto se da por muerto
+LATIDO_VENCIDO_SEGUNDOS = 120
+
+# Cada cuánto renueva su latido un trabajo en ejecución
+INTERVALO_LATIDO_SEGUNDOS = 30
+
+# Veces que se retoma un trabajo antes de marcarlo como fallido
+MAX_INTENTOS = 3
+
+EN_COLA    = "en_cola"
+EJECUTANDO = "ejecutando"
+TERMINADO  = "terminado"
+FALLIDO    = "fallido"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_transaccion TEXT    NOT NULL,
+    cod_tarea      TEXT    NOT NULL,
+    ruta           TEXT    NOT NULL,
+    estado         TEXT    NOT NULL,
+    trabajador     TEXT,
+    intentos       INTEGER NOT NULL DEFAULT 0,
+    creado         REAL    NOT NULL,
+    latido         REAL,
+    id_estudiante  TEXT,
+    carril         TEXT    NOT NULL DEFAULT 'final',
+    iniciado       REAL,
+    calificacion   TEXT,
+    error          TEXT,
+    UNIQUE (id_transaccion, cod_tarea)
+);
+CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos (estado, id);
+CREATE INDEX IF NOT EXISTS trabajos_flujo
+    ON trabajos (estado, carril, id_estudiante, cod_tarea, id);
+CREATE TABLE IF NOT EXISTS atencion_estudiantes (
+    id_estudiante TEXT PRIMARY KEY,
+    ultimo        REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id_trabajo INTEGER NOT NULL,
+    caso_id    INTEGER NOT NULL,
+    hash_caso  TEXT    NOT NULL,
+    resultado  TEXT    NOT NULL,
+    PRIMARY KEY (id_trabajo, caso_id)
+);
+"""
+
+
+def _conectar() -> sqlite3.Connection:
+    """
+    Abre la base de la cola (la crea si no existe).
+    isolation_level=None: cada operación decide su propia transacción.
+    WAL deja que muchos trabajadores lean mientras uno escribe.
+    """
+    os.makedirs(CARPETA_COLA, exist_ok=True)
+    conexion = sqlite3.connect(os.path.join(CARPETA_COLA, ARCHIVO_COLA),
+                               timeout=30, isolation_level=None)
+    conexion.row_factory = sqlite3.Row
+    conexion.execute("PRAGMA journal_mode=WAL")
+    _migrar(conexion)
+    conexion.executescript(_ESQUEMA)
+    return conexion
+
+
+# Columnas agregadas después de la primera versión de la cola
+_COLUMNAS_NUEVAS = {
+    "id_estudiante": "TEXT",
+    "carril":        "TEXT NOT NULL DEFAULT 'final'",
+    "iniciado":      "REAL",
+}
+
+
+def _migrar(conexion: sqlite3.Connection):
+    """Agrega a una base antigua las columnas y tablas que le falten."""
+    existentes = {fila["name"] for fila in conexion.execute("PRAGMA table_info(trabajos)")}
+    if not existentes:
+        return   # base nueva: la crea _ESQUEMA
+    for columna, tipo in _COLUMNAS_NUEVAS.items():
+        if columna not in existentes:
+            conexion.execute(f"ALTER TABLE trabajos ADD COLUMN {columna} {tipo}")
+    tablas = {fila["name"] for fila in conexion.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "atencion_estudiantes" not in tablas:
+        # Se llena una sola vez con lo que ya dice el historial
+        conexion.executescript(_ESQUEMA)
+        conexion.execute(
+            "INSERT OR IGNORE INTO atencion_estudiantes (id_estudiante, ultimo) "
+            "SELECT id_estudiante, MAX(iniciado) FROM trabajos "
+            "WHERE iniciado IS NOT NULL AND id_estudiante IS NOT NULL GROUP BY id_estudiante")
+
+
+def nombre_trabajador() -> str:
+    """Identifica al proceso actual: "maquina:pid"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _trabajador_muerto(trabajador: str) -> bool:
+    """
+    True si el trabajador corría en ESTA máquina y su proceso ya no existe.
+    De otras máquinas no se puede saber: para ellas solo cuenta el latido.
+    """
+    maquina, _, pid = (trabajador or "").rpartition(":")
+    if maquina != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False   # existe, pero es de otro usuario
+    return False
+
+
+# ── Productor ─────────────────────────────────────────────────
+
+def encolar(id_transaccion: str, cod_tarea: str, ruta: str = None,
+            carril: str = planificador.CARRIL_FINAL, id_estudiante: str = None) -> int:
+    """
+    Agrega un trabajo a la cola.
+
+    Parámetros:
+        id_transaccion (str): entrega, ej: "TXN-..."
+        cod_tarea      (str): tarea con la que se califica
+        ruta           (str): .py a calificar. None → se busca con el
+                              registro de la entrega
+        carril         (str): planificador.CARRIL_FINAL o CARRIL_PRACTICA
+        id_estudiante  (str): dueño de la entrega, para el reparto justo.
+                              None → se toma del registro
+
+    Retorna:
+        int:  id del trabajo (si ya estaba encolado, el mismo de antes)
+        None: si la entrega no existe
+    """
+    if ruta is None or id_estudiante is None:
+        registro = cargar_registro(id_transaccion)
+        if registro is None and ruta is None:
+            return None
+        if registro is not None:
+            ruta = ruta or ruta_archivo_subido(id_transaccion, registro["nombre_archivo"])
+            id_estudiante = id_estudiante or registro["id_estudiante"]
+
+    conexion = _conectar()
+    try:
+        conexion.execute(
+            "INSERT OR IGNORE INTO trabajos "
+            "(id_transaccion, cod_tarea, ruta, estado, creado, carril, id_estudiante) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (id_transaccion, cod_tarea, ruta, EN_COLA, time.time(), carril, id_estudiante))
+        fila = conexion.execute(
+            "SELECT id FROM trabajos WHERE id_transaccion = ? AND cod_tarea = ?",
+            (id_transaccion, cod_tarea)).fetchone()
+        return fila["id"]
+    finally:
+        conexion.close()
+
+
+# ── Trabajador ────────────────────────────────────────────────
+
+def recuperar_trabajos_huerfanos() -> int:
+    """
+    Devuelve a la cola los trabajos cuyo trabajador murió.
+    Los que ya se cayeron MAX_INTENTOS veces quedan como fallidos
+    (probablemente es la entrega la que tumba al trabajador).
+
+    Retorna cuántos trabajos se recuperaron.
+    """
+    conexion = _conectar()
+    try:
+        conexion.execute("BEGIN IMMEDIATE")
+        vencido = time.time() - LATIDO_VENCIDO_SEGUNDOS
+        huerfanos = [
+            fila for fila in conexion.execute(
+                "SELECT id, trabajador, intentos, latido FROM trabajos WHERE estado = ?",
+                (EJECUTANDO,))
+            if (fila["latido"] or 0) < vencido or _trabajador_muerto(fila["trabajador"])
+        ]
+        for fila in huerfanos:
+            if fila["intentos"] >= MAX_INTENTOS:
+                conexion.execute(
+                    "UPDATE trabajos SET estado = ?, trabajador = NULL, error = ? WHERE id = ?",
+                    (FALLIDO, f"El trabajador se cayo {fila['intentos']} veces", fila["id"]))
+            else:
+                conexion.execute(
+                    "UPDATE trabajos SET estado = ?, trabajador = NULL WHERE id = ?",
+                    (EN_COLA, fila["id"]))
+        conexion.execute("COMMIT")
+        return len(huerfanos)
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    finally:
+        conexion.close()
+
+
+def tomar_trabajo(trabajador: str = None) -> dict:
+    """
+    Reserva para este trabajador el trabajo que elija el planificador.
+    BEGIN IMMEDIATE bloquea la base: dos trabajadores nunca toman el mismo.
+
+    Retorna el trabajo (dict con id, id_transaccion, id_estudiante,
+    cod_tarea, ruta, intentos) o None si la cola está vacía o todas las tareas en cola
+    ya llegaron a su max_concurrencia.
+    """
+    trabajador = trabajador or nombre_trabajador()
+    conexion   = _conectar()
+    try:
+        # Los topes salen del JSON de cada tarea: se leen antes de
+        # bloquear la base, no mientras los demás trabajadores esperan
+        topes = {fila["cod_tarea"]: planificador.max_concurrencia(fila["cod_tarea"])
+                 for fila in conexion.execute(
+                     "SELECT DISTINCT cod_tarea FROM trabajos WHERE estado = ?", (EN_COLA,))}
+
+        conexion.execute("BEGIN IMMEDIATE")
+        # Cabeza de cada flujo: el más antiguo por (carril, estudiante, tarea)
+        candidatos = [dict(fila) for fila in conexion.execute(
+            "SELECT MIN(id) AS id, carril, id_estudiante, cod_tarea FROM trabajos "
+            "WHERE estado = ? GROUP BY carril, id_estudiante, cod_tarea", (EN_COLA,))]
+        for cod_tarea in {c["cod_tarea"] for c in candidatos} - topes.keys():
+            topes[cod_tarea] = planificador.max_concurrencia(cod_tarea)   # recién encolada
+        en_ejecucion = conexion.execute(
+            "SELECT cod_tarea, id_estudiante FROM trabajos WHERE estado = ?",
+            (EJECUTANDO,)).fetchall()
+        por_tarea, por_estudiante = {}, {}
+        for fila in en_ejecucion:
+            por_tarea[fila["cod_tarea"]] = por_tarea.get(fila["cod_tarea"], 0) + 1
+            por_estudiante[fila["id_estudiante"]] = por_estudiante.get(fila["id_estudiante"], 0) + 1
+        estudiantes = sorted({c["id_estudiante"] for c in candidatos
+                              if c["id_estudiante"] is not None})
+        ultimo_servicio = {
+            fila["id_estudiante"]: fila["ultimo"] for fila in conexion.execute(
+                "SELECT id_estudiante, ultimo FROM atencion_estudiantes "
+                f"WHERE id_estudiante IN ({', '.join('?' * len(estudiantes))})", estudiantes)
+        } if estudiantes else {}
+
+        elegido = planificador.elegir_siguiente(candidatos, por_tarea, por_estudiante,
+                                                ultimo_servicio, topes)
+        if elegido is None:
+            conexion.execute("COMMIT")
+            return None
+        ahora = time.time()
+        conexion.execute(
+            "UPDATE trabajos SET estado = ?, trabajador = ?, intentos = intentos + 1, "
+            "latido = ?, iniciado = ? WHERE id = ?",
+            (EJECUTANDO, trabajador, ahora, ahora, elegido["id"]))
+        if elegido["id_estudiante"] is not None:
+            conexion.execute(
+                "INSERT OR REPLACE INTO atencion_estudiantes (id_estudiante, ultimo) "
+                "VALUES (?, ?)", (elegido["id_estudiante"], ahora))
+        trabajo = conexion.execute(
+            "SELECT id, id_transaccion, id_estudiante, cod_tarea, ruta, intentos "
+            "FROM trabajos WHERE id = ?",
+            (elegido["id"],)).fetchone()
+        conexion.execute("COMMIT")
+        return dict(trabajo)
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    finally:
+        conexion.close()
+
+
+def guardar_checkpoint(id_trabajo: int, caso: dict, resultado: dict,
+                       conexion: sqlite3.Connection = None):
+    """Guarda el resultado de un caso y renueva el latido del trabajo."""
+    propia = conexion is None
+    conexion = conexion or _conectar()
+    try:
+        conexion.execute("BEGIN IMMEDIATE")
+        conexion.execute(
+            "INSERT OR REPLACE INTO checkpoints (id_trabajo, caso_id, hash_caso, resultado) "
+            "VALUES (?, ?, ?, ?)",
+            (id_trabajo, caso["id"], caso["hash"],
+             json.dumps(resultado, ensure_ascii=False)))
+        conexion.execute("UPDATE trabajos SET latido = ? WHERE id = ?",
+                         (time.time(), id_trabajo))
+        conexion.execute("COMMIT")
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    finally:
+        if propia:
+            conexion.close()
+
+
+def _latir(id_trabajo: int, listo: threading.Event):
+    """
+    Renueva el latido del trabajo cada INTERVALO_LATIDO_SEGUNDOS hasta
+    que 'listo' se active. Corre en su propio hilo (y su propia conexión).
+    """
+    while not listo.wait(INTERVALO_LATIDO_SEGUNDOS):
+        try:
+            conexion = _conectar()
+            try:
+                conexion.execute("UPDATE trabajos SET latido = ? WHERE id = ? AND estado = ?",
+                                 (time.time(), id_trabajo, EJECUTANDO))
+            finally:
+                conexion.close()
+        except sqlite3.Error:
+            pass   # base ocupada: lo intenta de nuevo en el próximo latido
+
+
+def casos_terminados(id_trabajo: int, casos: list) -> dict:
+    """
+    Resultados con checkpoint que todavía sirven: caso_id → resultado.
+    Si el profesor cambió un caso (o el comparador de la tarea) después
+    del checkpoint, ese caso se descarta y se vuelve a ejecutar.
+    'casos' son los de cargar_casos, que ya traen su "hash".
+    """
+    hashes   = {caso["id"]: caso["hash"] for caso in casos}
+    conexion = _conectar()
+    try:
+        filas = conexion.execute(
+            "SELECT caso_id, hash_caso, resultado FROM checkpoints WHERE id_trabajo = ?",
+            (id_trabajo,)).fetchall()
+    finally:
+        conexion.close()
+    return {
+        fila["caso_id"]: json.loads(fila["resultado"])
+        for fila in filas
+        if hashes.get(fila["caso_id"]) == fila["hash_caso"]
+    }
+
+
+def _terminar(id_trabajo: int, estado: str, calificacion: dict = None, error: str = None):
+    conexion = _conectar()
+    try:
+        conexion.execute("BEGIN IMMEDIATE")
+        conexion.execute(
+            "UPDATE trabajos SET estado = ?, trabajador = NULL, calificacion = ?, error = ?, "
+            "latido = ? WHERE id = ?",
+            (estado, json.dumps(calificacion, ensure_ascii=False) if calificacion else None,
+             error, time.time(), id_trabajo))
+        if estado != EN_COLA:
+            # La calificación final ya guarda todos los casos
+            conexion.execute("DELETE FROM checkpoints WHERE id_trabajo = ?", (id_trabajo,))
+        conexion.execute("COMMIT")
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    finally:
+        conexion.close()
+
+
+def procesar_trabajo(trabajo: dict) -> dict:
+    """
+    Califica un trabajo ya tomado, retomando sus checkpoints.
+    Retorna la calificación (o un dict con "error").
+    """
+    config = cargar_casos(trabajo["cod_tarea"])
+    if config is None:
+        error = f"No existe configuracion para la tarea '{trabajo['cod_tarea']}'"
+        _terminar(trabajo["id"], FALLIDO, error=error)
+        return {"error": error}
+    if not os.path.isfile(trabajo["ruta"]):
+        error = f"No existe el archivo {trabajo['ruta']}"
+        _terminar(trabajo["id"], FALLIDO, error=error)
+        return {"error": error}
+
+    previos  = casos_terminados(trabajo["id"], config["casos"])
+    conexion = _conectar()
+    listo    = threading.Event()
+    latido   = threading.Thread(target=_latir, args=(trabajo["id"], listo), daemon=True)
+    latido.start()
+    try:
+        calificacion = calificar(
+            trabajo["ruta"], trabajo["cod_tarea"], previos=previos,
+            al_terminar_caso=lambda caso, resultado:
+                guardar_checkpoint(trabajo["id"], caso, resultado, conexion),
+            id_estudiante=trabajo.get("id_estudiante"))
+    except Exception as e:
+        # Error del grader, no del estudiante: vuelve a la cola
+        # hasta MAX_INTENTOS veces
+        estado = FALLIDO if trabajo["intentos"] >= MAX_INTENTOS else EN_COLA
+        _terminar(trabajo["id"], estado, error=str(e))
+        return {"error": str(e)}
+    finally:
+        listo.set()
+        latido.join()
+        conexion.close()
+
+    if "error" in calificacion:
+        _terminar(trabajo["id"], FALLIDO, error=calificacion["error"])
+    else:
+        calificacion["id_transaccion"] = trabajo["id_transaccion"]
+        calificacion["casos_retomados"] = len(previos)
+        _terminar(trabajo["id"], TERMINADO, calificacion=calificacion)
+        guardar_calificacion(trabajo["id_transaccion"], calificacion)
+    return calificacion
+
+
+def trabajar(esperar: bool = False, pausa_segundos: float = 1.0):
+    """
+    Bucle de un trabajador: toma trabajos hasta vaciar la cola.
+    Con esperar=True no termina nunca; cuando no hay trabajo
+    espera pausa_segundos y vuelve a mirar.
+
+    Es un generador: produce (trabajo, calificacion) por cada uno.
+    """
+    trabajador = nombre_trabajador()
+    while True:
+        recuperar_trabajos_huerfanos()
+        trabajo = tomar_trabajo(trabajador)
+        if trabajo is None:
+            # Cola vacía → terminar. Si quedan trabajos es que sus
+            # tareas están en el tope de concurrencia: esperar turno
+            if not esperar and contar_por_estado()[EN_COLA] == 0:
+                return
+            time.sleep(pausa_segundos)
+            continue
+        yield trabajo, procesar_trabajo(trabajo)
+
+
+# ── Consultas ─────────────────────────────────────────────────
+
+def obtener_trabajo(id_transaccion: str, cod_tarea: str) -> dict:
+    """
+    Estado de un trabajo; si terminó, incluye su calificación.
+    Retorna None si nunca se encoló.
+    """
+    conexion = _conectar()
+    try:
+        fila = conexion.execute(
+            "SELECT * FROM trabajos WHERE id_transaccion = ? AND cod_tarea = ?",
+            (id_transaccion, cod_tarea)).fetchone()
+    finally:
+        conexion.close()
+    if fila is None:
+        return None
+    trabajo = dict(fila)
+    trabajo["calificacion"] = json.loads(fila["calificacion"]) if fila["calificacion"] else None
+    return trabajo
+
+
+def listar_terminados(cod_tarea: str) -> list:
+    """
+    Trabajos terminados de una tarea, con su calificación guardada.
+    Es lo que recalificacion.py vuelve a calificar.
+    """
+    conexion = _conectar()
+    try:
+        filas = conexion.execute(
+            "SELECT id, id_transaccion, cod_tarea, ruta, calificacion FROM trabajos "
+            "WHERE cod_tarea = ? AND estado = ? ORDER BY id", (cod_tarea, TERMINADO)).fetchall()
+    finally:
+        conexion.close()
+    trabajos = []
+    for fila in filas:
+        trabajo = dict(fila)
+        trabajo["calificacion"] = json.loads(fila["calificacion"])
+        trabajos.append(trabajo)
+    return trabajos
+
+
+def actualizar_calificacion(id_trabajo: int, calificacion: dict):
+    """Reemplaza la calificación guardada de un trabajo terminado."""
+    _terminar(id_trabajo, TERMINADO, calificacion=calificacion)
+
+
+def contar_por_estado(cod_tarea: str = None) -> dict:
+    """Retorna dict estado → cantidad de trabajos (opcionalmente de una tarea)."""
+    conexion = _conectar()
+    try:
+        if cod_tarea is None:
+            filas = conexion.execute(
+                "SELECT estado, COUNT(*) AS n FROM trabajos GROUP BY estado")
+        else:
+            filas = conexion.execute(
+                "SELECT estado, COUNT(*) AS n FROM trabajos WHERE cod_tarea = ? "
+                "GROUP BY estado", (cod_tarea,))
+        conteo = {estado: 0 for estado in (EN_COLA, EJECUTANDO, TERMINADO, FALLIDO)}
+        conteo.update({fila["estado"]: fila["n"] for fila in filas})
+        return conteo
+    finally:
+        conexion.close()
+
+
+def estadisticas_cola() -> dict:
+    """
+    Números para dimensionar la cantidad de trabajadores.
+
+    Retorna dict con:
+        - profundidad          (dict): carril → trabajos en cola
+        - en_cola_por_tarea    (dict): cod_tarea → trabajos en cola
+        - ejecutando_por_tarea (dict): cod_tarea → trabajos ejecutándose
+        - espera_mas_antigua   (float): segundos que lleva en cola el
+                                        trabajo más antiguo (0 si no hay)
+        - espera_promedio      (float): espera media de los trabajos ya
+                                        iniciados (None si no hay)
+        - espera_maxima        (float): la peor espera entre ellos
+    """
+    conexion = _conectar()
+    try:
+        ahora = time.time()
+        profundidad = {carril: 0 for carril in planificador.ORDEN_CARRILES}
+        profundidad.update({
+            fila["carril"]: fila["n"] for fila in conexion.execute(
+                "SELECT carril, COUNT(*) AS n FROM trabajos WHERE estado = ? GROUP BY carril",
+                (EN_COLA,))
+        })
+
+        def por_tarea(estado: str) -> dict:
+            return {fila["cod_tarea"]: fila["n"] for fila in conexion.execute(
+                "SELECT cod_tarea, COUNT(*) AS n FROM trabajos WHERE estado = ? "
+                "GROUP BY cod_tarea", (estado,))}
+
+        mas_antiguo = conexion.execute(
+            "SELECT MIN(creado) AS creado FROM trabajos WHERE estado = ?",
+            (EN_COLA,)).fetchone()["creado"]
+        esperas = conexion.execute(
+            "SELECT AVG(iniciado - creado) AS promedio, MAX(iniciado - creado) AS maxima "
+            "FROM trabajos WHERE iniciado IS NOT NULL").fetchone()
+        return {
+            "profundidad":          profundidad,
+            "en_cola_por_tarea":    por_tarea(EN_COLA),
+            "ejecutando_por_tarea": por_tarea(EJECUTANDO),
+            "espera_mas_antigua":   round(ahora - mas_antiguo, 3) if mas_antiguo else 0.0,
+            "espera_promedio":      (round(esperas["promedio"], 3)
+                                     if esperas["promedio"] is not None else None),
+            "espera_maxima":        (round(esperas["maxima"], 3)
+                                     if esperas["maxima"] is not None else None),
+        }
+    finally:
+        conexion.close()
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def _trabajar_e_imprimir(esperar: bool):
+    for trabajo, calificacion in trabajar(esperar):
+        if "error" in calificacion:
+            print(f"  [{nombre_trabajador()}] [ERROR] {trabajo['id_transaccion']}: "
+                  f"{calificacion['error']}")
+        else:
+            print(f"  [{nombre_trabajador()}] {trabajo['id_transaccion']}  "
+                  f"{calificacion['porcentaje']}%  "
+                  f"({calificacion['casos_retomados']} casos retomados)")
+
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Cola persistente de calificaciones.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_encolar = comandos.add_parser("encolar", help="agrega entregas a la cola")
+    p_encolar.add_argument("cod_tarea", help="codigo de la tarea, ej: TAREA-01")
+    p_encolar.add_argument("--transacciones", nargs="+", metavar="TXN",
+                           help="solo estas entregas (por defecto: todas)")
+    p_encolar.add_argument("--practica", action="store_true",
+                           help="carril de practica (despues de las entregas finales)")
+
+    p_trabajar = comandos.add_parser("trabajar", help="procesa la cola")
+    p_trabajar.add_argument("--procesos", type=int, default=1,
+                            help="trabajadores en paralelo (por defecto: 1)")
+    p_trabajar.add_argument("--esperar", action="store_true",
+                            help="no terminar cuando la cola quede vacia")
+
+    comandos.add_parser("estado", help="cuenta los trabajos por estado")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "encolar":
+        cod_tarea = args.cod_tarea.strip().upper().replace(" ", "-")
+        ids = args.transacciones or [r["id_transaccion"] for r in listar_registros()]
+        carril = planificador.CARRIL_PRACTICA if args.practica else planificador.CARRIL_FINAL
+        encolados = [id_t for id_t in ids
+                     if encolar(id_t, cod_tarea, carril=carril) is not None]
+        print(f"  {len(encolados)} trabajo(s) en la cola para {cod_tarea}.")
+
+    elif args.comando == "trabajar":
+        if args.procesos <= 1:
+            _trabajar_e_imprimir(args.esperar)
+            return
+        procesos = [multiprocessing.Process(target=_trabajar_e_imprimir, args=(args.esperar,))
+                    for _ in range(args.procesos)]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join()
+
+    else:
+        for estado, cantidad in contar_por_estado().items():
+            print(f"  {estado:<12} {cantidad:>6}")
+        estadisticas = estadisticas_cola()
+        print()
+        for carril, cantidad in estadisticas["profundidad"].items():
+            print(f"  En cola ({carril:<8}) : {cantidad}")
+        for cod, cantidad in sorted(estadisticas["en_cola_por_tarea"].items()):
+            print(f"    {cod:<20} {cantidad:>6} en cola, "
+                  f"{estadisticas['ejecutando_por_tarea'].get(cod, 0)} ejecutando")
+        print(f"  Espera mas antigua   : {estadisticas['espera_mas_antigua']:.1f} s")
+        if estadisticas["espera_promedio"] is not None:
+            print(f"  Espera promedio      : {estadisticas['espera_promedio']:.1f} s "
+                  f"(maxima {estadisticas['espera_maxima']:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
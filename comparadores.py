@@ -0,0 +1,499 @@
+# =============================================================
+# comparadores.py
+# Módulo — Comparación de la salida por bloques
+# =============================================================
+# Responsabilidad: decidir si lo que imprimió el programa es lo
+# esperado SIN tener las dos salidas completas en memoria.
+#
+# El comparador se alimenta con cada bloque de stdout apenas
+# llega (lo hace captura_limitada) y va leyendo la salida
+# esperada al mismo ritmo (del JSON o del almacén de blobs).
+# Memoria usada: un bloque de cada lado (o una palabra/línea),
+# sin importar el tamaño de la salida.
+#
+# La forma de comparar se elige en el JSON de la tarea, para
+# todos los casos o para uno solo (el del caso manda):
+#
+#     "comparador": "tokens"
+#     "comparador": {"tipo": "numerico", "eps_abs": 0.001}
+#
+#   normalizado       → (por defecto) sin distinguir mayúsculas y
+#                       sin contar los espacios/saltos de línea del
+#                       inicio y del final
+#   exacto            → igual, pero distinguiendo mayúsculas
+#   tokens            → las mismas palabras en el mismo orden, con
+#                       cualquier cantidad de espacios/saltos entre
+#                       ellas. Opción: "ignorar_mayusculas" (false)
+#   numerico          → como tokens, pero los números se comparan con
+#                       tolerancia: "eps_abs" (1e-6) y "eps_rel" (1e-9)
+#   regex             → cada línea esperada es una expresión regular
+#                       que debe calzar con la línea obtenida completa
+#   lineas_sin_orden  → las mismas líneas, en cualquier orden (se
+#                       compara una suma de hashes: memoria constante)
+#
+# Las reglas se preparan UNA vez por tarea (preparar_tarea): el
+# esperado de cada caso queda ya normalizado, partido en palabras,
+# con sus números convertidos o sus expresiones compiladas. Cada
+# ejecución solo crea un comparador barato a partir de la regla.
+#
+# Uso (lo hace grader.calificar):
+#     reglas = comparadores.preparar_tarea(config)   # una vez
+#     comparador = reglas[caso["id"]].nuevo()        # por ejecución
+#     ejecutor(ruta, entrada, comparador=comparador)
+#     comparador.terminar()                          # True si coincide
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - codecs  → decodificar UTF-8 por bloques (un carácter puede
+#               quedar partido entre dos bloques)
+#   - hashlib → hash de cada línea en lineas_sin_orden
+#   - math    → isclose para la tolerancia numérica
+#   - re      → comparador regex
+# =============================================================
+
+import codecs
+import hashlib
+import json
+import math
+import re
+
+import almacen_blobs
+import cache_resultados
+
+
+COMPARADOR_POR_DEFECTO = "normalizado"
+
+TIPOS = ("normalizado", "exacto", "tokens", "numerico", "regex", "lineas_sin_orden")
+
+# Tareas con las reglas ya preparadas que se guardan en memoria
+MAX_TAREAS_PREPARADAS = 64
+
+_TAMANO_BLOQUE = 65536
+_MODULO_HASH   = 1 << 64
+
+_tareas_preparadas = {}
+
+
+# ── Texto por bloques ─────────────────────────────────────────
+
+class _Decodificador:
+    """Bytes → texto, de a bloques: UTF-8 incremental y \\r\\n → \\n."""
+
+    def __init__(self):
+        self._decodificador = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._cr = False   # el bloque anterior terminó en \r
+
+    def alimentar(self, bloque: bytes, final: bool = False) -> str:
+        texto = self._decodificador.decode(bloque, final)
+        if self._cr:
+            texto = "\r" + texto
+            self._cr = False
+        if texto.endswith("\r") and not final:
+            texto, self._cr = texto[:-1], True
+        return texto.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class _Normalizador:
+    """
+    Convierte bloques de bytes en texto normalizado, de a pedazos:
+    \\r\\n → \\n, sin espacios al inicio ni al final (y en minúsculas
+    si se pide). Los espacios del medio se retienen hasta saber si
+    son del final.
+    """
+
+    def __init__(self, minusculas: bool = True):
+        self._decodificador = _Decodificador()
+        self._minusculas = minusculas
+        self._al_inicio  = True
+        self._retenido   = ""      # espacios que todavía podrían ser del final
+
+    def alimentar(self, bloque: bytes, final: bool = False) -> str:
+        texto = self._decodificador.alimentar(bloque, final)
+        if self._minusculas:
+            texto = texto.lower()
+
+        if self._al_inicio:
+            texto = texto.lstrip()
+            if not texto:
+                return ""
+            self._al_inicio = False
+
+        contenido = texto.rstrip()
+        if not contenido:
+            self._retenido += texto
+            return ""
+        salida = self._retenido + contenido
+        self._retenido = texto[len(contenido):]
+        return salida
+
+    def terminar(self) -> str:
+        # Lo que queda retenido son espacios del final: se descartan
+        return self.alimentar(b"", final=True)
+
+
+class _Partidor:
+    """
+    Bloques de bytes → unidades completas: palabras, o líneas (sin
+    espacios al final de cada una y sin líneas en blanco al inicio
+    ni al final). Lo que quedó a medias espera al bloque siguiente.
+    """
+
+    def __init__(self, por_lineas: bool):
+        self._decodificador = _Decodificador()
+        self._por_lineas = por_lineas
+        self._resto   = ""
+        self._blancas = 0      # líneas vacías que todavía podrían ser del final
+        self._vacio   = True   # aún no salió ninguna línea con contenido
+
+    def alimentar(self, bloque: bytes, final: bool = False) -> list:
+        texto = self._resto + self._decodificador.alimentar(bloque, final)
+        if not self._por_lineas:
+            partes = texto.split()
+            incompleta = partes and not final and not texto[-1].isspace()
+            self._resto = partes.pop() if incompleta else ""
+            return partes
+
+        partes = texto.split("\n")
+        self._resto = "" if final else partes.pop()
+        lineas = []
+        for linea in partes:
+            linea = linea.rstrip()
+            if not linea:
+                self._blancas += 0 if self._vacio else 1
+                continue
+            lineas.extend([""] * self._blancas)
+            lineas.append(linea)
+            self._blancas = 0
+            self._vacio   = False
+        return lineas
+
+    def terminar(self) -> list:
+        return self.alimentar(b"", final=True)
+
+
+def _unidades_de_archivo(archivo, por_lineas: bool, preparar):
+    """Generador: las unidades (ya preparadas) de un blob, leído por bloques."""
+    partidor = _Partidor(por_lineas)
+    while True:
+        bloque = archivo.read(_TAMANO_BLOQUE)
+        unidades = partidor.alimentar(bloque) if bloque else partidor.terminar()
+        for unidad in unidades:
+            yield preparar(unidad)
+        if not bloque:
+            return
+
+
+def _unidades_de_texto(texto: str, por_lineas: bool) -> list:
+    partidor = _Partidor(por_lineas)
+    return partidor.alimentar(texto.encode("utf-8"), final=True)
+
+
+# ── Comparadores (uno por ejecución) ──────────────────────────
+
+class ComparadorNormalizado:
+    """
+    Compara la salida (que llega por bloques) con la esperada
+    (un texto o un archivo binario abierto), carácter a carácter
+    después de normalizar ambas. Sirve para "normalizado" y "exacto".
+    """
+
+    def __init__(self, esperado, bytes_esperados: int = 0, minusculas: bool = True,
+                 ya_normalizado: bool = False):
+        self.bytes_esperados = bytes_esperados
+        self._fuente    = esperado if hasattr(esperado, "read") else None
+        self._real      = _Normalizador(minusculas)
+        self._esperado  = _Normalizador(minusculas)
+        if self._fuente is not None:
+            self._pendiente = ""
+        elif ya_normalizado:
+            self._pendiente = esperado
+        else:
+            self._pendiente = self._esperado.alimentar(esperado.encode("utf-8"), final=True)
+        self._agotado   = self._fuente is None
+        self._distinto  = False
+
+    def _rellenar(self) -> bool:
+        """Lee más de la salida esperada. False si ya no queda nada."""
+        while not self._pendiente and not self._agotado:
+            bloque = self._fuente.read(_TAMANO_BLOQUE)
+            if bloque:
+                self._pendiente = self._esperado.alimentar(bloque)
+            else:
+                self._pendiente = self._esperado.terminar()
+                self._agotado   = True
+        return bool(self._pendiente)
+
+    def _consumir(self, texto: str):
+        while texto and not self._distinto:
+            if not self._rellenar():
+                self._distinto = True   # el programa imprimió de más
+                return
+            n = min(len(texto), len(self._pendiente))
+            if texto[:n] != self._pendiente[:n]:
+                self._distinto = True
+                return
+            texto, self._pendiente = texto[n:], self._pendiente[n:]
+
+    def alimentar(self, bloque: bytes):
+        if not self._distinto:
+            self._consumir(self._real.alimentar(bloque))
+
+    def terminar(self) -> bool:
+        """True si la salida completa coincidió con la esperada."""
+        self._consumir(self._real.terminar())
+        if not self._distinto and self._rellenar():
+            self._distinto = True       # al programa le faltó imprimir
+        self.cerrar()
+        return not self._distinto
+
+    def cerrar(self):
+        if self._fuente is not None:
+            self._fuente.close()
+
+
+class _ComparadorUnidades:
+    """
+    Compara unidad por unidad (palabras o líneas) con 'iguales(real, esperada)'.
+    'esperadas' es un iterador de unidades ya preparadas.
+    """
+
+    def __init__(self, esperadas, bytes_esperados: int, por_lineas: bool, iguales,
+                 archivo=None):
+        self.bytes_esperados = bytes_esperados
+        self._esperadas = esperadas
+        self._archivo   = archivo
+        self._real      = _Partidor(por_lineas)
+        self._iguales   = iguales
+        self._distinto  = False
+
+    def _consumir(self, unidades: list):
+        for unidad in unidades:
+            esperada = next(self._esperadas, None)
+            if esperada is None or not self._iguales(unidad, esperada):
+                self._distinto = True
+                return
+
+    def alimentar(self, bloque: bytes):
+        if not self._distinto:
+            self._consumir(self._real.alimentar(bloque))
+
+    def terminar(self) -> bool:
+        if not self._distinto:
+            self._consumir(self._real.terminar())
+        if not self._distinto and next(self._esperadas, None) is not None:
+            self._distinto = True
+        self.cerrar()
+        return not self._distinto
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+def _hash_linea(linea: str) -> int:
+    return int.from_bytes(hashlib.blake2b(linea.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _huella_lineas(lineas) -> tuple:
+    """(cantidad, suma de hashes): no depende del orden de las líneas."""
+    cantidad, suma = 0, 0
+    for linea in lineas:
+        cantidad += 1
+        suma = (suma + _hash_linea(linea)) % _MODULO_HASH
+    return cantidad, suma
+
+
+class _ComparadorSinOrden:
+    """Mismas líneas en cualquier orden: compara (cantidad, suma de hashes)."""
+
+    def __init__(self, huella_esperada, bytes_esperados: int, archivo=None):
+        self.bytes_esperados = bytes_esperados
+        self._huella   = huella_esperada
+        self._archivo  = archivo
+        self._real     = _Partidor(por_lineas=True)
+        self._cantidad = 0
+        self._suma     = 0
+
+    def _sumar(self, lineas: list):
+        cantidad, suma = _huella_lineas(lineas)
+        self._cantidad += cantidad
+        self._suma = (self._suma + suma) % _MODULO_HASH
+
+    def alimentar(self, bloque: bytes):
+        self._sumar(self._real.alimentar(bloque))
+
+    def terminar(self) -> bool:
+        self._sumar(self._real.terminar())
+        if self._huella is None:
+            self._huella = _huella_lineas(
+                _unidades_de_archivo(self._archivo, True, lambda linea: linea))
+        self.cerrar()
+        return (self._cantidad, self._suma) == self._huella
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+# ── Reglas (una por caso, preparadas una vez por tarea) ───────
+
+def _compilar_patron(linea: str):
+    """La línea esperada como expresión regular; None si no es válida."""
+    try:
+        return re.compile(linea)
+    except re.error:
+        return None
+
+
+def _numero(token: str):
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+class _Regla:
+    """
+    Cómo comparar UN caso, con su esperado ya preparado.
+    nuevo() crea el comparador de una ejecución.
+    """
+
+    def __init__(self, opciones: dict, caso: dict):
+        self.tipo  = opciones["tipo"]
+        if self.tipo not in TIPOS:
+            raise ValueError(f"Comparador desconocido: '{self.tipo}'")
+        self._blob = caso.get("esperado_blob")
+        self.bytes_esperados = (self._blob["bytes"] if self._blob
+                                else len(caso["esperado"].encode("utf-8")))
+
+        if self.tipo in ("normalizado", "exacto"):
+            self._minusculas = self.tipo == "normalizado"
+        elif self.tipo != "lineas_sin_orden":
+            self._por_lineas = self.tipo == "regex"
+            self._preparar, self._iguales = self._funciones(opciones)
+
+        self._preparado = None if self._blob else self._preparar_esperado(caso["esperado"])
+
+    def _funciones(self, opciones: dict) -> tuple:
+        """(preparar una unidad esperada, comparar real con esperada)."""
+        if self.tipo == "regex":
+            return _compilar_patron, lambda linea, patron: (patron is not None
+                                                            and patron.fullmatch(linea) is not None)
+
+        if self.tipo == "tokens":
+            if opciones.get("ignorar_mayusculas", False):
+                return str.lower, lambda real, esperado: real.lower() == esperado
+            return (lambda token: token), lambda real, esperado: real == esperado
+
+        eps_abs = float(opciones.get("eps_abs", 1e-6))
+        eps_rel = float(opciones.get("eps_rel", 1e-9))
+
+        def iguales(real: str, esperado: tuple) -> bool:
+            texto, numero = esperado
+            if numero is None:
+                return real == texto
+            valor = _numero(real)
+            return valor is not None and math.isclose(valor, numero, rel_tol=eps_rel,
+                                                      abs_tol=eps_abs)
+        return (lambda token: (token, _numero(token))), iguales
+
+    def _preparar_esperado(self, esperado: str):
+        if self.tipo in ("normalizado", "exacto"):
+            return _Normalizador(self._minusculas).alimentar(esperado.encode("utf-8"), final=True)
+        if self.tipo == "lineas_sin_orden":
+            return _huella_lineas(_unidades_de_texto(esperado, True))
+        unidades = [self._preparar(u) for u in _unidades_de_texto(esperado, self._por_lineas)]
+        if self.tipo == "regex" and None in unidades:
+            raise ValueError("El esperado tiene una expresion regular invalida")
+        return unidades
+
+    def iguales_por_linea(self):
+        """
+        Función (línea esperada, línea obtenida) → bool que compara UNA
+        línea con esta regla (la usa diferencias.py), o None si la regla
+        no compara línea por línea (lineas_sin_orden).
+        """
+        if self.tipo == "lineas_sin_orden":
+            return None
+        if self.tipo in ("normalizado", "exacto"):
+            if self._minusculas:
+                return lambda esperada, real: esperada.rstrip().lower() == real.rstrip().lower()
+            return lambda esperada, real: esperada.rstrip() == real.rstrip()
+        if self.tipo == "regex":
+            return lambda esperada, real: self._iguales(real.rstrip(),
+                                                        self._preparar(esperada.rstrip()))
+
+        # tokens y numerico: las palabras de la línea, una a una
+        def iguales(esperada: str, real: str) -> bool:
+            esperados, reales = esperada.split(), real.split()
+            return len(esperados) == len(reales) and all(
+                self._iguales(r, self._preparar(e)) for e, r in zip(esperados, reales))
+        return iguales
+
+    def nuevo(self):
+        """Comparador para una ejecución (abre el blob esperado si hay)."""
+        archivo = almacen_blobs.abrir(self._blob) if self._blob else None
+        if self.tipo in ("normalizado", "exacto"):
+            return ComparadorNormalizado(archivo or self._preparado, self.bytes_esperados,
+                                         self._minusculas, ya_normalizado=archivo is None)
+        if self.tipo == "lineas_sin_orden":
+            return _ComparadorSinOrden(self._preparado, self.bytes_esperados, archivo)
+        esperadas = (_unidades_de_archivo(archivo, self._por_lineas, self._preparar)
+                     if archivo else iter(self._preparado))
+        return _ComparadorUnidades(esperadas, self.bytes_esperados, self._por_lineas,
+                                   self._iguales, archivo)
+
+
+def _opciones(especificacion) -> dict:
+    if especificacion is None:
+        return {"tipo": COMPARADOR_POR_DEFECTO}
+    if isinstance(especificacion, str):
+        return {"tipo": especificacion}
+    return dict(especificacion, tipo=especificacion.get("tipo", COMPARADOR_POR_DEFECTO))
+
+
+def especificacion_de(caso: dict, especificacion_tarea=None):
+    """La forma de comparar que corresponde al caso (la suya o la de la tarea)."""
+    return caso.get("comparador", especificacion_tarea)
+
+
+def compilar(caso: dict, especificacion_tarea=None) -> _Regla:
+    """
+    Prepara la regla de UN caso.
+    Lanza ValueError si el comparador no existe o sus opciones no sirven.
+    """
+    return _Regla(_opciones(especificacion_de(caso, especificacion_tarea)), caso)
+
+
+def _huella_caso(caso: dict) -> tuple:
+    """Lo que identifica la regla de un caso; sin "hash", su contenido."""
+    blob = caso.get("esperado_blob") or {}
+    huella = caso.get("hash") or cache_resultados.hash_datos(
+        [caso["esperado"], blob, caso.get("comparador")])
+    return huella, bool(blob.get("comprimido"))
+
+
+def preparar_tarea(config: dict) -> dict:
+    """
+    Reglas de todos los casos de la tarea: caso_id → regla.
+    Se preparan una vez y se reutilizan mientras los casos no cambien.
+
+    La clave usa el "hash" de cada caso (el de cargar_casos, que ya
+    cubre el esperado y la forma de comparar), así no se vuelve a
+    recorrer el esperado completo en cada calificación.
+    """
+    especificacion = config.get("comparador")
+    clave = (config.get("cod_tarea"),
+             json.dumps(especificacion, sort_keys=True),
+             tuple((c["id"], _huella_caso(c)) for c in config["casos"]))
+    reglas = _tareas_preparadas.get(clave)
+    if reglas is None:
+        reglas = {caso["id"]: compilar(caso, especificacion) for caso in config["casos"]}
+        if len(_tareas_preparadas) >= MAX_TAREAS_PREPARADAS:
+            _tareas_preparadas.pop(next(iter(_tareas_preparadas)))   # la más antigua
+        _tareas_preparadas[clave] = reglas
+    return reglas
+
+
+def para_caso(caso: dict, especificacion_tarea=None):
+    """Comparador para una ejecución del caso, sin reglas preparadas."""
+    return compilar(caso, especificacion_tarea).nuevo()
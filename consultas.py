@@ -0,0 +1,178 @@
+# =============================================================
+# consultas.py
+# Módulo — Consultas sobre las entregas y calificaciones
+# =============================================================
+# Responsabilidad: responder preguntas sobre las entregas usando
+# los índices de la base de registro_sqlite.py, sin abrir cada
+# registro:
+#
+#   entregas_de_estudiante("STU-01")      → todas sus entregas
+#   ultimas_por_estudiante("TAREA-01")    → la última entrega
+#                                           calificada de cada estudiante
+#   entregas_recientes(minutos=60)        → lo entregado en la última hora
+#
+# Todas son paginadas y retornan:
+#     {"registros": [...], "siguiente": "..." o None}
+# Para la página siguiente se pasa "siguiente" como 'despues'.
+# La página se busca desde donde quedó la anterior (no con
+# OFFSET, que recorre todas las filas saltadas), así la página
+# 1000 cuesta lo mismo que la primera.
+#
+# Los datos existen solo si se usa ALMACEN_REGISTROS = "sqlite"
+# en transaction_service (o tras python registro_sqlite.py --importar).
+#
+# Como ejecutarlo:
+#   python consultas.py estudiante STU-01
+#   python consultas.py ultimas TAREA-01 --limite 20
+#   python consultas.py recientes --minutos 60
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - datetime → desde cuándo cuentan las entregas recientes
+#   - argparse → opciones de línea de comandos
+# =============================================================
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import registro_sqlite
+import transaction_service
+
+
+LIMITE_POR_DEFECTO = 50
+
+_SEPARADOR_CURSOR = "|"
+
+_COLUMNAS_ENTREGA = "id_transaccion, id_estudiante, nombre_archivo, tamano_bytes, fecha_hora, estado"
+
+
+def _carpeta(carpeta: str) -> str:
+    return carpeta or transaction_service.CARPETA_REGISTROS
+
+
+def _cursor_fecha(fila) -> str:
+    return f"{fila['fecha_hora']}{_SEPARADOR_CURSOR}{fila['id_transaccion']}"
+
+
+def _pagina(filas: list, limite: int, cursor) -> dict:
+    """Se pide una fila de más: si llegó, hay página siguiente."""
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    return {
+        "registros": [dict(fila) for fila in filas],
+        "siguiente": cursor(filas[-1]) if hay_mas else None,
+    }
+
+
+def _consultar(carpeta: str, sql: str, parametros: tuple) -> list:
+    # La conexión del hilo se reutiliza entre consultas (ver registro_sqlite)
+    return registro_sqlite.conectar(_carpeta(carpeta)).execute(sql, parametros).fetchall()
+
+
+def entregas_de_estudiante(id_estudiante: str, limite: int = LIMITE_POR_DEFECTO,
+                           despues: str = None, carpeta: str = None) -> dict:
+    """
+    Entregas de un estudiante, de la más nueva a la más antigua.
+    Usa el índice (id_estudiante, fecha_hora, id_transaccion).
+    """
+    sql = f"SELECT {_COLUMNAS_ENTREGA} FROM entregas WHERE id_estudiante = ?"
+    parametros = [id_estudiante]
+    if despues:
+        fecha, _, id_t = despues.partition(_SEPARADOR_CURSOR)
+        sql += " AND (fecha_hora, id_transaccion) < (?, ?)"
+        parametros += [fecha, id_t]
+    sql += " ORDER BY fecha_hora DESC, id_transaccion DESC LIMIT ?"
+    filas = _consultar(carpeta, sql, (*parametros, limite + 1))
+    return _pagina(filas, limite, _cursor_fecha)
+
+
+def entregas_recientes(minutos: float = 60, desde: str = None,
+                       limite: int = LIMITE_POR_DEFECTO, despues: str = None,
+                       carpeta: str = None) -> dict:
+    """
+    Entregas desde hace 'minutos' (o desde la fecha ISO 'desde'),
+    de la más nueva a la más antigua. Usa el índice (fecha_hora, id_transaccion).
+    """
+    if desde is None:
+        desde = (datetime.now() - timedelta(minutes=minutos)).isoformat()
+    sql = f"SELECT {_COLUMNAS_ENTREGA} FROM entregas WHERE fecha_hora >= ?"
+    parametros = [desde]
+    if despues:
+        fecha, _, id_t = despues.partition(_SEPARADOR_CURSOR)
+        sql += " AND (fecha_hora, id_transaccion) < (?, ?)"
+        parametros += [fecha, id_t]
+    sql += " ORDER BY fecha_hora DESC, id_transaccion DESC LIMIT ?"
+    filas = _consultar(carpeta, sql, (*parametros, limite + 1))
+    return _pagina(filas, limite, _cursor_fecha)
+
+
+def ultimas_por_estudiante(cod_tarea: str, limite: int = LIMITE_POR_DEFECTO,
+                           despues: str = None, carpeta: str = None) -> dict:
+    """
+    La última entrega calificada de cada estudiante en la tarea, con
+    su nota, ordenadas por id_estudiante. Usa el índice
+    (cod_tarea, id_estudiante, fecha_entrega): SQLite toma las demás
+    columnas de la fila con MAX(fecha_entrega) de cada grupo.
+    """
+    sql = ("SELECT id_estudiante, id_transaccion, MAX(fecha_entrega) AS fecha_entrega, "
+           "nota_obtenida, nota_maxima, porcentaje "
+           "FROM calificaciones WHERE cod_tarea = ? AND id_estudiante IS NOT NULL")
+    parametros = [cod_tarea]
+    if despues:
+        sql += " AND id_estudiante > ?"
+        parametros.append(despues)
+    sql += " GROUP BY id_estudiante ORDER BY id_estudiante LIMIT ?"
+    filas = _consultar(carpeta, sql, (*parametros, limite + 1))
+    return _pagina(filas, limite, lambda fila: fila["id_estudiante"])
+
+
+def calificacion_de(id_transaccion: str, cod_tarea: str, carpeta: str = None) -> dict:
+    """La calificación completa (lo que retornó calificar()), o None."""
+    filas = _consultar(carpeta, "SELECT calificacion FROM calificaciones "
+                                "WHERE id_transaccion = ? AND cod_tarea = ?",
+                       (id_transaccion, cod_tarea))
+    return json.loads(filas[0]["calificacion"]) if filas else None
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Consultas sobre las entregas y calificaciones (base SQLite).")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_estudiante = comandos.add_parser("estudiante", help="entregas de un estudiante")
+    p_estudiante.add_argument("id_estudiante")
+    p_ultimas = comandos.add_parser("ultimas", help="ultima entrega de cada estudiante en una tarea")
+    p_ultimas.add_argument("cod_tarea")
+    p_recientes = comandos.add_parser("recientes", help="entregas de los ultimos minutos")
+    p_recientes.add_argument("--minutos", type=float, default=60,
+                             help="por defecto: 60")
+    for sub in (p_estudiante, p_ultimas, p_recientes):
+        sub.add_argument("--limite", type=int, default=LIMITE_POR_DEFECTO,
+                         help=f"filas por pagina (por defecto: {LIMITE_POR_DEFECTO})")
+        sub.add_argument("--despues", help="valor 'siguiente' de la pagina anterior")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "estudiante":
+        pagina = entregas_de_estudiante(args.id_estudiante, args.limite, args.despues)
+        for r in pagina["registros"]:
+            print(f"  {r['fecha_hora']}  {r['id_transaccion']}  {r['nombre_archivo']}")
+    elif args.comando == "ultimas":
+        cod_tarea = args.cod_tarea.strip().upper().replace(" ", "-")
+        pagina = ultimas_por_estudiante(cod_tarea, args.limite, args.despues)
+        for r in pagina["registros"]:
+            print(f"  {r['id_estudiante']:<16} {r['fecha_entrega']}  "
+                  f"{r['id_transaccion']}  {r['porcentaje']}%")
+    else:
+        pagina = entregas_recientes(args.minutos, limite=args.limite, despues=args.despues)
+        for r in pagina["registros"]:
+            print(f"  {r['fecha_hora']}  {r['id_estudiante']:<16} {r['id_transaccion']}")
+
+    print(f"  ({len(pagina['registros'])} fila(s))")
+    if pagina["siguiente"]:
+        print(f"  Siguiente pagina: --despues \"{pagina['siguiente']}\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# =============================================================
+# diferencias.py
+# Módulo — Dónde se separó la salida de lo esperado
+# =============================================================
+# Responsabilidad: cuando un caso falla, decirle al estudiante
+# EN QUÉ LÍNEA su salida dejó de coincidir, sin mostrarle
+# megabytes de texto.
+#
+# Se recorren las dos salidas línea por línea UNA sola vez
+# (tiempo lineal, a diferencia de difflib que es cuadrático) y
+# se guardan solo las últimas CONTEXTO_LINEAS líneas iguales. Al
+# encontrar la primera línea distinta se toman unas pocas líneas
+# más de cada lado y se termina. Lo que queda en el resultado es
+# esta "ventana":
+#
+#     "diferencia": {
+#         "linea":    12,                ← primera línea distinta (desde 1)
+#         "desde":    10,                ← número de la primera línea de la ventana
+#         "comunes":  ["abc", "def"],    ← líneas 10 y 11, iguales en ambas
+#         "esperado": ["ghi", "jkl"],    ← desde la línea 12
+#         "obtenido": ["gxi"]            ← desde la línea 12 (aquí terminó)
+#     }
+#
+# Además, "esperado" y "obtenido" del resultado se recortan a
+# MAX_CARACTERES_GUARDADOS: la ventana es la que sirve para ver
+# el error, y así la caché y las métricas no guardan salidas
+# enormes.
+#
+# Cada línea se compara con la regla del comparador de la tarea
+# (comparadores._Regla.iguales_por_linea):
+#   normalizado / exacto → la línea sin espacios al final (sin
+#                          mayúsculas con normalizado)
+#   tokens / numerico    → las palabras de la línea, una a una (con
+#                          la tolerancia de numerico)
+#   regex                → la línea esperada como patrón
+# Así la ventana no señala una línea que la tarea da por buena.
+# Con "lineas_sin_orden" no hay una "primera línea distinta": no
+# se calcula ventana (el resultado trae "diferencia": None).
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - collections → deque con las últimas líneas iguales
+#   - itertools   → devolver líneas ya leídas al iterador
+#   - io          → leer el esperado del almacén de blobs línea por línea
+# =============================================================
+
+import collections
+import io
+import itertools
+
+import almacen_blobs
+import comparadores
+
+
+CONTEXTO_LINEAS = 2
+
+# Una línea más larga que esto se muestra cortada
+MAX_ANCHO_LINEA = 200
+
+MAX_CARACTERES_GUARDADOS = 2000
+
+def recortar(texto: str, maximo: int = MAX_CARACTERES_GUARDADOS) -> str:
+    """El texto tal cual, o sus primeros 'maximo' caracteres con una marca."""
+    if len(texto) <= maximo:
+        return texto
+    return texto[:maximo] + f"... ({len(texto) - maximo} caracteres mas)"
+
+
+def _lineas(texto: str):
+    """Generador: las líneas de un texto, sin copiarlo entero (como split("\\n"))."""
+    if not texto:
+        return
+    inicio = 0
+    while True:
+        fin = texto.find("\n", inicio)
+        if fin < 0:
+            yield texto[inicio:]
+            return
+        yield texto[inicio:fin]
+        inicio = fin + 1
+
+
+def _lineas_de_blob(referencia: dict):
+    with almacen_blobs.abrir(referencia) as archivo:
+        texto = io.TextIOWrapper(archivo, encoding="utf-8", errors="replace")
+        primera = True
+        for linea in texto:
+            linea = linea.rstrip("\r\n")
+            # Igual que .strip() del esperado en el JSON: sin líneas vacías al inicio
+            if primera and not linea.strip():
+                continue
+            primera = False
+            yield linea
+
+
+def _visible(linea: str) -> str:
+    return recortar(linea.rstrip(), MAX_ANCHO_LINEA)
+
+
+def primera_diferencia(esperado, obtenido, ignorar_mayusculas: bool = True,
+                       contexto: int = CONTEXTO_LINEAS, iguales=None) -> dict:
+    """
+    Busca la primera línea distinta entre dos iterables de líneas.
+    'iguales(esperada, obtenida)' decide si dos líneas coinciden; sin
+    ella se comparan sin espacios al final (y sin mayúsculas si se pide).
+
+    Retorna la ventana descrita arriba, o None si todas las líneas
+    coinciden (el caso falló por otra cosa: espacios, tiempo...).
+    """
+    if iguales is None:
+        def iguales(linea_esperada: str, linea_obtenida: str) -> bool:
+            if ignorar_mayusculas:
+                return linea_esperada.rstrip().lower() == linea_obtenida.rstrip().lower()
+            return linea_esperada.rstrip() == linea_obtenida.rstrip()
+
+    esperado = iter(esperado)
+    obtenido = iter(obtenido)
+    comunes  = collections.deque(maxlen=contexto)
+    numero   = 0
+    while True:
+        numero += 1
+        linea_esperada = next(esperado, None)
+        linea_obtenida = next(obtenido, None)
+        if linea_esperada is None and linea_obtenida is None:
+            return None
+        if linea_esperada is None or linea_obtenida is None:
+            # Un lado terminó: si al otro solo le quedan líneas en blanco, no es diferencia
+            linea, resto = ((linea_obtenida, obtenido) if linea_esperada is None
+                            else (linea_esperada, esperado))
+            leidas = [linea]
+            while not leidas[-1].strip():
+                siguiente = next(resto, None)
+                if siguiente is None:
+                    return None
+                leidas.append(siguiente)
+            resto = itertools.chain(leidas[1:], resto)
+            if linea_esperada is None:
+                obtenido = resto
+            else:
+                esperado = resto
+        if (linea_esperada is not None and linea_obtenida is not None
+                and iguales(linea_esperada, linea_obtenida)):
+            comunes.append(_visible(linea_obtenida))
+            continue
+
+        ventana_esperado = [] if linea_esperada is None else [_visible(linea_esperada)]
+        ventana_obtenido = [] if linea_obtenida is None else [_visible(linea_obtenida)]
+        for ventana, resto in ((ventana_esperado, esperado), (ventana_obtenido, obtenido)):
+            if ventana:
+                ventana.extend(_visible(linea) for _, linea in zip(range(contexto), resto))
+        return {
+            "linea":    numero,
+            "desde":    numero - len(comunes),
+            "comunes":  list(comunes),
+            "esperado": ventana_esperado,
+            "obtenido": ventana_obtenido,
+        }
+
+
+def para_caso(caso: dict, obtenido: str, regla=None) -> dict:
+    """
+    Ventana de la primera diferencia entre la salida de un caso y su
+    esperado (del JSON o del almacén de blobs). None si no aplica.
+
+    'regla' es la de comparadores.preparar_tarea para el caso, o la
+    especificación de un comparador ("tokens", {"tipo": "numerico", ...});
+    None → la del propio caso. Las líneas se comparan con esa regla.
+    """
+    if regla is None or isinstance(regla, (str, dict)):
+        regla = comparadores.compilar(caso, regla)
+    iguales = regla.iguales_por_linea()
+    if iguales is None:
+        return None   # el comparador no va línea por línea
+    if caso.get("esperado_blob"):
+        esperado = _lineas_de_blob(caso["esperado_blob"])
+    else:
+        esperado = _lineas(caso["esperado"].strip())
+    try:
+        return primera_diferencia(esperado, _lineas(obtenido), iguales=iguales)
+    finally:
+        if hasattr(esperado, "close"):
+            esperado.close()
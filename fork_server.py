@@ -0,0 +1,387 @@
+# =============================================================
+# fork_server.py
+# Módulo — Ejecutor "fork-server" para el motor de calificación
+# =============================================================
+# Responsabilidad: ejecutar el .py del estudiante SIN pagar el
+# arranque completo de Python en cada caso de prueba.
+#
+# Cómo funciona:
+#   1. Se lanza UNA vez un proceso servidor que ya tiene Python
+#      cargado y los módulos más comunes importados ("caliente").
+#   2. Por cada caso, el grader le manda al servidor la ruta del
+#      archivo y tres tuberías (stdin, stdout, stderr).
+#   3. El servidor hace fork(): el hijo es una copia instantánea
+#      del servidor, conecta las tuberías y ejecuta el archivo.
+#   4. Cuando el hijo termina, el servidor avisa su returncode.
+#
+# El resultado tiene exactamente el mismo formato que
+# grader.ejecutar_programa, así que se puede usar como ejecutor:
+#
+#     with ServidorFork() as servidor:
+#         calificar(ruta, "TAREA-01", ejecutor=servidor.ejecutar_programa)
+#
+# Solo funciona en sistemas con fork() (Linux, macOS).
+# En Windows FORK_DISPONIBLE es False y hay que usar el ejecutor normal.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - socket    → canal con el servidor; permite enviar descriptores
+#   - os        → fork, pipes y señales
+#   - select    → el servidor espera pedidos y avisos de hijos a la vez
+#   - captura_limitada → el cliente lee stdout/stderr con tope de bytes
+# =============================================================
+
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import grader
+import limites_recursos
+import precompilador
+from captura_limitada import CapturaLimitada
+
+
+FORK_DISPONIBLE = hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+# Módulos que el servidor importa antes de empezar a hacer fork().
+# Los hijos los heredan ya cargados y no pagan su import.
+MODULOS_PRECARGADOS = [
+    "math", "random", "re", "string", "collections", "itertools",
+    "functools", "datetime", "json", "statistics", "decimal",
+    "fractions", "heapq", "bisect", "traceback", "types", "io",
+]
+
+_TAMANO_MENSAJE = 4096
+
+
+# ── Lado servidor (corre en su propio proceso) ────────────────
+
+def _ejecutar_hijo(ruta_py: str, fd_entrada: int, fd_salida: int, fd_error: int,
+                   limites: dict = None):
+    """
+    Código que corre el proceso hijo después del fork().
+    Imita a "python ruta_py": mismo __main__, mismo sys.argv,
+    mismo formato de traceback y mismo código de salida.
+    Nunca retorna: termina con os._exit().
+    """
+    import builtins
+    import io
+    import traceback
+    import types
+
+    os.dup2(fd_entrada, 0)
+    os.dup2(fd_salida, 1)
+    os.dup2(fd_error, 2)
+    for fd in (fd_entrada, fd_salida, fd_error):
+        os.close(fd)
+
+    sys.stdin  = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8")
+    sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8")
+    sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8",
+                                  line_buffering=True)
+
+    # Lo mismo que el envoltorio de limites_recursos.comando en grader
+    limites_recursos.aplicar(limites)
+
+    codigo_salida = 0
+    try:
+        if ruta_py.endswith(".pyc"):
+            # Bytecode de precompilador.py: lleva la ruta del .py original
+            codigo  = precompilador.cargar_pyc(ruta_py)
+            ruta_py = codigo.co_filename
+        else:
+            with open(ruta_py, "rb") as f:
+                codigo = compile(f.read(), ruta_py, "exec")
+
+        sys.argv    = [ruta_py]
+        sys.path[0] = os.path.dirname(os.path.abspath(ruta_py))
+
+        modulo = types.ModuleType("__main__")
+        modulo.__file__     = os.path.abspath(ruta_py)
+        modulo.__builtins__ = builtins
+        sys.modules["__main__"] = modulo
+        exec(codigo, modulo.__dict__)
+    except SystemExit as e:
+        # Igual que el intérprete: None → 0, int → ese código, otro → se imprime
+        if e.code is None:
+            codigo_salida = 0
+        elif isinstance(e.code, int):
+            codigo_salida = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            codigo_salida = 1
+    except BaseException as e:
+        # Saltamos nuestro propio frame para que el traceback
+        # empiece en el archivo del estudiante
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        traceback.print_exception(type(e), e, tb)
+        codigo_salida = 1
+
+    for flujo in (sys.stdout, sys.stderr):
+        try:
+            flujo.flush()
+        except Exception:
+            pass
+    os._exit(codigo_salida & 0xFF)
+
+
+def _servir(fd_control: int):
+    """
+    Bucle principal del servidor.
+    Recibe pedidos por el canal de control y avisa cuando cada hijo termina.
+    Se detiene cuando el cliente cierra el canal.
+    """
+    for nombre in MODULOS_PRECARGADOS:
+        __import__(nombre)
+
+    canal = socket.socket(fileno=fd_control)
+
+    # SIGCHLD despierta al select() a través de esta tubería
+    aviso_r, aviso_w = os.pipe()
+    os.set_blocking(aviso_w, False)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.set_wakeup_fd(aviso_w)
+
+    hijos = {}   # pid → socket por donde se avisa el returncode
+
+    while True:
+        try:
+            listos, _, _ = select.select([canal, aviso_r], [], [])
+        except InterruptedError:
+            continue
+
+        if aviso_r in listos:
+            os.read(aviso_r, 512)
+
+        if canal in listos:
+            try:
+                datos, fds, _, _ = socket.recv_fds(canal, _TAMANO_MENSAJE, 4)
+            except OSError:
+                break
+            if not datos:
+                break   # el cliente cerró el canal
+
+            fd_respuesta, fd_entrada, fd_salida, fd_error = fds
+            pedido = json.loads(datos)
+
+            pid = os.fork()
+            if pid == 0:
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                for s in [canal, *hijos.values()]:
+                    s.close()
+                os.close(aviso_r)
+                os.close(aviso_w)
+                os.close(fd_respuesta)
+                _ejecutar_hijo(pedido["ruta"], fd_entrada, fd_salida, fd_error,
+                               pedido.get("limites"))
+
+            for fd in (fd_entrada, fd_salida, fd_error):
+                os.close(fd)
+            respuesta = socket.socket(fileno=fd_respuesta)
+            try:
+                respuesta.send(json.dumps({"pid": pid}).encode())
+            except OSError:
+                pass
+            hijos[pid] = respuesta
+
+        # Recogemos a todos los hijos que ya terminaron.
+        # wait4 además dice cuánta CPU y memoria usó cada uno
+        # (la memoria incluye las páginas heredadas del servidor)
+        while hijos:
+            try:
+                pid, estado, uso = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            respuesta = hijos.pop(pid, None)
+            if respuesta is None:
+                continue
+            try:
+                respuesta.send(json.dumps({
+                    "returncode": os.waitstatus_to_exitcode(estado),
+                    "recursos":   grader._medir_recursos(0.0, uso),
+                }).encode())
+            except OSError:
+                pass
+            respuesta.close()
+
+    for pid in hijos:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+# ── Lado cliente (corre dentro del grader) ────────────────────
+
+class ServidorFork:
+    """
+    Cliente del fork-server. Un solo objeto puede atender a
+    varios hilos a la vez (por ejemplo calificar con trabajadores > 1).
+    """
+
+    def __init__(self):
+        self._proceso = None
+        self._canal   = None
+        self._candado = threading.Lock()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *_):
+        self.detener()
+
+    def iniciar(self):
+        """Lanza el proceso servidor si todavía no está corriendo."""
+        if not FORK_DISPONIBLE:
+            raise RuntimeError("El fork-server necesita os.fork (Linux o macOS).")
+        if self._proceso is not None and self._proceso.poll() is None:
+            return
+
+        propio, del_servidor = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self._proceso = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--servir",
+             str(del_servidor.fileno())],
+            pass_fds=(del_servidor.fileno(),),
+            stdin=subprocess.DEVNULL,
+        )
+        del_servidor.close()
+        self._canal = propio
+
+    def detener(self):
+        """Cierra el canal; el servidor termina solo al notarlo."""
+        if self._canal is not None:
+            self._canal.close()
+            self._canal = None
+        if self._proceso is not None:
+            try:
+                self._proceso.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proceso.kill()
+                self._proceso.wait()
+            self._proceso = None
+
+    def _pedir_ejecucion(self, pedido: dict, fds: list):
+        """Envía un pedido al servidor, relanzándolo una vez si había muerto."""
+        with self._candado:
+            for intento in range(2):
+                self.iniciar()
+                try:
+                    socket.send_fds(self._canal, [json.dumps(pedido).encode("utf-8")], fds)
+                    return
+                except OSError:
+                    if intento == 1:
+                        raise
+                    self.detener()
+
+    def ejecutar_programa(self, ruta_py: str, entrada, limites: dict = None,
+                          comparador=None) -> dict:
+        """
+        Igual que grader.ejecutar_programa, pero el hijo sale de un
+        fork() del servidor en vez de arrancar un Python nuevo.
+        Respeta grader.TIEMPO_LIMITE_SEGUNDOS y los límites de recursos
+        de la tarea (el hijo los aplica antes de ejecutar el archivo).
+        """
+        limite = grader.TIEMPO_LIMITE_SEGUNDOS
+        inicio = time.perf_counter()
+        propios = []   # descriptores que este método debe cerrar
+        try:
+            entrada_r, entrada_w = os.pipe()
+            salida_r,  salida_w  = os.pipe()
+            error_r,   error_w   = os.pipe()
+            respuesta, respuesta_servidor = socket.socketpair(
+                socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            propios = [entrada_w, salida_r, error_r]
+
+            try:
+                self._pedir_ejecucion({
+                    "ruta":    os.path.abspath(ruta_py),
+                    "limites": limites,
+                }, [
+                    respuesta_servidor.fileno(), entrada_r, salida_w, error_w,
+                ])
+            finally:
+                # Estos extremos ya los tiene el servidor (o falló el envío)
+                respuesta_servidor.close()
+                for fd in (entrada_r, salida_w, error_w):
+                    os.close(fd)
+
+            with respuesta:
+                respuesta.settimeout(limite)
+                pid = json.loads(respuesta.recv(_TAMANO_MENSAJE))["pid"]
+
+                def matar():
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+
+                # Desde aquí la captura es dueña de los tres descriptores
+                datos, opciones = grader._preparar_captura(entrada, comparador)
+                captura = CapturaLimitada(
+                    open(entrada_w, "wb", buffering=0),
+                    open(salida_r, "rb", buffering=0),
+                    open(error_r, "rb", buffering=0),
+                    datos, al_exceder=matar, **opciones)
+                propios = []
+                captura.iniciar()
+
+                try:
+                    aviso = json.loads(respuesta.recv(_TAMANO_MENSAJE) or b"{}")
+                except socket.timeout:
+                    # Mismo comportamiento que grader.ejecutar_programa con timeout
+                    matar()
+                    captura.terminar(timeout=1)
+                    return {
+                        "salida":    "",
+                        "error":     f"El programa tardo mas de {limite} segundos.",
+                        "timeout":   True,
+                        "excepcion": False,
+                        "truncado":  captura.truncado,
+                        "recursos":  grader._medir_recursos(time.perf_counter() - inicio),
+                        "limite_excedido": None
+                    }
+
+                returncode = aviso.get("returncode", -1)
+                recursos   = aviso.get("recursos") or grader._medir_recursos(0.0)
+                recursos["segundos_reales"] = round(time.perf_counter() - inicio, 4)
+                captura.terminar(timeout=1)
+
+            return grader._anotar_comparacion(grader._clasificar_limite({
+                "salida":    captura.salida.strip(),
+                "error":     captura.error.strip(),
+                "timeout":   False,
+                "excepcion": returncode != 0,
+                "truncado":  captura.truncado,
+                "recursos":  recursos
+            }, limites, returncode), comparador)
+
+        except Exception as e:
+            return {
+                "salida":    "",
+                "error":     str(e),
+                "timeout":   False,
+                "excepcion": True,
+                "truncado":  False,
+                "recursos":  grader._medir_recursos(time.perf_counter() - inicio),
+                "limite_excedido": None
+            }
+
+        finally:
+            for fd in propios:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__" and len(sys.argv) == 3 and sys.argv[1] == "--servir":
+    _servir(int(sys.argv[2]))
@@ -6,22 +6,186 @@
 # Responsabilidad: ejecutar el archivo .py del estudiante con
 # cada caso de prueba del profesor y calcular la nota final.
 #
-# Librería usada:
-#   - subprocess → ejecuta programas externos desde Python
-#                  Es la forma estándar de correr un .py desde otro .py
+# Librerías usadas:
+#   - subprocess         → ejecuta programas externos desde Python
+#                          Es la forma estándar de correr un .py desde otro .py
+#   - concurrent.futures → reparte los casos entre varios hilos
+#                          para ejecutarlos al mismo tiempo
+#   - captura_limitada   → lee stdout/stderr con un tope de bytes
+#   - os.wait4           → al terminar cada proceso da su tiempo de CPU
+#                          y su memoria máxima (solo Linux/macOS)
+#   - limites_recursos   → límites de CPU, memoria, archivos y procesos
+#                          que el profesor define por tarea
+#   - rendimiento        → puntos extra por eficiencia, si la tarea
+#                          declara una solución de referencia
+#   - comparadores       → compara stdout con lo esperado mientras llega
+#   - diferencias        → en qué línea se separó la salida de un caso fallido
 # =============================================================
 
 import subprocess
 import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoTimeout
 from test_case_service import cargar_casos
+import almacen_blobs
+import cache_resultados
+import comparadores
+import diferencias
+import precompilador
+import rendimiento
+import metricas
+import limites_recursos
+import captura_limitada
+from captura_limitada import CapturaLimitada
 
 
 # Tiempo máximo que tiene el programa del estudiante para responder
 # Si tarda más (bucle infinito, etc.) se cancela automáticamente
 TIEMPO_LIMITE_SEGUNDOS = 5
 
+# Intérprete con el que se ejecutan las entregas.
+# Es el mismo que corre el grader: los .pyc precompilados solo
+# sirven para la versión de Python que los generó.
+INTERPRETE_PYTHON = sys.executable or "python"
 
-def ejecutar_programa(ruta_py: str, entrada: str) -> dict:
+# Cuántos casos se ejecutan a la vez como máximo.
+# Cada caso es un proceso aparte, así que un hilo por caso basta:
+# el hilo solo espera a que el proceso termine.
+TRABAJADORES_POR_DEFECTO = os.cpu_count() or 1
+
+# Si es True, una entrega byte a byte idéntica a otra ya calificada
+# (misma tarea, mismos casos, mismos ajustes) reutiliza el resultado
+# guardado en cache_resultados en vez de ejecutarse otra vez.
+USAR_CACHE = True
+
+# Si es True, el archivo se compila una sola vez antes de los casos
+# (ver precompilador.py): si no compila se rechaza con un único
+# diagnóstico, y si compila cada caso ejecuta el .pyc ya generado.
+PRECOMPILAR = True
+
+# Si es True, cada calificación ejecutada deja su consumo de tiempo y
+# memoria en metricas_calificacion/ (ver metricas.py)
+REGISTRAR_METRICAS = True
+
+# Políticas para cortar antes una entrega que ya no va a mejorar.
+# Todas vienen apagadas; calificar(..., politica={...}) las activa.
+#   - abortar_si_no_compila: si un caso falla con SyntaxError (el archivo
+#                            ni siquiera compila), los demás no se ejecutan
+#   - max_timeouts_seguidos: tras K timeouts consecutivos se deja de ejecutar
+#   - presupuesto_segundos:  tiempo total máximo para toda la entrega
+POLITICA_POR_DEFECTO = {
+    "abortar_si_no_compila": False,
+    "max_timeouts_seguidos": None,
+    "presupuesto_segundos":  None,
+}
+
+# Motivos que se guardan en los casos omitidos
+OMISION_NO_COMPILA  = "El archivo no compila; no se ejecutaron los casos restantes."
+OMISION_SIN_COMPILAR = "El archivo no compila; no se ejecuto ningun caso."
+OMISION_TIMEOUTS    = "Demasiados timeouts seguidos; no se ejecutaron los casos restantes."
+OMISION_PRESUPUESTO = "Se agoto el tiempo total de calificacion de la entrega."
+
+# Errores que Python lanza al compilar, antes de ejecutar una sola línea
+_ERROR_COMPILACION = re.compile(r"^(SyntaxError|IndentationError|TabError)\b", re.MULTILINE)
+
+
+def _medir_recursos(segundos_reales: float, uso=None) -> dict:
+    """
+    Arma el dict de recursos que consumió UN proceso.
+
+    Parámetros:
+        segundos_reales (float): tiempo de reloj desde que arrancó hasta que terminó
+        uso (struct_rusage):     lo que devuelve os.wait4, o None si el
+                                 sistema no lo da (Windows): entonces CPU y
+                                 memoria quedan en None
+    """
+    recursos = {
+        "segundos_reales": round(segundos_reales, 4),
+        "cpu_usuario":     None,
+        "cpu_sistema":     None,
+        "memoria_pico_kb": None,
+    }
+    if uso is not None:
+        # ru_maxrss viene en KB en Linux y en bytes en macOS
+        memoria = uso.ru_maxrss // 1024 if sys.platform == "darwin" else uso.ru_maxrss
+        recursos["cpu_usuario"]     = round(uso.ru_utime, 4)
+        recursos["cpu_sistema"]     = round(uso.ru_stime, 4)
+        recursos["memoria_pico_kb"] = memoria
+    return recursos
+
+
+def _matar(proceso):
+    """
+    Mata al proceso sin recogerlo.
+    Popen.kill() llama antes a poll(), que podría recoger al proceso
+    y robarle a os.wait4 sus datos de consumo.
+    """
+    if os.name != "posix":
+        proceso.kill()
+        return
+    try:
+        os.kill(proceso.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _esperar_proceso(proceso, limite: float) -> tuple:
+    """
+    Espera a que el proceso termine, matándolo si pasa de 'limite' segundos.
+
+    Retorna:
+        (se_agoto_el_tiempo, uso)  uso es el struct_rusage de os.wait4,
+                                   o None donde wait4 no existe
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            proceso.wait(timeout=limite)
+            return False, None
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+            proceso.wait()
+            return True, None
+
+    agotado = threading.Event()
+
+    def cortar():
+        agotado.set()
+        _matar(proceso)
+
+    temporizador = threading.Timer(limite, cortar)
+    temporizador.daemon = True
+    temporizador.start()
+    try:
+        _, estado, uso = os.wait4(proceso.pid, 0)
+    finally:
+        temporizador.cancel()
+
+    # Le contamos a Popen cómo terminó, así no intenta recogerlo otra vez
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    return agotado.is_set(), uso
+
+
+def _clasificar_limite(ejecucion: dict, limites: dict, returncode: int) -> dict:
+    """
+    Si el programa murió por un límite de la tarea, lo anota en
+    "limite_excedido" y antepone un mensaje claro al error.
+    Lo usan todos los ejecutores (subprocess, fork_server, asyncio).
+    """
+    limite = limites_recursos.detectar(limites, returncode, ejecucion["error"],
+                                       ejecucion.get("recursos"))
+    ejecucion["limite_excedido"] = limite
+    if limite is not None:
+        mensaje = limites_recursos.describir(limite, limites)
+        ejecucion["error"] = f"{mensaje}\n{ejecucion['error']}".strip()
+    return ejecucion
+
+
+def ejecutar_programa(ruta_py: str, entrada, limites: dict = None,
+                      comparador=None, tiempo_limite: float = None) -> dict:
     """
     Ejecuta un archivo .py con una entrada específica y captura su salida.
 
@@ -30,58 +194,462 @@ def ejecutar_programa(ruta_py: str, entrada: str) -> dict:
             python tarea.py
         y luego le enviaras el texto de 'entrada' como si lo escribiera el usuario.
 
+    La salida se lee poco a poco con un tope de bytes
+    (captura_limitada.LIMITE_SALIDA_BYTES): si el programa imprime
+    más que eso se lo detiene, así un print() en bucle infinito
+    no puede llenar la memoria del grader.
+
     Parámetros:
         ruta_py (str): ruta al archivo .py del estudiante
-        entrada (str): texto que se enviará como input() al programa
+                       (o a su .pyc precompilado, ver precompilador.comando)
+        entrada (str): texto que se enviará como input() al programa,
+                       o un archivo binario abierto (ver almacen_blobs)
+        limites (dict): límites de recursos de la tarea (ver limites_recursos);
+                        un envoltorio los fija antes de ejecutar el programa
+        comparador:     si se da (ver comparadores.py), recibe stdout por
+                        bloques mientras el programa corre
+        tiempo_limite (float): segundos máximos; None → TIEMPO_LIMITE_SEGUNDOS
 
     Retorna dict con:
         - salida    (str):  lo que imprimió el programa (stdout)
         - error     (str):  mensaje de error si falló (stderr)
         - timeout   (bool): True si el programa tardó más de 5 segundos
         - excepcion (bool): True si el programa lanzó una excepción
+        - truncado  (bool): True si imprimió más del tope y se lo detuvo
+        - recursos  (dict): segundos_reales, cpu_usuario, cpu_sistema,
+                            memoria_pico_kb (ver _medir_recursos)
+        - limite_excedido (str): "memoria", "cpu", ... si el programa murió
+                            por un límite de la tarea; None si no
+        - coincide  (bool): solo con comparador: si la salida coincidió
     """
+    if tiempo_limite is None:
+        tiempo_limite = TIEMPO_LIMITE_SEGUNDOS
+    inicio = time.perf_counter()
     try:
-        resultado = subprocess.run(
-            ["python", ruta_py],   # comando: python archivo.py
-            input=entrada,         # lo que recibe el input() del estudiante
-            capture_output=True,   # captura print() y errores
-            text=True,             # trabaja con strings, no bytes
-            timeout=TIEMPO_LIMITE_SEGUNDOS
+        proceso = subprocess.Popen(
+            # comando: python archivo.py (con los límites de la tarea, si hay)
+            limites_recursos.comando(precompilador.comando(INTERPRETE_PYTHON, ruta_py),
+                                     limites, INTERPRETE_PYTHON),
+            stdin=subprocess.PIPE,          # lo que recibe el input() del estudiante
+            stdout=subprocess.PIPE,         # captura print()
+            stderr=subprocess.PIPE,         # captura errores
         )
+    except Exception as e:
         return {
-            "salida":    resultado.stdout.strip(),  # quitamos saltos de línea al final
-            "error":     resultado.stderr.strip(),
+            "salida":    "",
+            "error":     str(e),
             "timeout":   False,
-            "excepcion": resultado.returncode != 0  # returncode != 0 significa que hubo error
+            "excepcion": True,
+            "truncado":  False,
+            "recursos":  _medir_recursos(time.perf_counter() - inicio),
+            "limite_excedido": None
         }
 
-    except subprocess.TimeoutExpired:
+    datos, opciones = _preparar_captura(entrada, comparador)
+    captura = CapturaLimitada(proceso.stdin, proceso.stdout, proceso.stderr,
+                              datos, al_exceder=lambda: _matar(proceso), **opciones)
+    captura.iniciar()
+
+    agotado, uso = _esperar_proceso(proceso, tiempo_limite)
+    recursos = _medir_recursos(time.perf_counter() - inicio, uso)
+    captura.terminar(timeout=1)
+
+    if agotado:
         # El programa del estudiante tardó más de 5 segundos
         return {
             "salida":    "",
-            "error":     f"El programa tardo mas de {TIEMPO_LIMITE_SEGUNDOS} segundos.",
+            "error":     f"El programa tardo mas de {tiempo_limite} segundos.",
             "timeout":   True,
-            "excepcion": False
+            "excepcion": False,
+            "truncado":  captura.truncado,
+            "recursos":  recursos,
+            "limite_excedido": None
         }
 
-    except Exception as e:
-        return {
-            "salida":    "",
-            "error":     str(e),
-            "timeout":   False,
-            "excepcion": True
-        }
+    return _anotar_comparacion(_clasificar_limite({
+        "salida":    captura.salida.strip(),  # quitamos saltos de línea al final
+        "error":     captura.error.strip(),
+        "timeout":   False,
+        "excepcion": proceso.returncode != 0,  # returncode != 0 significa que hubo error
+        "truncado":  captura.truncado,
+        "recursos":  recursos
+    }, limites, proceso.returncode), comparador)
+
+
+def _preparar_captura(entrada, comparador=None) -> tuple:
+    """
+    Retorna (entrada para CapturaLimitada, opciones extra de la captura).
+    Con comparador, stdout se le entrega por bloques y el programa puede
+    imprimir tanto como la salida esperada antes de que se lo detenga.
+    Lo comparten ejecutar_programa y fork_server.
+    """
+    datos = entrada.encode("utf-8") if isinstance(entrada, str) else entrada
+    if comparador is None:
+        return datos, {}
+    return datos, {
+        "consumidor":   comparador.alimentar,
+        "limite_corte": captura_limitada.LIMITE_SALIDA_BYTES + comparador.bytes_esperados,
+    }
+
+
+def _anotar_comparacion(ejecucion: dict, comparador) -> dict:
+    """Agrega "coincide" a la ejecución si hubo comparación por bloques."""
+    if comparador is not None:
+        ejecucion["coincide"] = comparador.terminar() and not ejecucion["truncado"]
+    return ejecucion
+
+
+def _armar_resultado(caso: dict, ejecucion: dict, regla=None) -> dict:
+    """
+    Compara la ejecución de UN caso con lo esperado y arma su resultado.
+    Lo comparten calificar() y grader_async.calificar_async().
+    Si el caso falló, trae "diferencia": dónde se separó la salida
+    (ver diferencias.py), comparando cada línea con 'regla' (la del
+    caso en comparadores.preparar_tarea; None → la del propio caso).
+    """
+    salida_real     = ejecucion["salida"]
+    salida_esperada = caso["esperado"].strip()
+
+    # El comparador de la tarea (ver comparadores.py) ya revisó stdout
+    # por bloques mientras el programa corría. Sin "coincide" no llegó
+    # a compararse (timeout, error al lanzar...)
+    paso = ejecucion.get("coincide", False)
+
+    # Solo sumamos puntos si pasó
+    puntos_obtenidos = caso["puntaje"] if paso else 0.0
+
+    diferencia = None
+    if not paso and not ejecucion["timeout"]:
+        diferencia = diferencias.para_caso(caso, salida_real, regla)
+
+    return {
+        "caso_id":          caso["id"],
+        "hash_caso":        caso.get("hash"),
+        "entrada":          diferencias.recortar(caso["entrada"]),
+        "esperado":         diferencias.recortar(salida_esperada),
+        "obtenido":         diferencias.recortar(salida_real),
+        "diferencia":       diferencia,
+        "paso":             paso,
+        "puntaje_posible":  caso["puntaje"],
+        "puntaje_obtenido": puntos_obtenidos,
+        "error":            ejecucion["error"],
+        "timeout":          ejecucion["timeout"],
+        "truncado":         ejecucion.get("truncado", False),
+        "recursos":         ejecucion.get("recursos"),
+        "limite_excedido":  ejecucion.get("limite_excedido"),
+        "omitido":          False,
+        **_referencias_blob(caso),
+    }
+
+
+def _resultado_omitido(caso: dict, motivo: str) -> dict:
+    """Resultado de un caso que NO se ejecutó por una política de corte."""
+    return {
+        "caso_id":          caso["id"],
+        "hash_caso":        caso.get("hash"),
+        "entrada":          diferencias.recortar(caso["entrada"]),
+        "esperado":         diferencias.recortar(caso["esperado"].strip()),
+        "obtenido":         "",
+        "diferencia":       None,
+        "paso":             False,
+        "puntaje_posible":  caso["puntaje"],
+        "puntaje_obtenido": 0.0,
+        "error":            "",
+        "timeout":          False,
+        "truncado":         False,
+        "recursos":         None,
+        "limite_excedido":  None,
+        "omitido":          True,
+        "motivo_omision":   motivo,
+        **_referencias_blob(caso),
+    }
+
+
+def _referencias_blob(caso: dict) -> dict:
+    """Referencias a blobs del caso (para que la interfaz diga "archivo de N bytes")."""
+    return {campo: caso[campo] for campo in ("entrada_blob", "esperado_blob") if caso.get(campo)}
+
+
+def _es_error_de_compilacion(error: str) -> bool:
+    """
+    True si el stderr es de un archivo que no compila.
+    Un SyntaxError del archivo principal no trae "Traceback": Python
+    lo reporta antes de ejecutar nada. Con traceback, el SyntaxError
+    vino de algo que el programa hizo al correr (ej: eval).
+    """
+    return (not error.startswith("Traceback")
+            and _ERROR_COMPILACION.search(error) is not None)
+
+
+def _evaluar_caso(ruta_py: str, caso: dict, ejecutor=ejecutar_programa,
+                  limites: dict = None, regla=None) -> dict:
+    """
+    Ejecuta UN caso de prueba y arma su resultado.
+    Es de uso interno: calificar() la llama una vez por caso,
+    ya sea en orden o desde varios hilos a la vez.
+    'regla' es la de comparadores.preparar_tarea; None → se prepara aquí.
+    """
+    opciones = {}
+    if limites_recursos.hay_limites(limites):
+        opciones["limites"] = limites
+    regla      = regla or comparadores.compilar(caso)
+    comparador = regla.nuevo()
+    try:
+        with almacen_blobs.abrir_entrada(caso) as entrada:
+            ejecucion = ejecutor(ruta_py, entrada, comparador=comparador, **opciones)
+    finally:
+        comparador.cerrar()
+    return _armar_resultado(caso, ejecucion, regla)
 
 
-def calificar(ruta_py: str, cod_tarea: str) -> dict:
+def _armar_calificacion(cod_tarea: str, nombre_archivo: str, config: dict,
+                        resultados: list) -> dict:
+    """
+    Suma los puntos de todos los casos y arma la calificación final.
+    Los casos medidos por rendimiento.py suman además sus puntos de eficiencia.
+    """
+    extra_posible  = sum(r["rendimiento"]["puntaje_posible"]
+                         for r in resultados if r.get("rendimiento"))
+    extra_obtenido = sum(r["rendimiento"]["puntaje_obtenido"]
+                         for r in resultados if r.get("rendimiento"))
+    nota_obtenida = round(sum(r["puntaje_obtenido"] for r in resultados) + extra_obtenido, 2)
+    nota_maxima   = round(config["puntaje_total"] + extra_posible, 2)
+
+    # Porcentaje: si nota máxima es 0 evitamos división por cero
+    porcentaje = round((nota_obtenida / nota_maxima) * 100, 1) if nota_maxima > 0 else 0.0
+
+    return {
+        "cod_tarea":      cod_tarea,
+        "nombre_archivo": nombre_archivo,
+        "nota_obtenida":  nota_obtenida,
+        "nota_maxima":    nota_maxima,
+        "porcentaje":     porcentaje,
+        "resultados":     resultados,
+        "recursos":       _sumar_recursos(resultados),
+        "desde_cache":    False,
+    }
+
+
+def _sumar_recursos(resultados: list) -> dict:
+    """
+    Totales de la entrega: suma de tiempos de todos los casos y la
+    memoria máxima que llegó a usar cualquiera de ellos.
+    Los valores que el sistema no da (None) no se suman.
+    """
+    medidos = [r["recursos"] for r in resultados if r.get("recursos")]
+
+    def total(clave):
+        valores = [m[clave] for m in medidos if m[clave] is not None]
+        return round(sum(valores), 4) if valores else None
+
+    memorias = [m["memoria_pico_kb"] for m in medidos if m["memoria_pico_kb"] is not None]
+    return {
+        "casos_medidos":   len(medidos),
+        "segundos_reales": total("segundos_reales"),
+        "cpu_usuario":     total("cpu_usuario"),
+        "cpu_sistema":     total("cpu_sistema"),
+        "memoria_pico_kb": max(memorias) if memorias else None,
+    }
+
+
+def _rechazar_por_compilacion(cod_tarea: str, nombre_archivo: str, config: dict,
+                              diagnostico: str) -> dict:
+    """
+    Calificación de un archivo que no compila: 0 puntos, ningún caso
+    ejecutado y un único diagnóstico en "error_compilacion".
+    """
+    resultados = [_resultado_omitido(caso, OMISION_SIN_COMPILAR) for caso in config["casos"]]
+    calificacion = _armar_calificacion(cod_tarea, nombre_archivo, config, resultados)
+    calificacion["error_compilacion"] = diagnostico
+    return calificacion
+
+
+def _preparar_ejecutable(ruta_py: str, precompilar: bool) -> tuple:
+    """
+    Retorna (ruta a ejecutar, diagnóstico de compilación).
+    Si no se precompila o no se puede leer el archivo, se ejecuta
+    el .py tal cual y el ejecutor reportará el problema caso por caso.
+    """
+    if not precompilar:
+        return ruta_py, ""
+    try:
+        ruta_pyc, diagnostico = precompilador.precompilar(ruta_py)
+    except OSError:
+        return ruta_py, ""
+    return ruta_pyc, diagnostico
+
+
+def _ajustes_ejecucion(ejecutor, politica: dict = None, limites: dict = None,
+                      config_rendimiento: dict = None, comparador=None) -> dict:
+    """
+    Ajustes del ejecutor que pueden cambiar el resultado de un caso.
+    Forman parte de la clave de la caché: si cambian, no hay acierto.
+    """
+    return {
+        "tiempo_limite": TIEMPO_LIMITE_SEGUNDOS,
+        "limite_salida": captura_limitada.LIMITE_SALIDA_BYTES,
+        "ejecutor":      getattr(ejecutor, "__qualname__", type(ejecutor).__name__),
+        "politica":      politica or POLITICA_POR_DEFECTO,
+        "limites":       limites_recursos.normalizar(limites),
+        "rendimiento":   config_rendimiento,
+        "comparador":    comparador,
+    }
+
+
+def _clave_cache(ruta_py: str, config: dict, ejecutor, politica: dict = None) -> str:
+    """Clave de caché de esta entrega, o None si no se pudo leer el archivo."""
+    try:
+        hash_entrega = cache_resultados.hash_archivo(ruta_py)
+    except OSError:
+        return None
+    return cache_resultados.calcular_clave(hash_entrega, config["casos"],
+                                           _ajustes_ejecucion(ejecutor, politica,
+                                                              config.get("limites"),
+                                                              config.get("rendimiento"),
+                                                              config.get("comparador")))
+
+
+def _buscar_en_cache(cod_tarea: str, clave: str, nombre_archivo: str) -> dict:
+    """Calificación guardada para esta clave (con el nombre de ESTE archivo) o None."""
+    if clave is None:
+        return None
+    guardada = cache_resultados.buscar(cod_tarea, clave)
+    if guardada is not None:
+        guardada["nombre_archivo"] = nombre_archivo
+        guardada["desde_cache"]    = True
+    return guardada
+
+
+def _guardar_en_cache(cod_tarea: str, clave: str, calificacion: dict):
+    """Guarda la calificación si se puede reutilizar más adelante."""
+    # Un timeout (o quedarse sin presupuesto) puede deberse a que la máquina
+    # estaba cargada, así que esas calificaciones no se guardan
+    dependen_de_la_carga = any(
+        r["timeout"] or r.get("motivo_omision") == OMISION_PRESUPUESTO
+        for r in calificacion["resultados"]
+    )
+    if clave is not None and not dependen_de_la_carga:
+        cache_resultados.guardar(cod_tarea, clave, calificacion)
+
+
+def _ejecutar_casos(ruta_py: str, casos: list, ejecutor, trabajadores: int,
+                    politica: dict, limites: dict = None, previos: dict = None,
+                    al_terminar_caso=None, reglas: dict = None) -> list:
+    """
+    Ejecuta todos los casos (en paralelo si trabajadores > 1) aplicando
+    las políticas de corte. Retorna los resultados en el orden de los casos;
+    los que no se ejecutaron quedan marcados con "omitido": True.
+
+    Las políticas se revisan en el orden de los casos, así la nota no
+    depende de cuántos trabajadores se usen: si el caso 3 dispara el corte,
+    del 4 en adelante se omiten aunque ya hubieran terminado.
+    La única excepción es el presupuesto: lo que terminó a tiempo cuenta.
+
+    'previos' (caso_id → resultado) son casos que ya se ejecutaron antes
+    (por ejemplo, antes de que se cayera un trabajador de cola_trabajos):
+    no se vuelven a ejecutar. al_terminar_caso(caso, resultado) se llama
+    por cada caso recién ejecutado, para guardarlo apenas termina.
+    'reglas' (caso_id → regla) son las de comparadores.preparar_tarea.
+    """
+    previos     = previos or {}
+    reglas      = reglas or {}
+    presupuesto = politica["presupuesto_segundos"]
+    max_timeouts = politica["max_timeouts_seguidos"]
+    inicio = time.monotonic()
+
+    pool    = ThreadPoolExecutor(max_workers=trabajadores) if trabajadores > 1 else None
+    futuros = [None if caso["id"] in previos
+               else pool.submit(_evaluar_caso, ruta_py, caso, ejecutor, limites,
+                                reglas.get(caso["id"]))
+               for caso in casos] if pool else []
+
+    resultados = []
+    seguidos   = 0      # timeouts consecutivos
+    motivo     = None   # motivo de corte, cuando alguna política se dispara
+    try:
+        for i, caso in enumerate(casos):
+            restante = None
+            if presupuesto is not None and motivo is None:
+                restante = presupuesto - (time.monotonic() - inicio)
+                if restante <= 0 and caso["id"] not in previos \
+                        and not (pool and futuros[i].done()):
+                    motivo = OMISION_PRESUPUESTO
+
+            if motivo is not None:
+                if motivo == OMISION_PRESUPUESTO and caso["id"] in previos:
+                    resultados.append(previos[caso["id"]])
+                elif motivo == OMISION_PRESUPUESTO and pool and futuros[i].done():
+                    resultados.append(futuros[i].result())
+                else:
+                    resultados.append(_resultado_omitido(caso, motivo))
+                continue
+
+            if caso["id"] in previos:
+                resultado = previos[caso["id"]]
+            elif pool:
+                try:
+                    resultado = futuros[i].result(timeout=restante)
+                except FuturoTimeout:
+                    motivo = OMISION_PRESUPUESTO
+                    resultados.append(_resultado_omitido(caso, motivo))
+                    continue
+            else:
+                resultado = _evaluar_caso(ruta_py, caso, ejecutor, limites,
+                                          reglas.get(caso["id"]))
+            resultados.append(resultado)
+
+            if al_terminar_caso is not None and caso["id"] not in previos:
+                al_terminar_caso(caso, resultado)
+
+            if politica["abortar_si_no_compila"] and _es_error_de_compilacion(resultado["error"]):
+                motivo = OMISION_NO_COMPILA
+
+            seguidos = seguidos + 1 if resultado["timeout"] else 0
+            if max_timeouts and seguidos >= max_timeouts:
+                motivo = OMISION_TIMEOUTS
+    finally:
+        if pool:
+            # No esperamos a los casos que ya no importan: terminan solos
+            # (como mucho en TIEMPO_LIMITE_SEGUNDOS) en segundo plano
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return resultados
+
+
+def calificar(ruta_py: str, cod_tarea: str, trabajadores: int = None,
+              ejecutor=None, usar_cache: bool = None, politica: dict = None,
+              precompilar: bool = None, previos: dict = None,
+              al_terminar_caso=None, id_estudiante: str = None) -> dict:
     """
     Función principal del módulo.
     Ejecuta el archivo del estudiante contra TODOS los casos de prueba
     y devuelve el resultado completo de la calificación.
 
+    Los casos se ejecutan en paralelo: así una tarea con 20 casos
+    tarda lo que tarde el caso más lento, no la suma de todos.
+
     Parámetros:
-        ruta_py   (str): ruta al archivo .py del estudiante
-        cod_tarea (str): código de la tarea, ej: "TAREA-01"
+        ruta_py      (str): ruta al archivo .py del estudiante
+        cod_tarea    (str): código de la tarea, ej: "TAREA-01"
+        trabajadores (int): casos que se ejecutan a la vez.
+                            None → TRABAJADORES_POR_DEFECTO (núcleos)
+                            1    → uno tras otro, como antes
+        ejecutor     (func): función que corre UN caso, con la misma firma
+                            y el mismo dict de retorno que ejecutar_programa.
+                            None → ejecutar_programa (un subprocess por caso).
+                            Ej: ServidorFork().ejecutar_programa (fork_server.py)
+        usar_cache   (bool): reutilizar calificaciones de archivos idénticos.
+                            None → USAR_CACHE
+        politica     (dict): políticas de corte que se quieran activar,
+                            con las claves de POLITICA_POR_DEFECTO.
+                            Ej: {"abortar_si_no_compila": True}
+        precompilar  (bool): compilar una sola vez antes de los casos.
+                            None → PRECOMPILAR
+        previos      (dict): caso_id → resultado ya obtenido antes; esos
+                            casos no se vuelven a ejecutar (reanudar)
+        al_terminar_caso (func): se llama con (caso, resultado) apenas
+                            termina cada caso ejecutado (checkpoints)
+        id_estudiante (str): de quién es la entrega, para las métricas
 
     Retorna dict con:
         - cod_tarea       (str)
@@ -89,7 +657,20 @@ def calificar(ruta_py: str, cod_tarea: str) -> dict:
         - nota_obtenida   (float): puntaje total ganado
         - nota_maxima     (float): puntaje máximo posible
         - porcentaje      (float): nota en porcentaje 0-100
-        - resultados      (list):  detalle de cada caso
+        - resultados      (list):  detalle de cada caso, en el mismo
+                                   orden en que el profesor los definió.
+                                   Los casos no ejecutados por una política
+                                   traen "omitido": True y "motivo_omision"
+        - desde_cache     (bool):  True si no se ejecutó nada porque
+                                   el resultado ya estaba guardado
+        - error_compilacion (str): solo si el archivo no compila; en ese
+                                   caso ningún caso llegó a ejecutarse
+        - recursos        (dict):  consumo total de la entrega (ver _sumar_recursos);
+                                   cada caso trae también su propio "recursos"
+                                   Los casos medidos por eficiencia traen además
+                                   "rendimiento" (ver rendimiento.puntuar), cuyos
+                                   puntos se suman a la nota
+        - segundos_calificacion (float): tiempo de reloj de toda la calificación
     """
     # Cargamos los casos que configuró el profesor
     config = cargar_casos(cod_tarea)
@@ -97,47 +678,46 @@ def calificar(ruta_py: str, cod_tarea: str) -> dict:
         return {"error": f"No existe configuracion para la tarea '{cod_tarea}'"}
 
     nombre_archivo = os.path.basename(ruta_py)
-    resultados     = []
-    nota_obtenida  = 0.0
-
-    # Ejecutamos el programa una vez por cada caso de prueba
-    for caso in config["casos"]:
-        ejecucion = ejecutar_programa(ruta_py, caso["entrada"])
-
-        salida_real    = ejecucion["salida"]
-        salida_esperada = caso["esperado"].strip()
-
-        # Comparamos ignorando mayúsculas/minúsculas y espacios extras
-        # Así "Hola " y "hola" se consideran iguales
-        paso = (salida_real.lower().strip() == salida_esperada.lower().strip())
-
-        # Solo sumamos puntos si pasó
-        puntos_obtenidos = caso["puntaje"] if paso else 0.0
-        nota_obtenida   += puntos_obtenidos
-
-        resultados.append({
-            "caso_id":          caso["id"],
-            "entrada":          caso["entrada"],
-            "esperado":         salida_esperada,
-            "obtenido":         salida_real,
-            "paso":             paso,
-            "puntaje_posible":  caso["puntaje"],
-            "puntaje_obtenido": puntos_obtenidos,
-            "error":            ejecucion["error"],
-            "timeout":          ejecucion["timeout"],
-        })
-
-    nota_obtenida = round(nota_obtenida, 2)
-    nota_maxima   = config["puntaje_total"]
+    casos          = config["casos"]
 
-    # Porcentaje: si nota máxima es 0 evitamos división por cero
-    porcentaje = round((nota_obtenida / nota_maxima) * 100, 1) if nota_maxima > 0 else 0.0
+    if ejecutor is None:
+        ejecutor = ejecutar_programa
+    if usar_cache is None:
+        usar_cache = USAR_CACHE
+    politica = {**POLITICA_POR_DEFECTO, **(politica or {})}
 
-    return {
-        "cod_tarea":      cod_tarea,
-        "nombre_archivo": nombre_archivo,
-        "nota_obtenida":  nota_obtenida,
-        "nota_maxima":    nota_maxima,
-        "porcentaje":     porcentaje,
-        "resultados":     resultados,
-    }
+    clave    = _clave_cache(ruta_py, config, ejecutor, politica) if usar_cache else None
+    guardada = _buscar_en_cache(cod_tarea, clave, nombre_archivo)
+    if guardada is not None:
+        return guardada
+
+    if trabajadores is None:
+        trabajadores = TRABAJADORES_POR_DEFECTO
+    trabajadores = max(1, min(trabajadores, len(casos) or 1))
+
+    try:
+        reglas = comparadores.preparar_tarea(config)
+    except ValueError as e:
+        return {"error": f"Comparador invalido en la tarea '{cod_tarea}': {e}"}
+
+    if precompilar is None:
+        precompilar = PRECOMPILAR
+    ruta_ejecutable, diagnostico = _preparar_ejecutable(ruta_py, precompilar)
+    if diagnostico:
+        calificacion = _rechazar_por_compilacion(cod_tarea, nombre_archivo, config, diagnostico)
+        _guardar_en_cache(cod_tarea, clave, calificacion)
+        return calificacion
+
+    inicio     = time.perf_counter()
+    limites    = limites_recursos.normalizar(config.get("limites"))
+    resultados = _ejecutar_casos(ruta_ejecutable, casos, ejecutor, trabajadores,
+                                 politica, limites, previos, al_terminar_caso, reglas)
+    if config.get("rendimiento"):
+        rendimiento.puntuar(ruta_ejecutable, config, resultados, ejecutor, limites)
+
+    calificacion = _armar_calificacion(cod_tarea, nombre_archivo, config, resultados)
+    calificacion["segundos_calificacion"] = round(time.perf_counter() - inicio, 4)
+    _guardar_en_cache(cod_tarea, clave, calificacion)
+    if REGISTRAR_METRICAS:
+        metricas.registrar_calificacion(calificacion, id_estudiante)
+    return calificacion
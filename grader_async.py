@@ -0,0 +1,290 @@
+# =============================================================
+# grader_async.py
+# Módulo — Motor de calificación asíncrono (asyncio)
+# =============================================================
+# Responsabilidad: lo mismo que grader.py, pero sin bloquear.
+#
+# grader.calificar() usa un hilo del sistema por cada caso que
+# está esperando. Aquí todos los procesos del estudiante se
+# esperan desde un solo event loop con
+# asyncio.create_subprocess_exec, así que se pueden tener cientos
+# de ejecuciones en curso sin cientos de hilos. Sirve para
+# integrar la calificación en una interfaz web asíncrona.
+#
+# Un semáforo global limita cuántos procesos corren a la vez
+# (LIMITE_CONCURRENCIA), sumando TODAS las entregas y casos.
+#
+# Lo que toca el disco (cargar los casos, la caché, compilar, leer
+# los blobs de entrada y de salida esperada) va con
+# asyncio.to_thread: un disco lento no detiene el event loop ni
+# las demás entregas.
+#
+# Ejemplo:
+#     calificacion = await calificar_async("tarea.py", "TAREA-01")
+#     calificaciones = await calificar_lote_async("TAREA-01", rutas)
+#
+# Librería usada:
+#   - asyncio → event loop, subprocesos asíncronos y semáforos
+# =============================================================
+
+import asyncio
+import os
+import time
+
+import grader
+import almacen_blobs
+import captura_limitada
+import comparadores
+import metricas
+import limites_recursos
+import precompilador
+from test_case_service import cargar_casos
+
+
+# Máximo de programas de estudiantes ejecutándose al mismo tiempo
+LIMITE_CONCURRENCIA = 256
+
+# Un semáforo pertenece a un solo event loop: guardamos cuál
+_semaforo      = None
+_loop_semaforo = None
+
+
+def _semaforo_global() -> asyncio.Semaphore:
+    """Retorna el semáforo compartido del event loop actual (lo crea si hace falta)."""
+    global _semaforo, _loop_semaforo
+    loop = asyncio.get_running_loop()
+    if _semaforo is None or _loop_semaforo is not loop:
+        _semaforo      = asyncio.Semaphore(LIMITE_CONCURRENCIA)
+        _loop_semaforo = loop
+    return _semaforo
+
+
+async def _escribir_entrada(proceso, datos):
+    """Envía la entrada (bytes o archivo abierto) al programa y cierra su stdin."""
+    try:
+        if hasattr(datos, "read"):
+            # Blob: de a bloques, esperando a que el programa lea cada uno
+            while True:
+                bloque = await asyncio.to_thread(datos.read, 65536)
+                if not bloque:
+                    break
+                proceso.stdin.write(bloque)
+                await proceso.stdin.drain()
+        else:
+            proceso.stdin.write(datos)
+            await proceso.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass   # el programa terminó sin leer toda la entrada
+    finally:
+        proceso.stdin.close()
+
+
+async def _leer_limitado(flujo, limite: int, al_exceder, consumidor=None,
+                         limite_corte: int = None) -> tuple:
+    """
+    Igual que captura_limitada, pero con un StreamReader de asyncio:
+    guarda como mucho 'limite' bytes y llama a al_exceder() al pasar
+    de limite_corte (por defecto, el mismo limite). Si hay consumidor,
+    recibe cada bloque leído.
+    Retorna (bytes guardados, truncado).
+    """
+    if limite_corte is None:
+        limite_corte = limite
+    buffer   = bytearray()
+    leidos   = 0
+    truncado = False
+    while True:
+        bloque = await flujo.read(65536)
+        if not bloque:
+            break
+        leidos += len(bloque)
+        if consumidor is not None and not truncado:
+            # El comparador puede leer la salida esperada de un blob
+            await asyncio.to_thread(consumidor, bloque)
+        buffer += bloque[:max(limite - len(buffer), 0)]
+        if leidos > limite_corte and not truncado:
+            truncado = True
+            al_exceder()
+    return bytes(buffer), truncado
+
+
+def _matar(proceso):
+    try:
+        proceso.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def ejecutar_programa_async(ruta_py: str, entrada, limites: dict = None,
+                                  comparador=None) -> dict:
+    """
+    Versión asíncrona de grader.ejecutar_programa.
+    Retorna exactamente el mismo dict (salida, error, timeout, excepcion).
+
+    Si el programa supera grader.TIEMPO_LIMITE_SEGUNDOS, o imprime más de
+    captura_limitada.LIMITE_SALIDA_BYTES, se le hace kill() y se espera
+    a que muera, sin bloquear el event loop.
+
+    En "recursos" solo se mide el tiempo de reloj: asyncio recoge al
+    proceso por su cuenta y no expone su rusage, así que CPU y memoria
+    quedan en None.
+    """
+    limite       = grader.TIEMPO_LIMITE_SEGUNDOS
+    limite_bytes = captura_limitada.LIMITE_SALIDA_BYTES
+
+    async with _semaforo_global():
+        inicio = time.perf_counter()
+        try:
+            proceso = await asyncio.create_subprocess_exec(
+                *limites_recursos.comando(
+                    precompilador.comando(grader.INTERPRETE_PYTHON, ruta_py),
+                    limites, grader.INTERPRETE_PYTHON),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except Exception as e:
+            return {
+                "salida":    "",
+                "error":     str(e),
+                "timeout":   False,
+                "excepcion": True,
+                "truncado":  False,
+                "recursos":  grader._medir_recursos(time.perf_counter() - inicio),
+                "limite_excedido": None
+            }
+
+        al_exceder = lambda: _matar(proceso)
+        datos, opciones = grader._preparar_captura(entrada, comparador)
+        try:
+            _, (salida, trunc_salida), (error, trunc_error), _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _escribir_entrada(proceso, datos),
+                    _leer_limitado(proceso.stdout, limite_bytes, al_exceder, **opciones),
+                    _leer_limitado(proceso.stderr, limite_bytes, al_exceder),
+                    proceso.wait(),
+                ),
+                timeout=limite)
+        except asyncio.TimeoutError:
+            _matar(proceso)
+            await proceso.wait()
+            return {
+                "salida":    "",
+                "error":     f"El programa tardo mas de {limite} segundos.",
+                "timeout":   True,
+                "excepcion": False,
+                "truncado":  False,
+                "recursos":  grader._medir_recursos(time.perf_counter() - inicio),
+                "limite_excedido": None
+            }
+        except Exception as e:
+            if proceso.returncode is None:
+                _matar(proceso)
+                await proceso.wait()
+            return {
+                "salida":    "",
+                "error":     str(e),
+                "timeout":   False,
+                "excepcion": True,
+                "truncado":  False,
+                "recursos":  grader._medir_recursos(time.perf_counter() - inicio),
+                "limite_excedido": None
+            }
+        segundos = time.perf_counter() - inicio
+
+    truncado = trunc_salida or trunc_error
+    error    = captura_limitada.a_texto(error).strip()
+    if truncado:
+        aviso = (f"Salida truncada: el programa imprimio mas de "
+                 f"{limite_bytes} bytes y se detuvo.")
+        error = f"{error}\n{aviso}" if error else aviso
+
+    ejecucion = grader._clasificar_limite({
+        "salida":    captura_limitada.a_texto(salida).strip(),
+        "error":     error,
+        "timeout":   False,
+        "excepcion": proceso.returncode != 0,
+        "truncado":  truncado,
+        "recursos":  grader._medir_recursos(segundos)
+    }, limites, proceso.returncode)
+    # terminar() lee lo que falte de la salida esperada
+    return await asyncio.to_thread(grader._anotar_comparacion, ejecucion, comparador)
+
+
+async def _evaluar_caso_async(ruta_py: str, caso: dict, limites: dict = None,
+                              regla=None) -> dict:
+    regla      = regla or comparadores.compilar(caso)
+    comparador = await asyncio.to_thread(regla.nuevo)   # abre el blob esperado si hay
+    archivo    = None
+    try:
+        entrada = caso["entrada"]
+        if caso.get("entrada_blob"):
+            archivo = entrada = await asyncio.to_thread(almacen_blobs.abrir,
+                                                        caso["entrada_blob"])
+        ejecucion = await ejecutar_programa_async(ruta_py, entrada, limites, comparador)
+    finally:
+        if archivo is not None:
+            archivo.close()
+        comparador.cerrar()
+    return grader._armar_resultado(caso, ejecucion, regla)
+
+
+async def calificar_async(ruta_py: str, cod_tarea: str, usar_cache: bool = None,
+                          id_estudiante: str = None) -> dict:
+    """
+    Versión asíncrona de grader.calificar.
+    Todos los casos se lanzan a la vez; el semáforo global decide
+    cuántos corren realmente. Retorna el mismo dict que calificar().
+    """
+    config = await asyncio.to_thread(cargar_casos, cod_tarea)
+    if config is None:
+        return {"error": f"No existe configuracion para la tarea '{cod_tarea}'"}
+
+    nombre_archivo = os.path.basename(ruta_py)
+    if usar_cache is None:
+        usar_cache = grader.USAR_CACHE
+
+    clave = None
+    if usar_cache:
+        clave = await asyncio.to_thread(grader._clave_cache, ruta_py, config,
+                                        ejecutar_programa_async)
+    guardada = await asyncio.to_thread(grader._buscar_en_cache, cod_tarea, clave, nombre_archivo)
+    if guardada is not None:
+        return guardada
+
+    try:
+        reglas = await asyncio.to_thread(comparadores.preparar_tarea, config)
+    except ValueError as e:
+        return {"error": f"Comparador invalido en la tarea '{cod_tarea}': {e}"}
+
+    ruta_ejecutable, diagnostico = await asyncio.to_thread(
+        grader._preparar_ejecutable, ruta_py, grader.PRECOMPILAR)
+    if diagnostico:
+        calificacion = grader._rechazar_por_compilacion(cod_tarea, nombre_archivo, config,
+                                                        diagnostico)
+        await asyncio.to_thread(grader._guardar_en_cache, cod_tarea, clave, calificacion)
+        return calificacion
+
+    # gather() devuelve los resultados en el orden de los casos
+    inicio     = time.perf_counter()
+    resultados = await asyncio.gather(
+        *(_evaluar_caso_async(ruta_ejecutable, caso, config.get("limites"),
+                              reglas[caso["id"]])
+          for caso in config["casos"]))
+
+    calificacion = grader._armar_calificacion(cod_tarea, nombre_archivo, config,
+                                              list(resultados))
+    calificacion["segundos_calificacion"] = round(time.perf_counter() - inicio, 4)
+    await asyncio.to_thread(grader._guardar_en_cache, cod_tarea, clave, calificacion)
+    if grader.REGISTRAR_METRICAS:
+        await asyncio.to_thread(metricas.registrar_calificacion, calificacion, id_estudiante)
+    return calificacion
+
+
+async def calificar_lote_async(cod_tarea: str, rutas: list) -> list:
+    """
+    Califica muchas entregas de la misma tarea bajo un solo event loop.
+    Retorna las calificaciones en el mismo orden que 'rutas'.
+    """
+    return list(await asyncio.gather(
+        *(calificar_async(ruta, cod_tarea) for ruta in rutas)))
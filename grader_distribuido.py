@@ -0,0 +1,586 @@
+# =============================================================
+# grader_distribuido.py
+# Módulo — Calificación repartida entre varias máquinas
+# =============================================================
+# Responsabilidad: usar los núcleos de TODO el laboratorio, no
+# solo los de una máquina.
+#
+#   - Coordinador: tiene los casos de prueba y las entregas.
+#     Reparte cada entrega (bytes del .py + casos) a un trabajador.
+#   - Trabajador: recibe la entrega, ejecuta los casos con
+#     grader.ejecutar_programa y devuelve cada resultado apenas
+#     termina.
+#
+# Protocolo (TCP o socket Unix): cada mensaje es un JSON precedido
+# por su largo en 4 bytes.
+#
+#   trabajador → coordinador
+#     {"tipo": "hola", "nombre": ..., "hashes": [...]}   al conectarse
+#     {"tipo": "latido"}                                 cada INTERVALO_LATIDO_SEGUNDOS
+#     {"tipo": "falta", "hash": ...}                     no tiene ese archivo
+#     {"tipo": "aceptado", "id": ...}                    empieza a ejecutarla
+#     {"tipo": "resultado", "id": ..., "resultado": {...}}
+#     {"tipo": "no_compila", "id": ..., "diagnostico": ...}
+#     {"tipo": "terminado", "id": ...}
+#     {"tipo": "falla", "id": ..., "error": ...}        el pedido no se pudo ejecutar
+#
+#   coordinador → trabajador
+#     {"tipo": "trabajo", "id", "hash", "casos", "limites", "comparador",
+#      "politica", "tiempo_limite", "contenido" (base64, opcional)}
+#
+# Cada trabajador guarda las entregas por su SHA-256; el
+# coordinador solo manda "contenido" si ese trabajador no lo tiene.
+#
+# Si un trabajador deja de mandar latidos por más de
+# LATIDO_VENCIDO_SEGUNDOS (o se cae la conexión), su entrega
+# vuelve a la cola con los casos que le faltaban. Solo cuenta
+# como intento (MAX_REPARTOS) si el trabajador ya la había
+# aceptado: uno que se cayó mientras esperaba no gasta intentos.
+#
+# Un pedido que falla en el trabajador (contenido que no calza con
+# su hash, un error inesperado al ejecutarlo) no lo tumba: avisa
+# "falla" y sigue atendiendo. La entrega gasta un intento y vuelve
+# a la cola; tras MAX_REPARTOS se da por perdida con ese error.
+#
+# Los puntos por eficiencia (rendimiento.py) no se calculan aquí:
+# medir contra la referencia solo vale en una misma máquina. Por
+# eso sus calificaciones van al caché con una clave distinta de
+# la de grader.calificar.
+#
+# Los casos con entrada o salida en el almacén de blobs (ver
+# almacen_blobs.py) viajan solo con su referencia: los trabajadores
+# deben ver la misma carpeta casos_de_prueba/blobs (disco de red).
+#
+# Ojo: no hay autenticación. Usarlo solo dentro de la red del
+# laboratorio.
+#
+# Como ejecutarlo:
+#   python grader_distribuido.py coordinador TAREA-01 --puerto 5050
+#   python grader_distribuido.py trabajador --coordinador 192.168.0.10:5050
+#       (en cada máquina del laboratorio, o varias veces en la misma)
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - socket    → conexión TCP / Unix entre procesos
+#   - struct    → largo de cada mensaje
+#   - threading → un hilo por trabajador conectado, latidos
+#   - queue     → cola de entregas pendientes del coordinador
+#   - base64    → bytes del .py dentro del JSON
+# =============================================================
+
+import argparse
+import base64
+import functools
+import hashlib
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+import comparadores
+import grader
+import metricas
+from test_case_service import cargar_casos
+
+
+CARPETA_ENTREGAS = os.path.join("cache_grader", "entregas_remotas")
+
+INTERVALO_LATIDO_SEGUNDOS = 2
+LATIDO_VENCIDO_SEGUNDOS   = 10
+
+# Veces que una entrega se reparte antes de darla por imposible
+MAX_REPARTOS = 3
+
+_MAX_MENSAJE_BYTES = 64 * 1024 * 1024
+
+
+# ── Mensajes ──────────────────────────────────────────────────
+
+def _enviar(conexion: socket.socket, mensaje: dict):
+    datos = json.dumps(mensaje, ensure_ascii=False).encode("utf-8")
+    conexion.sendall(struct.pack("!I", len(datos)) + datos)
+
+
+def _leer_exacto(conexion: socket.socket, cantidad: int) -> bytes:
+    partes = bytearray()
+    while len(partes) < cantidad:
+        bloque = conexion.recv(cantidad - len(partes))
+        if not bloque:
+            return None
+        partes += bloque
+    return bytes(partes)
+
+
+def _recibir(conexion: socket.socket) -> dict:
+    """Siguiente mensaje, o None si el otro lado cerró la conexión."""
+    cabecera = _leer_exacto(conexion, 4)
+    if cabecera is None:
+        return None
+    largo = struct.unpack("!I", cabecera)[0]
+    if largo > _MAX_MENSAJE_BYTES:
+        raise ValueError(f"Mensaje demasiado grande ({largo} bytes)")
+    datos = _leer_exacto(conexion, largo)
+    if datos is None:
+        return None
+    return json.loads(datos.decode("utf-8"))
+
+
+def _abrir_socket(direccion):
+    """("host", puerto) → TCP; "ruta/al/socket" → socket Unix."""
+    if isinstance(direccion, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+def leer_direccion(texto: str):
+    """"host:puerto" → ("host", puerto); cualquier otra cosa es un socket Unix."""
+    host, separador, puerto = texto.rpartition(":")
+    if separador and puerto.isdigit():
+        return (host or "127.0.0.1", int(puerto))
+    return texto
+
+
+# ── Trabajador ────────────────────────────────────────────────
+
+def _ruta_entrega(hash_contenido: str) -> str:
+    return os.path.join(CARPETA_ENTREGAS, f"{hash_contenido}.py")
+
+
+def _hashes_guardados() -> list:
+    if not os.path.isdir(CARPETA_ENTREGAS):
+        return []
+    return [nombre[:-len(".py")] for nombre in os.listdir(CARPETA_ENTREGAS)
+            if nombre.endswith(".py")]
+
+
+def _guardar_entrega(pedido: dict) -> str:
+    """
+    Retorna la ruta local de la entrega del pedido, guardándola si
+    vino su contenido. None si no la tenemos y no vino.
+    """
+    ruta = _ruta_entrega(pedido["hash"])
+    if "contenido" not in pedido:
+        return ruta if os.path.isfile(ruta) else None
+
+    contenido = base64.b64decode(pedido["contenido"])
+    if hashlib.sha256(contenido).hexdigest() != pedido["hash"]:
+        raise ValueError("El contenido recibido no coincide con su hash")
+    os.makedirs(CARPETA_ENTREGAS, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def _ejecutar_pedido(pedido: dict, ruta_py: str, enviar):
+    """Ejecuta los casos del pedido y manda cada resultado al terminar."""
+    ruta_ejecutable, diagnostico = grader._preparar_ejecutable(ruta_py, grader.PRECOMPILAR)
+    if diagnostico:
+        enviar({"tipo": "no_compila", "id": pedido["id"], "diagnostico": diagnostico})
+        return
+
+    enviados = set()
+
+    def al_terminar_caso(caso, resultado):
+        enviados.add(caso["id"])
+        enviar({"tipo": "resultado", "id": pedido["id"], "resultado": resultado})
+
+    # El tiempo límite es el del coordinador, sin tocar el global de grader
+    ejecutor = functools.partial(grader.ejecutar_programa,
+                                 tiempo_limite=pedido["tiempo_limite"])
+    casos  = pedido["casos"]
+    reglas = comparadores.preparar_tarea({"casos": casos,
+                                          "comparador": pedido.get("comparador")})
+    resultados = grader._ejecutar_casos(
+        ruta_ejecutable, casos, ejecutor,
+        max(1, min(grader.TRABAJADORES_POR_DEFECTO, len(casos) or 1)),
+        pedido["politica"], pedido["limites"], None, al_terminar_caso, reglas)
+
+    # Los omitidos por una política no pasan por al_terminar_caso
+    for resultado in resultados:
+        if resultado["caso_id"] not in enviados:
+            enviar({"tipo": "resultado", "id": pedido["id"], "resultado": resultado})
+
+
+def _ejecutar_con_latidos(pedido: dict, ruta_py: str, enviar):
+    """_ejecutar_pedido, con un hilo que avisa que seguimos vivos."""
+    listo = threading.Event()
+
+    def latir():
+        while not listo.wait(INTERVALO_LATIDO_SEGUNDOS):
+            try:
+                enviar({"tipo": "latido"})
+            except OSError:
+                return
+
+    hilo = threading.Thread(target=latir, daemon=True)
+    hilo.start()
+    try:
+        _ejecutar_pedido(pedido, ruta_py, enviar)
+    finally:
+        listo.set()
+        hilo.join()
+
+
+def ejecutar_trabajador(direccion, nombre: str = None):
+    """
+    Se conecta al coordinador y ejecuta sus pedidos hasta que cierre
+    la conexión.
+
+    Parámetros:
+        direccion: ("host", puerto) o ruta de un socket Unix
+        nombre (str): cómo se identifica. None → "maquina:pid"
+    """
+    nombre   = nombre or f"{socket.gethostname()}:{os.getpid()}"
+    conexion = _abrir_socket(direccion)
+    conexion.connect(direccion)
+    candado  = threading.Lock()
+
+    def enviar(mensaje: dict):
+        with candado:
+            _enviar(conexion, mensaje)
+
+    enviar({"tipo": "hola", "nombre": nombre, "hashes": _hashes_guardados()})
+    try:
+        while True:
+            pedido = _recibir(conexion)
+            if pedido is None:
+                return
+            if pedido.get("tipo") != "trabajo":
+                continue
+
+            try:
+                ruta_py = _guardar_entrega(pedido)
+                if ruta_py is None:
+                    enviar({"tipo": "falta", "hash": pedido["hash"]})
+                    continue
+                enviar({"tipo": "aceptado", "id": pedido["id"]})
+                _ejecutar_con_latidos(pedido, ruta_py, enviar)
+            except (ConnectionError, BrokenPipeError):
+                raise
+            except Exception as e:
+                # Un pedido malo no debe tumbar al trabajador: se avisa y se sigue
+                enviar({"tipo": "falla", "id": pedido["id"],
+                        "error": f"{type(e).__name__}: {e}"})
+                continue
+            enviar({"tipo": "terminado", "id": pedido["id"]})
+    except (ConnectionError, BrokenPipeError):
+        return
+    finally:
+        conexion.close()
+
+
+# ── Coordinador ───────────────────────────────────────────────
+
+class Coordinador:
+    """
+    Reparte entregas entre los trabajadores conectados. Uso:
+
+        with Coordinador(("0.0.0.0", 5050)) as coordinador:
+            calificacion = coordinador.calificar("tarea.py", "TAREA-01")
+    """
+
+    def __init__(self, direccion=("127.0.0.1", 0)):
+        self._direccion_pedida = direccion
+        self._escucha      = None
+        self._pendientes   = queue.Queue()
+        self._conexiones   = {}          # socket → nombre del trabajador
+        self._candado      = threading.Lock()
+        self._detenido     = threading.Event()
+        self._siguiente_id = 0
+
+    # ── Ciclo de vida ──────────────────────────────────────────
+
+    def iniciar(self):
+        self._escucha = _abrir_socket(self._direccion_pedida)
+        if not isinstance(self._direccion_pedida, str):
+            self._escucha.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._escucha.bind(self._direccion_pedida)
+        self._escucha.listen()
+        threading.Thread(target=self._aceptar, daemon=True).start()
+        return self
+
+    def detener(self):
+        self._detenido.set()
+        if self._escucha is not None:
+            self._escucha.close()
+            self._escucha = None
+        with self._candado:
+            conexiones = list(self._conexiones)
+        for conexion in conexiones:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conexion.close()
+        if isinstance(self._direccion_pedida, str) and os.path.exists(self._direccion_pedida):
+            os.unlink(self._direccion_pedida)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    @property
+    def direccion(self):
+        """Dirección real (con el puerto elegido si se pidió el 0)."""
+        return self._escucha.getsockname()
+
+    def trabajadores_conectados(self) -> list:
+        with self._candado:
+            return list(self._conexiones.values())
+
+    # ── Atención de trabajadores ───────────────────────────────
+
+    def _aceptar(self):
+        while not self._detenido.is_set():
+            try:
+                conexion, _ = self._escucha.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def _atender(self, conexion: socket.socket):
+        """Hilo de UN trabajador: le pasa entregas mientras siga vivo."""
+        try:
+            conexion.settimeout(LATIDO_VENCIDO_SEGUNDOS)
+            hola = _recibir(conexion)
+            if hola is None or hola.get("tipo") != "hola":
+                conexion.close()
+                return
+        except (OSError, ValueError):
+            conexion.close()
+            return
+
+        hashes = set(hola.get("hashes", []))
+        with self._candado:
+            self._conexiones[conexion] = hola.get("nombre", "?")
+        try:
+            while not self._detenido.is_set():
+                try:
+                    trabajo = self._pendientes.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if not self._despachar(conexion, hola.get("nombre", "?"), trabajo, hashes):
+                    self._devolver(trabajo)
+                    return
+        finally:
+            with self._candado:
+                self._conexiones.pop(conexion, None)
+            conexion.close()
+
+    def _despachar(self, conexion: socket.socket, nombre: str, trabajo: dict,
+                   hashes: set) -> bool:
+        """
+        Manda la entrega a un trabajador y recoge sus resultados.
+        Retorna False si el trabajador murió antes de terminar. Si avisó
+        "falla", la entrega vuelve a la cola y el trabajador sigue (True).
+        El intento se cuenta en "repartos" cuando el trabajador la acepta.
+        """
+        aceptado   = False
+        pendientes = [c for c in trabajo["config"]["casos"]
+                      if c["id"] not in trabajo["resultados"]]
+        pedido = {
+            "tipo":          "trabajo",
+            "id":            trabajo["id"],
+            "hash":          trabajo["hash"],
+            "casos":         pendientes,
+            "limites":       trabajo["limites"],
+            "comparador":    trabajo["config"].get("comparador"),
+            "politica":      trabajo["politica"],
+            "tiempo_limite": grader.TIEMPO_LIMITE_SEGUNDOS,
+        }
+        try:
+            while True:
+                if trabajo["hash"] not in hashes:
+                    pedido["contenido"] = base64.b64encode(trabajo["contenido"]).decode("ascii")
+                _enviar(conexion, pedido)
+                hashes.add(trabajo["hash"])
+
+                while True:
+                    mensaje = _recibir(conexion)
+                    if mensaje is None:
+                        return False
+                    tipo = mensaje.get("tipo")
+                    if tipo == "falta":
+                        hashes.discard(mensaje["hash"])
+                        break   # volver a mandar, ahora con el contenido
+                    if not aceptado:
+                        # "aceptado", o cualquier otro aviso de que ya la ejecuta
+                        aceptado = True
+                        trabajo["repartos"] += 1
+                    if tipo == "resultado":
+                        resultado = mensaje["resultado"]
+                        trabajo["resultados"][resultado["caso_id"]] = resultado
+                    elif tipo == "no_compila":
+                        trabajo["diagnostico"] = mensaje["diagnostico"]
+                    elif tipo == "terminado":
+                        trabajo["trabajador"] = nombre
+                        self._terminar(trabajo)
+                        return True
+                    elif tipo == "falla":
+                        # Pudo no guardar el archivo: la próxima vez va con contenido
+                        hashes.discard(trabajo["hash"])
+                        trabajo["error_trabajador"] = mensaje.get("error")
+                        self._devolver(trabajo)
+                        return True
+                    # "latido": solo renueva el timeout del socket
+        except (OSError, ValueError):
+            return False
+
+    def _devolver(self, trabajo: dict):
+        """
+        El trabajador murió o avisó "falla": la entrega vuelve a la cola
+        (o se da por perdida, con el último error que informó un trabajador).
+        """
+        if trabajo["repartos"] >= MAX_REPARTOS:
+            error = (f"Ningun trabajador pudo calificar la entrega "
+                     f"({trabajo['repartos']} intentos)")
+            if trabajo.get("error_trabajador"):
+                error += f": {trabajo['error_trabajador']}"
+            trabajo["calificacion"] = {"error": error}
+            trabajo["listo"].set()
+        else:
+            self._pendientes.put(trabajo)
+
+    def _terminar(self, trabajo: dict):
+        config = trabajo["config"]
+        if trabajo["diagnostico"]:
+            calificacion = grader._rechazar_por_compilacion(
+                trabajo["cod_tarea"], trabajo["nombre_archivo"], config, trabajo["diagnostico"])
+        else:
+            resultados = [trabajo["resultados"][caso["id"]] for caso in config["casos"]]
+            calificacion = grader._armar_calificacion(
+                trabajo["cod_tarea"], trabajo["nombre_archivo"], config, resultados)
+            calificacion["segundos_calificacion"] = round(
+                time.perf_counter() - trabajo["inicio"], 4)
+            if grader.REGISTRAR_METRICAS:
+                metricas.registrar_calificacion(calificacion)
+        # Al caché va antes de anotar quién la calificó: eso es de esta vez
+        grader._guardar_en_cache(trabajo["cod_tarea"], trabajo["clave"], calificacion)
+        calificacion["trabajador"] = trabajo["trabajador"]
+        calificacion["repartos"]   = trabajo["repartos"]
+        trabajo["calificacion"] = calificacion
+        trabajo["listo"].set()
+
+    # ── API ────────────────────────────────────────────────────
+
+    def enviar(self, ruta_py: str, cod_tarea: str, usar_cache: bool = None) -> dict:
+        """
+        Encola una entrega sin esperar. Retorna el "trabajo" que se le
+        pasa a esperar(). Si la tarea no existe o ya estaba en el caché,
+        el trabajo sale ya terminado.
+        """
+        listo = threading.Event()
+        config = cargar_casos(cod_tarea)
+        if config is None:
+            listo.set()
+            return {"listo": listo,
+                    "calificacion": {"error": f"No existe configuracion para la tarea '{cod_tarea}'"}}
+
+        try:
+            comparadores.preparar_tarea(config)   # que el trabajador no reciba una tarea rota
+        except ValueError as e:
+            listo.set()
+            return {"listo": listo,
+                    "calificacion": {"error": f"Comparador invalido en la tarea '{cod_tarea}': {e}"}}
+
+        nombre_archivo = os.path.basename(ruta_py)
+        if usar_cache is None:
+            usar_cache = grader.USAR_CACHE
+        politica = dict(grader.POLITICA_POR_DEFECTO)
+        # Clave propia (ejecutor "Coordinador"): aquí no se suman los puntos
+        # de rendimiento, así que el resultado no le sirve a grader.calificar
+        clave    = (grader._clave_cache(ruta_py, config, Coordinador, politica)
+                    if usar_cache else None)
+        guardada = grader._buscar_en_cache(cod_tarea, clave, nombre_archivo)
+        if guardada is not None:
+            listo.set()
+            return {"listo": listo, "calificacion": guardada}
+
+        with open(ruta_py, "rb") as f:
+            contenido = f.read()
+        with self._candado:
+            self._siguiente_id += 1
+            id_trabajo = self._siguiente_id
+
+        trabajo = {
+            "id":             id_trabajo,
+            "cod_tarea":      cod_tarea,
+            "nombre_archivo": nombre_archivo,
+            "config":         config,
+            "limites":        config.get("limites"),
+            "politica":       politica,
+            "clave":          clave,
+            "contenido":      contenido,
+            "hash":           hashlib.sha256(contenido).hexdigest(),
+            "resultados":     {},
+            "diagnostico":    "",
+            "repartos":       0,
+            "trabajador":     None,
+            "inicio":         time.perf_counter(),
+            "calificacion":   None,
+            "listo":          listo,
+        }
+        self._pendientes.put(trabajo)
+        return trabajo
+
+    def esperar(self, trabajo: dict, timeout: float = None) -> dict:
+        """Calificación del trabajo, o None si no terminó dentro de timeout."""
+        if not trabajo["listo"].wait(timeout):
+            return None
+        return trabajo["calificacion"]
+
+    def calificar(self, ruta_py: str, cod_tarea: str, usar_cache: bool = None) -> dict:
+        """Igual que grader.calificar, pero lo ejecuta algún trabajador."""
+        return self.esperar(self.enviar(ruta_py, cod_tarea, usar_cache))
+
+    def calificar_lote(self, cod_tarea: str, rutas: list) -> list:
+        """Reparte todas las entregas a la vez; retorna en el orden de 'rutas'."""
+        trabajos = [self.enviar(ruta, cod_tarea) for ruta in rutas]
+        return [self.esperar(trabajo) for trabajo in trabajos]
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Calificacion repartida entre varias maquinas.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_coord = comandos.add_parser("coordinador", help="reparte las entregas de una tarea")
+    p_coord.add_argument("cod_tarea", help="codigo de la tarea, ej: TAREA-01")
+    p_coord.add_argument("--host", default="0.0.0.0")
+    p_coord.add_argument("--puerto", type=int, default=5050)
+
+    p_trab = comandos.add_parser("trabajador", help="ejecuta lo que mande el coordinador")
+    p_trab.add_argument("--coordinador", required=True,
+                        help="host:puerto o ruta de un socket Unix")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "trabajador":
+        ejecutar_trabajador(leer_direccion(args.coordinador))
+        return
+
+    from grader_lote import rutas_de_archivos_subidos
+    cod_tarea = args.cod_tarea.strip().upper().replace(" ", "-")
+    rutas     = rutas_de_archivos_subidos()
+    with Coordinador((args.host, args.puerto)) as coordinador:
+        print(f"  Coordinador escuchando en {args.host}:{coordinador.direccion[1]} "
+              f"({len(rutas)} entregas de {cod_tarea})")
+        inicio = time.perf_counter()
+        for ruta, calificacion in zip(rutas, coordinador.calificar_lote(cod_tarea, rutas)):
+            if "error" in calificacion:
+                print(f"  [ERROR] {os.path.basename(ruta)}: {calificacion['error']}")
+            else:
+                print(f"  {os.path.basename(ruta)}  {calificacion['porcentaje']}%  "
+                      f"({calificacion.get('trabajador') or 'cache'})")
+        print(f"  Tiempo total: {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
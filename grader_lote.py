@@ -0,0 +1,173 @@
+# =============================================================
+# grader_lote.py
+# Módulo — Calificación por lotes (todo un curso a la vez)
+# =============================================================
+# Responsabilidad: calificar muchas entregas de una misma tarea
+# usando todos los núcleos de la máquina.
+#
+# calificar() califica UN archivo. Aquí repartimos muchos archivos
+# entre varios procesos y vamos entregando cada resultado apenas
+# termina, sin esperar a los demás.
+#
+# Como ejecutarlo:
+#   python grader_lote.py TAREA-01
+#       → califica todos los .py de archivos_subidos
+#   python grader_lote.py TAREA-01 --transacciones TXN-aaa TXN-bbb
+#       → solo esas entregas (buscadas en registros_entregas)
+#   python grader_lote.py TAREA-01 --estudiante STU-01 --procesos 4
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - concurrent.futures → pool de procesos
+#   - argparse           → opciones de línea de comandos
+#   - time               → medir el rendimiento del lote
+# =============================================================
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import particiones
+from grader import calificar
+from transaction_service import (
+    CARPETA_ARCHIVOS, listar_registros, cargar_registro, ruta_archivo_subido,
+)
+
+
+def _calificar_con_tiempo(ruta_py: str, cod_tarea: str, trabajadores: int) -> dict:
+    """
+    Corre dentro de cada proceso del pool.
+    Igual que calificar(), pero anota cuánto tardó la entrega.
+    """
+    inicio = time.perf_counter()
+    calificacion = calificar(ruta_py, cod_tarea, trabajadores=trabajadores)
+    calificacion["ruta"]     = ruta_py
+    calificacion["segundos"] = round(time.perf_counter() - inicio, 3)
+    return calificacion
+
+
+def calificar_lote(cod_tarea: str, rutas: list, procesos: int = None,
+                   trabajadores_por_entrega: int = 1):
+    """
+    Califica muchas entregas de la misma tarea en paralelo.
+
+    Es un generador: entrega cada calificación apenas termina,
+    en el orden en que van terminando (no en el orden de 'rutas').
+
+    Parámetros:
+        cod_tarea                (str):  código de la tarea, ej: "TAREA-01"
+        rutas                    (list): rutas a los .py de los estudiantes
+        procesos                 (int):  procesos del pool. None → núcleos
+        trabajadores_por_entrega (int):  casos en paralelo dentro de cada
+                                         entrega (ver grader.calificar).
+                                         Con 1 el pool ya ocupa los núcleos.
+
+    Produce dicts con el mismo formato de calificar(), más:
+        - ruta     (str):   archivo calificado
+        - segundos (float): lo que tardó esa entrega
+    Si algo falla, el dict trae "error" (igual que calificar).
+    """
+    if not rutas:
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(_calificar_con_tiempo, ruta, cod_tarea,
+                        trabajadores_por_entrega): ruta
+            for ruta in rutas
+        }
+        for futuro in as_completed(futuros):
+            try:
+                yield futuro.result()
+            except Exception as e:
+                yield {"ruta": futuros[futuro], "error": str(e), "segundos": 0.0}
+
+
+def rutas_de_archivos_subidos() -> list:
+    """Todas las entregas guardadas en archivos_subidos."""
+    if not os.path.isdir(CARPETA_ARCHIVOS):
+        return []
+    return sorted(
+        (ruta for ruta in particiones.recorrer(CARPETA_ARCHIVOS)
+         if ruta.lower().endswith(".py")),
+        key=os.path.basename)
+
+
+def rutas_de_registros(ids_transaccion: list = None, id_estudiante: str = None) -> list:
+    """
+    Rutas de las entregas registradas en registros_entregas.
+
+    Parámetros:
+        ids_transaccion (list): solo estas transacciones (None → todas)
+        id_estudiante   (str):  solo las de este estudiante (None → todos)
+    """
+    if ids_transaccion:
+        registros = [cargar_registro(id_t) for id_t in ids_transaccion]
+        registros = [r for r in registros if r is not None]
+    else:
+        registros = listar_registros()
+
+    if id_estudiante:
+        registros = [r for r in registros if r["id_estudiante"] == id_estudiante]
+
+    rutas = [ruta_archivo_subido(r["id_transaccion"], r["nombre_archivo"])
+             for r in registros]
+    return [ruta for ruta in rutas if os.path.isfile(ruta)]
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Califica todas las entregas de una tarea en paralelo.")
+    parser.add_argument("cod_tarea", help="codigo de la tarea, ej: TAREA-01")
+    parser.add_argument("--transacciones", nargs="+", metavar="TXN",
+                        help="solo estas entregas de registros_entregas")
+    parser.add_argument("--estudiante",
+                        help="solo las entregas de este estudiante")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="procesos en paralelo (por defecto: nucleos)")
+    args = parser.parse_args(argumentos)
+
+    cod_tarea = args.cod_tarea.strip().upper().replace(" ", "-")
+    if args.transacciones or args.estudiante:
+        rutas = rutas_de_registros(args.transacciones, args.estudiante)
+    else:
+        rutas = rutas_de_archivos_subidos()
+
+    print()
+    print("=" * 60)
+    print(f"  CALIFICACION POR LOTE — {cod_tarea}  ({len(rutas)} entregas)")
+    print("=" * 60)
+
+    inicio     = time.perf_counter()
+    calificadas = 0
+    con_error   = 0
+    suma_porcentajes = 0.0
+
+    for numero, calificacion in enumerate(calificar_lote(cod_tarea, rutas, args.procesos), 1):
+        nombre = os.path.basename(calificacion["ruta"]) if "ruta" in calificacion else "?"
+        if "error" in calificacion:
+            con_error += 1
+            print(f"  [{numero:>4}/{len(rutas)}] [ERROR] {nombre}: {calificacion['error']}")
+            continue
+        calificadas      += 1
+        suma_porcentajes += calificacion["porcentaje"]
+        print(f"  [{numero:>4}/{len(rutas)}] {nombre}  "
+              f"{calificacion['nota_obtenida']:.2f} / {calificacion['nota_maxima']:.2f} pts "
+              f"({calificacion['porcentaje']}%)  {calificacion['segundos']:.2f}s")
+
+    segundos = time.perf_counter() - inicio
+    print("-" * 60)
+    print(f"  Entregas calificadas : {calificadas}")
+    print(f"  Con error            : {con_error}")
+    if calificadas:
+        print(f"  Promedio del curso   : {suma_porcentajes / calificadas:.1f}%")
+    print(f"  Tiempo total         : {segundos:.2f} s")
+    if segundos > 0:
+        print(f"  Rendimiento          : {(calificadas + con_error) / segundos:.1f} entregas/s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
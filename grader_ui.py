@@ -20,6 +20,43 @@ def pedir_cod_tarea() -> str:
         print("  El codigo no puede estar vacio.")
 
 
+def _texto_o_blob(resultado: dict, campo: str) -> str:
+    """El texto del caso, o "(archivo de N bytes)" si estaba en el almacén de blobs."""
+    referencia = resultado.get(f"{campo}_blob")
+    if referencia:
+        return f"(archivo de {referencia['bytes']} bytes)"
+    return resultado[campo]
+
+
+def _mostrar_diferencia(diferencia: dict):
+    """Muestra solo la ventana alrededor de la primera línea distinta."""
+    print(f"     DIFERENCIA: tu salida se separa en la linea {diferencia['linea']}")
+    for i, linea in enumerate(diferencia["comunes"], start=diferencia["desde"]):
+        print(f"       {i:>5} | {linea}")
+    for titulo, lineas in (("Esperado", diferencia["esperado"]),
+                           ("Obtenido", diferencia["obtenido"])):
+        print(f"     {titulo}:")
+        for i, linea in enumerate(lineas, start=diferencia["linea"]):
+            print(f"       {i:>5} | {linea}")
+        if not lineas:
+            print("             (aqui termina)")
+
+
+def _formatear_recursos(recursos: dict) -> str:
+    """
+    Convierte el dict de recursos en una linea corta, por ejemplo:
+    "0.031 s reloj | 0.024 s CPU | 9.8 MB"
+    CPU y memoria solo aparecen si el sistema los pudo medir.
+    """
+    partes = [f"{recursos['segundos_reales'] or 0:.3f} s reloj"]
+    if recursos.get("cpu_usuario") is not None:
+        cpu = recursos["cpu_usuario"] + (recursos.get("cpu_sistema") or 0.0)
+        partes.append(f"{cpu:.3f} s CPU")
+    if recursos.get("memoria_pico_kb") is not None:
+        partes.append(f"{recursos['memoria_pico_kb'] / 1024:.1f} MB")
+    return " | ".join(partes)
+
+
 def mostrar_resultados(calificacion: dict):
     """
     Muestra el resultado completo de la calificacion.
@@ -35,20 +72,56 @@ def mostrar_resultados(calificacion: dict):
     print(f"  Archivo  : {calificacion['nombre_archivo']}")
     print()
 
+    # Si el archivo no compila no hay nada que mostrar caso por caso:
+    # un solo diagnostico en vez del mismo error repetido en cada caso
+    if calificacion.get("error_compilacion"):
+        print("  [NO COMPILA] Ningun caso de prueba se ejecuto.")
+        print()
+        for linea in calificacion["error_compilacion"].splitlines():
+            print(f"     {linea}")
+        print()
+
     # Detalle caso por caso
-    for r in calificacion["resultados"]:
+    casos_a_mostrar = [] if calificacion.get("error_compilacion") else calificacion["resultados"]
+    for r in casos_a_mostrar:
+        # Casos que no se ejecutaron por una politica de corte
+        if r.get("omitido"):
+            print(f"  [OMITIDO] Caso #{r['caso_id']}  "
+            f"[{r['puntaje_obtenido']:.2f} / {r['puntaje_posible']:.2f} pts]")
+            print(f"     MOTIVO   : {r['motivo_omision']}")
+            print()
+            continue
+
         icono = "[OK]" if r["paso"] else "[FALLO]"
         print(f"  {icono} Caso #{r['caso_id']}  "
         f"[{r['puntaje_obtenido']:.2f} / {r['puntaje_posible']:.2f} pts]")
-        print(f"     Entrada  : {r['entrada']}")
-        print(f"     Esperado : {r['esperado']}")
-        print(f"     Obtenido : {r['obtenido'] if r['obtenido'] else '(sin salida)'}")
+        print(f"     Entrada  : {_texto_o_blob(r, 'entrada')}")
+        if r.get("diferencia"):
+            _mostrar_diferencia(r["diferencia"])
+        else:
+            print(f"     Esperado : {_texto_o_blob(r, 'esperado')}")
+            print(f"     Obtenido : {r['obtenido'] if r['obtenido'] else '(sin salida)'}")
 
         # Si hubo error mostramos el mensaje para que pueda corregirlo
         if r["error"]:
             print(f"     ERROR    : {r['error'][:80]}")
         if r["timeout"]:
             print("     TIEMPO   : Tu programa tardo demasiado (posible bucle infinito)")
+        if r.get("limite_excedido"):
+            print("     LIMITE   : Tu programa supero un limite de recursos de la tarea")
+        if r.get("truncado"):
+            print("     SALIDA   : Tu programa imprimio demasiado y se detuvo (salida recortada)")
+        if r.get("recursos"):
+            print(f"     RECURSOS : {_formatear_recursos(r['recursos'])}")
+        if r.get("rendimiento"):
+            rend = r["rendimiento"]
+            if rend["razon_cpu"] is None:
+                detalle = "no medido (el caso no paso)"
+            else:
+                detalle = (f"{rend['razon_cpu']:.2f}x CPU, {rend['razon_memoria']:.2f}x memoria "
+                           f"de la solucion de referencia")
+            print(f"     EFICIENCIA: {detalle}  "
+                  f"[{rend['puntaje_obtenido']:.2f} / {rend['puntaje_posible']:.2f} pts]")
         print()
 
     # Nota final
@@ -63,6 +136,8 @@ def mostrar_resultados(calificacion: dict):
 
     print(f"  NOTA FINAL : {nota:.2f} / {maxima:.2f} pts  ({porcent}%)")
     print(f"  [{barra}]")
+    if calificacion.get("recursos") and calificacion["recursos"]["casos_medidos"]:
+        print(f"  CONSUMO    : {_formatear_recursos(calificacion['recursos'])}")
     print()
 
     # Mensaje segun el resultado
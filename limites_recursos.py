@@ -0,0 +1,206 @@
+# =============================================================
+# limites_recursos.py
+# Módulo — Límites del sistema operativo para los programas
+# =============================================================
+# Responsabilidad: impedir que UNA entrega se coma la máquina y
+# deje sin recursos al resto de las calificaciones.
+#
+# El timeout solo mide tiempo de reloj. Un programa puede, antes
+# de que llegue, reservar toda la memoria, abrir miles de
+# archivos o crear procesos sin fin. Con resource.setrlimit el
+# sistema operativo corta esos abusos dentro del proceso hijo.
+#
+# El profesor define los límites de cada tarea en su JSON,
+# junto a los casos (casos_de_prueba/<TAREA>.json):
+#
+#     "limites": {
+#         "cpu_segundos":      2,
+#         "memoria_mb":        256,
+#         "archivos_abiertos": 32,
+#         "procesos":          1,
+#         "tamano_archivo_mb": 1
+#     }
+#
+# Cualquier límite que falte o valga null no se aplica.
+# Solo funciona en Linux/macOS; en Windows no existe "resource"
+# y los límites se ignoran.
+#
+# Ojo con "procesos" (RLIMIT_NPROC): el sistema cuenta TODOS los
+# procesos del usuario, no solo los de esta entrega. Si el grader
+# corre varios casos a la vez con el mismo usuario, un programa
+# que no crea ningún proceso puede fallar igual. Por eso viene
+# apagado; usarlo solo si el grader corre con un usuario propio y
+# con pocos casos a la vez.
+#
+# Los límites se aplican con comando(): un envoltorio corto
+# (python -c) fija los setrlimit y hace os.execvp() al programa.
+# No se usa preexec_fn de subprocess: ejecuta Python entre fork()
+# y exec() y no es seguro con los hilos que reparten los casos.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - resource → setrlimit, límites del proceso
+#   - json     → los límites viajan al envoltorio como argumento
+# =============================================================
+
+import json
+import re
+import signal
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+LIMITES_DISPONIBLES = resource is not None
+
+LIMITES_POR_DEFECTO = {
+    "cpu_segundos":      None,   # tiempo de CPU (no de reloj)
+    "memoria_mb":        None,   # espacio de direcciones del proceso
+    "archivos_abiertos": None,   # descriptores abiertos a la vez
+    "procesos":          None,   # procesos del usuario (ojo: cuenta TODOS los del usuario, ver arriba)
+    "tamano_archivo_mb": None,   # tamaño máximo de un archivo escrito
+}
+
+# Valores de "limite_excedido" en el resultado de un caso
+LIMITE_CPU       = "cpu"
+LIMITE_MEMORIA   = "memoria"
+LIMITE_ARCHIVOS  = "archivos_abiertos"
+LIMITE_PROCESOS  = "procesos"
+LIMITE_TAMANO    = "tamano_archivo"
+
+MENSAJES = {
+    LIMITE_CPU:      "Limite de tiempo de CPU excedido",
+    LIMITE_MEMORIA:  "Limite de memoria excedido",
+    LIMITE_ARCHIVOS: "Limite de archivos abiertos excedido",
+    LIMITE_PROCESOS: "Limite de procesos excedido",
+    LIMITE_TAMANO:   "Limite de tamano de archivo excedido",
+}
+
+
+def normalizar(limites: dict) -> dict:
+    """Completa con LIMITES_POR_DEFECTO las claves que falten."""
+    normalizados = dict(LIMITES_POR_DEFECTO)
+    for clave, valor in (limites or {}).items():
+        if clave in normalizados:
+            normalizados[clave] = valor
+    return normalizados
+
+
+def hay_limites(limites: dict) -> bool:
+    return any(valor is not None for valor in normalizar(limites).values())
+
+
+# Lo que corre "python -c" antes del programa: fija cada
+# (tipo, blando, duro) y se reemplaza por el comando real
+_ENVOLTORIO = """\
+import json, os, resource, sys
+for tipo, blando, duro in json.loads(sys.argv[1]):
+    resource.setrlimit(tipo, (blando, duro))
+os.execvp(sys.argv[2], sys.argv[2:])
+"""
+
+
+def _rlimits(limites: dict) -> list:
+    """Los límites como [(tipo de resource, blando, duro), ...]."""
+    limites = normalizar(limites)
+    mb = 1024 * 1024
+    fijados = []
+
+    def fijar(tipo, valor, holgura=0):
+        # El límite "duro" queda un poco por encima del "blando":
+        # al pasar el blando llega una señal que podemos reconocer
+        fijados.append((tipo, valor, valor + holgura))
+
+    if limites["cpu_segundos"] is not None:
+        fijar(resource.RLIMIT_CPU, int(limites["cpu_segundos"]), holgura=1)
+    if limites["memoria_mb"] is not None:
+        fijar(resource.RLIMIT_AS, int(limites["memoria_mb"] * mb))
+    if limites["archivos_abiertos"] is not None:
+        fijar(resource.RLIMIT_NOFILE, int(limites["archivos_abiertos"]))
+    if limites["procesos"] is not None:
+        fijar(resource.RLIMIT_NPROC, int(limites["procesos"]))
+    if limites["tamano_archivo_mb"] is not None:
+        fijar(resource.RLIMIT_FSIZE, int(limites["tamano_archivo_mb"] * mb))
+    return fijados
+
+
+def aplicar(limites: dict):
+    """
+    Aplica los límites al proceso ACTUAL.
+    Lo usa fork_server dentro del hijo, justo después del fork
+    (su servidor no tiene otros hilos que puedan molestar).
+    """
+    if resource is None:
+        return
+    for tipo, blando, duro in _rlimits(limites):
+        resource.setrlimit(tipo, (blando, duro))
+
+
+def comando(argumentos: list, limites: dict, interprete: str) -> list:
+    """
+    El comando 'argumentos' envuelto para que corra con los límites:
+    'interprete' fija los setrlimit y hace exec del comando real.
+    Sin límites (o sin resource) retorna 'argumentos' tal cual, así
+    no se paga un segundo arranque de Python.
+    """
+    if resource is None or not hay_limites(limites):
+        return argumentos
+    return [interprete, "-c", _ENVOLTORIO, json.dumps(_rlimits(limites)), *argumentos]
+
+
+# Mensajes de Python cuando el sistema le niega un recurso
+_SIN_MEMORIA  = re.compile(r"MemoryError|Cannot allocate memory|Could not allocate")
+_SIN_ARCHIVOS = re.compile(r"Too many open files")
+_SIN_PROCESOS = re.compile(r"BlockingIOError|Resource temporarily unavailable")
+_SIN_TAMANO   = re.compile(r"File too large")
+
+
+def detectar(limites: dict, returncode: int, error: str, recursos: dict = None) -> str:
+    """
+    Decide si el programa murió por alguno de los límites configurados.
+
+    Parámetros:
+        limites    (dict): límites de la tarea
+        returncode (int):  negativo = murió por esa señal
+        error      (str):  stderr del programa
+        recursos   (dict): consumo medido (para reconocer el corte de CPU)
+
+    Retorna:
+        str:  LIMITE_CPU, LIMITE_MEMORIA, ... si se excedió uno
+        None: si terminó por otra razón
+    """
+    limites = normalizar(limites)
+    if returncode == 0 or not hay_limites(limites):
+        return None
+
+    if limites["cpu_segundos"] is not None:
+        if returncode == -signal.SIGXCPU:
+            return LIMITE_CPU
+        cpu = ((recursos or {}).get("cpu_usuario") or 0.0) + ((recursos or {}).get("cpu_sistema") or 0.0)
+        if returncode == -signal.SIGKILL and cpu >= limites["cpu_segundos"]:
+            return LIMITE_CPU
+
+    if limites["tamano_archivo_mb"] is not None:
+        if returncode == -getattr(signal, "SIGXFSZ", 0) or _SIN_TAMANO.search(error):
+            return LIMITE_TAMANO
+    if limites["memoria_mb"] is not None and _SIN_MEMORIA.search(error):
+        return LIMITE_MEMORIA
+    if limites["archivos_abiertos"] is not None and _SIN_ARCHIVOS.search(error):
+        return LIMITE_ARCHIVOS
+    if limites["procesos"] is not None and _SIN_PROCESOS.search(error):
+        return LIMITE_PROCESOS
+    return None
+
+
+def describir(limite_excedido: str, limites: dict) -> str:
+    """Mensaje legible para el estudiante, con el valor del límite."""
+    limites = normalizar(limites)
+    valores = {
+        LIMITE_CPU:      f"{limites['cpu_segundos']} s",
+        LIMITE_MEMORIA:  f"{limites['memoria_mb']} MB",
+        LIMITE_ARCHIVOS: f"{limites['archivos_abiertos']} archivos",
+        LIMITE_PROCESOS: f"{limites['procesos']} procesos",
+        LIMITE_TAMANO:   f"{limites['tamano_archivo_mb']} MB",
+    }
+    return f"{MENSAJES[limite_excedido]} ({valores[limite_excedido]})."
@@ -9,9 +9,10 @@ from upload_ui import (
     mostrar_bienvenida, mostrar_separador, pedir_id_estudiante,
     mostrar_error, mostrar_exito, preguntar_continuar,
 )
-from file_validator import validar_archivo
+from file_validator import validar_extension
 from transaction_service import (
-    generar_id_transaccion, guardar_registro, guardar_archivo_fisico,
+    generar_id_transaccion, guardar_registro, guardar_archivo,
+    guardar_calificacion, nombre_sin_prefijo,
 )
 from file_browser import elegir_archivo
 from test_case_ui import ejecutar_panel_profesor
@@ -47,53 +48,58 @@ def flujo_estudiante():
         ruta = elegir_archivo()
 
         # Paso 2: validar y registrar la entrega
-        archivo_registrado = procesar_entrega(id_estudiante, ruta)
+        id_transaccion = procesar_entrega(id_estudiante, ruta)
 
         # Paso 3: si la entrega fue válida, preguntar si quiere calificar
-        if archivo_registrado:
+        if id_transaccion:
             print()
             respuesta = input("  ¿Quieres calificar este archivo ahora? (s/n): ").strip().lower()
             if respuesta == "s":
                 cod_tarea   = pedir_cod_tarea()
-                calificacion = calificar(ruta, cod_tarea)
+                calificacion = calificar(ruta, cod_tarea, id_estudiante=id_estudiante)
 
                 if "error" in calificacion:
                     mostrar_error(calificacion["error"])
                 else:
+                    guardar_calificacion(id_transaccion, calificacion)
                     mostrar_resultados(calificacion)
 
         if not preguntar_continuar():
             break
 
 
-def procesar_entrega(id_estudiante: str, ruta_archivo: str) -> bool:
+def procesar_entrega(id_estudiante: str, ruta_archivo: str) -> str:
     """
     Valida y registra la entrega.
-    Retorna True si fue exitosa, False si falló.
+    Retorna el id de la transacción si fue exitosa, None si falló.
+
+    El archivo no se lee a memoria: guardar_archivo lo copia desde su
+    ruta y valida el tamaño en la misma pasada.
     """
     mostrar_separador()
 
-    nombre_archivo = os.path.basename(ruta_archivo)
-    tamano_bytes   = os.path.getsize(ruta_archivo)
+    nombre_archivo = nombre_sin_prefijo(os.path.basename(ruta_archivo))
 
-    es_valido, mensaje_error = validar_archivo(nombre_archivo, tamano_bytes)
+    es_valido, mensaje_error = validar_extension(nombre_archivo)
     if not es_valido:
         mostrar_error(mensaje_error)
-        return False
-
-    with open(ruta_archivo, "rb") as f:
-        contenido = f.read()
+        return None
 
     id_transaccion = generar_id_transaccion()
-    guardar_archivo_fisico(id_transaccion, nombre_archivo, contenido)
+    try:
+        guardado = guardar_archivo(id_transaccion, nombre_archivo, ruta_archivo)
+    except ValueError as e:
+        mostrar_error(str(e))
+        return None
     registro = guardar_registro(
         id_transaccion=id_transaccion,
         nombre_archivo=nombre_archivo,
-        tamano_bytes=tamano_bytes,
+        tamano_bytes=guardado["bytes"],
         id_estudiante=id_estudiante,
+        hash_archivo=guardado["sha256"],
     )
     mostrar_exito(registro)
-    return True
+    return id_transaccion
 
 
 # ── Flujo del profesor ────────────────────────────────────────
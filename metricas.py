@@ -0,0 +1,177 @@
+# =============================================================
+# metricas.py
+# Módulo — Registro de consumo de recursos de cada calificación
+# =============================================================
+# Responsabilidad: guardar cuánto tiempo y memoria gastó cada
+# calificación, para después encontrar qué tareas o qué entregas
+# se están comiendo la capacidad del grader.
+#
+# Cada calificación ejecutada agrega UNA línea JSON al archivo
+# metricas_calificacion/metricas.jsonl (una línea por entrega,
+# con el detalle de cada caso). Agregar al final es barato y
+# varios procesos pueden hacerlo a la vez: cada línea sale en un
+# solo os.write() sobre un descriptor O_APPEND (igual que
+# registro_segmentado.py), así no se mezcla con la de otro.
+#
+# Si quien califica conoce al estudiante (cola_trabajos, main)
+# la línea lleva su id_estudiante: así se ve también qué
+# estudiantes se llevan la capacidad del grader.
+#
+# Como ver un resumen:
+#   python metricas.py
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - json     → una línea JSON por calificación
+#   - datetime → fecha y hora de cada registro
+# =============================================================
+
+import json
+import os
+from datetime import datetime
+
+
+CARPETA_METRICAS = "metricas_calificacion"
+ARCHIVO_METRICAS = "metricas.jsonl"
+
+
+def _ruta_metricas() -> str:
+    return os.path.join(CARPETA_METRICAS, ARCHIVO_METRICAS)
+
+
+def registrar_calificacion(calificacion: dict, id_estudiante: str = None):
+    """
+    Agrega al archivo de métricas el consumo de una calificación.
+    Solo se guardan tiempos y memoria, no las salidas del estudiante.
+    """
+    os.makedirs(CARPETA_METRICAS, exist_ok=True)
+
+    registro = {
+        "fecha_hora":     datetime.now().isoformat(),
+        "cod_tarea":      calificacion["cod_tarea"],
+        "id_estudiante":  id_estudiante,
+        "nombre_archivo": calificacion["nombre_archivo"],
+        "porcentaje":     calificacion["porcentaje"],
+        "segundos_calificacion": calificacion.get("segundos_calificacion"),
+        "recursos":       calificacion.get("recursos"),
+        "casos": [
+            {
+                "caso_id":  r["caso_id"],
+                "timeout":  r["timeout"],
+                "omitido":  r.get("omitido", False),
+                "recursos": r.get("recursos"),
+            }
+            for r in calificacion["resultados"]
+        ],
+    }
+
+    # Un solo os.write() con O_APPEND: la línea entera va al final,
+    # sin mezclarse con las de otros procesos (open("a") con buffer
+    # puede partirla en varias escrituras)
+    linea = (json.dumps(registro, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(_ruta_metricas(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, linea)
+    finally:
+        os.close(fd)
+
+
+def cargar_metricas(cod_tarea: str = None) -> list:
+    """
+    Lee todos los registros de métricas (opcionalmente solo de una tarea).
+    Las líneas dañadas (por ejemplo, un corte de luz a mitad de escritura)
+    se ignoran.
+    """
+    ruta = _ruta_metricas()
+    if not os.path.isfile(ruta):
+        return []
+
+    registros = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+            if cod_tarea is None or registro["cod_tarea"] == cod_tarea:
+                registros.append(registro)
+    return registros
+
+
+def _resumir(registros: list, campo: str) -> dict:
+    """Suma el consumo de los registros agrupados por 'campo' (sin él, se saltan)."""
+    resumen = {}
+    for registro in registros:
+        if registro.get(campo) is None:
+            continue
+        recursos = registro.get("recursos") or {}
+        grupo = resumen.setdefault(registro[campo], {
+            "calificaciones":  0,
+            "segundos_reales": 0.0,
+            "cpu_total":       0.0,
+            "memoria_pico_kb": 0,
+        })
+        grupo["calificaciones"]  += 1
+        grupo["segundos_reales"] += recursos.get("segundos_reales") or 0.0
+        grupo["cpu_total"]       += ((recursos.get("cpu_usuario") or 0.0)
+                                     + (recursos.get("cpu_sistema") or 0.0))
+        grupo["memoria_pico_kb"]  = max(grupo["memoria_pico_kb"],
+                                        recursos.get("memoria_pico_kb") or 0)
+    return resumen
+
+
+def resumen_por_tarea(registros: list) -> dict:
+    """
+    Agrupa los registros por tarea.
+
+    Retorna dict cod_tarea → {
+        calificaciones, segundos_reales, cpu_total, memoria_pico_kb
+    }
+    """
+    return _resumir(registros, "cod_tarea")
+
+
+def resumen_por_estudiante(registros: list) -> dict:
+    """
+    Igual que resumen_por_tarea, pero por id_estudiante. Los registros
+    sin estudiante (calificaciones sueltas de un archivo) no cuentan.
+    """
+    return _resumir(registros, "id_estudiante")
+
+
+def main():
+    registros = cargar_metricas()
+    print()
+    print("=" * 72)
+    print(f"  CONSUMO DEL GRADER  ({len(registros)} calificaciones registradas)")
+    print("=" * 72)
+    print(f"  {'Tarea':<20} {'Calif.':>7} {'Reloj (s)':>11} {'CPU (s)':>10} {'Mem. max':>12}")
+    print("  " + "-" * 64)
+
+    resumen = resumen_por_tarea(registros)
+    for cod, datos in sorted(resumen.items(), key=lambda par: -par[1]["cpu_total"]):
+        print(f"  {cod:<20} {datos['calificaciones']:>7} {datos['segundos_reales']:>11.2f} "
+              f"{datos['cpu_total']:>10.2f} {datos['memoria_pico_kb'] / 1024:>9.1f} MB")
+
+    por_estudiante = sorted(resumen_por_estudiante(registros).items(),
+                            key=lambda par: -par[1]["cpu_total"])[:5]
+    if por_estudiante:
+        print()
+        print("  Estudiantes que mas CPU consumen:")
+        for id_estudiante, datos in por_estudiante:
+            print(f"    {id_estudiante:<20} {datos['calificaciones']:>5} calif. "
+                  f"{datos['cpu_total']:>10.2f} s de CPU")
+
+    # Las entregas más caras son las primeras que conviene revisar
+    caras = sorted(registros,
+                   key=lambda r: -((r.get("recursos") or {}).get("segundos_reales") or 0))[:5]
+    if caras:
+        print()
+        print("  Entregas mas costosas (tiempo de reloj):")
+        for r in caras:
+            print(f"    {r['cod_tarea']:<16} {r['nombre_archivo'][:40]:<40} "
+                  f"{(r.get('recursos') or {}).get('segundos_reales') or 0:.2f} s")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
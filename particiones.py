@@ -0,0 +1,251 @@
+# =============================================================
+# particiones.py
+# Módulo — Carpetas repartidas en subcarpetas (fan-out)
+# =============================================================
+# Responsabilidad: que archivos_subidos y registros_entregas no
+# sean una sola carpeta con cientos de miles de archivos (listar,
+# buscar y respaldar una carpeta así se vuelve lento).
+#
+# Cada archivo va en subcarpetas tomadas de los primeros dígitos
+# hexadecimales de su clave (el id de la transacción o el hash
+# del contenido). Con NIVELES = 2 y ANCHO = 2:
+#
+#     archivos_subidos/TXN-a3f8c1d2-..._tarea.py
+#         → archivos_subidos/a3/f8/TXN-a3f8c1d2-..._tarea.py
+#     archivos_subidos/.blobs/3f5a9b...
+#         → archivos_subidos/.blobs/3f/5a/3f5a9b...
+#     registros_entregas/TXN-a3f8c1d2-....json   (almacén "archivos")
+#         → registros_entregas/a3/f8/TXN-a3f8c1d2-....json
+#
+# 2 niveles de 2 dígitos son 65.536 carpetas: con un millón de
+# entregas quedan ~15 archivos por carpeta. NIVELES = 0 es la
+# carpeta plana de antes.
+#
+# Todas las rutas se buscan con resolver(): primero en la
+# distribución actual y, si no está, en las demás profundidades
+# (por ejemplo, la carpeta plana de antes). Así se puede migrar
+# con el sistema funcionando:
+#   - rebalancear() mueve cada archivo con un enlace nuevo y
+#     recién después borra el viejo: en todo momento el archivo
+#     está en al menos uno de los dos lugares
+#   - si resolver() no lo encuentra en ninguno, mira otra vez
+#     (pudo moverse justo entre las dos miradas)
+#   - rebalancear() borra las subcarpetas que quedan vacías; las
+#     escrituras pasan por crear(), que vuelve a crear la subcarpeta
+#     y reintenta si se la borraron justo antes de escribir
+#
+# Un archivo nuevo se escribe con ruta() (ya sabe dónde va) y no
+# con resolver(): buscarlo en las demás profundidades solo cuesta
+# varios stat() que fallan.
+#
+# Como ejecutarlo (reparte lo que esté en otro lugar):
+#   python particiones.py
+#   python particiones.py --niveles 3
+#       → cambiar también NIVELES aquí; mientras tanto resolver()
+#         encuentra los archivos en cualquiera de las dos
+#   Cambiar ANCHO sí requiere detener las entregas mientras corre.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - hashlib  → clave para nombres que no son hexadecimales
+#   - re       → reconocer las subcarpetas de partición
+#   - argparse → opciones de la migración
+# =============================================================
+
+import argparse
+import hashlib
+import os
+import re
+
+
+NIVELES = 2
+ANCHO   = 2
+
+# Profundidades donde resolver() busca un archivo que no está en su lugar
+MAX_NIVELES = 4
+
+# Veces que crear() reintenta si rebalancear() borró la subcarpeta
+_INTENTOS_CREAR = 5
+
+_HEXADECIMAL = re.compile(r"^[0-9a-f]+$")
+
+
+def clave_hex(clave: str) -> str:
+    """
+    Dígitos hexadecimales de una clave: los del UUID de "TXN-uuid4", el
+    hash tal cual, o el SHA-256 de la clave si no es hexadecimal.
+    """
+    limpia = clave.lower()
+    if limpia.startswith("txn-"):
+        limpia = limpia[len("txn-"):]
+    limpia = limpia.replace("-", "")
+    if len(limpia) >= MAX_NIVELES * ANCHO and _HEXADECIMAL.match(limpia):
+        return limpia
+    return hashlib.sha256(clave.encode("utf-8")).hexdigest()
+
+
+def ruta(carpeta: str, clave: str, nombre: str, niveles: int = None) -> str:
+    """Dónde va 'nombre' según la distribución (sin mirar el disco)."""
+    niveles = NIVELES if niveles is None else niveles
+    digitos = clave_hex(clave)
+    partes  = [digitos[i * ANCHO:(i + 1) * ANCHO] for i in range(niveles)]
+    return os.path.join(carpeta, *partes, nombre)
+
+
+def resolver(carpeta: str, clave: str, nombre: str) -> str:
+    """
+    Ruta de un archivo existente, esté en la distribución actual o en
+    otra (aún sin migrar). Si no existe, la ruta donde debe crearse.
+    """
+    actual = ruta(carpeta, clave, nombre)
+    otras  = [n for n in range(MAX_NIVELES + 1) if n != NIVELES]
+    for _ in range(2):   # segunda mirada: pudo moverse entre una y otra
+        if os.path.exists(actual):
+            return actual
+        for niveles in otras:
+            candidata = ruta(carpeta, clave, nombre, niveles)
+            if os.path.exists(candidata):
+                return candidata
+    return actual
+
+
+def preparar(ruta_archivo: str) -> str:
+    """Crea la subcarpeta de una ruta (para escribir en ella). Retorna la ruta."""
+    os.makedirs(os.path.dirname(ruta_archivo) or ".", exist_ok=True)
+    return ruta_archivo
+
+
+def crear(ruta_archivo: str, escribir):
+    """
+    Crea la subcarpeta de 'ruta_archivo' y llama a escribir(ruta_archivo).
+    Si rebalancear() borró la subcarpeta entre una cosa y la otra (estaba
+    vacía), escribir lanza FileNotFoundError: se vuelve a crear y se
+    reintenta. Retorna lo que retorne escribir.
+    """
+    for intento in range(_INTENTOS_CREAR):
+        preparar(ruta_archivo)
+        try:
+            return escribir(ruta_archivo)
+        except FileNotFoundError:
+            if intento == _INTENTOS_CREAR - 1:
+                raise
+
+
+def _es_particion(nombre: str) -> bool:
+    return len(nombre) <= 8 and bool(_HEXADECIMAL.match(nombre))
+
+
+def recorrer(carpeta: str):
+    """
+    Generador: rutas de todos los archivos de la carpeta y de sus
+    subcarpetas de partición (sin los ocultos, como .blobs).
+    """
+    try:
+        entradas = list(os.scandir(carpeta))
+    except FileNotFoundError:
+        return
+    for entrada in entradas:
+        if entrada.name.startswith("."):
+            continue
+        if entrada.is_dir(follow_symlinks=False):
+            if _es_particion(entrada.name):
+                yield from recorrer(entrada.path)
+        elif entrada.is_file(follow_symlinks=False):
+            yield entrada.path
+
+
+def _mover(origen: str, destino: str):
+    """Enlace nuevo primero, borrar el viejo después: nunca desaparece."""
+    preparar(destino)
+    try:
+        os.link(origen, destino)
+    except FileExistsError:
+        if not os.path.samefile(origen, destino):
+            raise
+    except OSError:
+        # Sin enlaces duros: rename también es atómico en el mismo disco
+        os.replace(origen, destino)
+        return
+    os.remove(origen)
+
+
+def _borrar_vacias(carpeta: str):
+    for actual, subcarpetas, archivos in os.walk(carpeta, topdown=False):
+        if actual != carpeta and _es_particion(os.path.basename(actual)):
+            try:
+                os.rmdir(actual)
+            except OSError:
+                pass   # no está vacía
+
+
+def rebalancear(carpeta: str, clave_de) -> dict:
+    """
+    Mueve a la distribución actual los archivos que estén en otra.
+
+    Parámetros:
+        carpeta  (str):  carpeta a ordenar
+        clave_de (func): nombre del archivo → su clave (None: no se mueve)
+
+    Retorna:
+        dict con revisados y movidos
+    """
+    resumen = {"revisados": 0, "movidos": 0}
+    for origen in list(recorrer(carpeta)):
+        nombre = os.path.basename(origen)
+        clave  = clave_de(nombre)
+        if clave is None:
+            continue
+        resumen["revisados"] += 1
+        destino = ruta(carpeta, clave, nombre)
+        if os.path.normpath(origen) != os.path.normpath(destino):
+            _mover(origen, destino)
+            resumen["movidos"] += 1
+    _borrar_vacias(carpeta)
+    return resumen
+
+
+def clave_de_entrega(nombre: str) -> str:
+    """"TXN-..._tarea.py" → "TXN-..."."""
+    if nombre.startswith("TXN-") and "_" in nombre:
+        return nombre.split("_", 1)[0]
+    return None
+
+
+def clave_de_registro(nombre: str) -> str:
+    """"TXN-....json" → "TXN-..."."""
+    if nombre.startswith("TXN-") and nombre.endswith(".json"):
+        return nombre[:-len(".json")]
+    return None
+
+
+def clave_de_blob(nombre: str) -> str:
+    return nombre if len(nombre) == 64 and _HEXADECIMAL.match(nombre) else None
+
+
+def main(argumentos: list = None):
+    import almacen_entregas
+    import transaction_service
+
+    global NIVELES, ANCHO
+    parser = argparse.ArgumentParser(
+        description="Reparte archivos_subidos y registros_entregas en subcarpetas.")
+    parser.add_argument("--niveles", type=int, default=NIVELES,
+                        help=f"niveles de subcarpetas (por defecto: {NIVELES})")
+    parser.add_argument("--ancho", type=int, default=ANCHO,
+                        help=f"digitos por nivel (por defecto: {ANCHO})")
+    args = parser.parse_args(argumentos)
+    NIVELES, ANCHO = args.niveles, args.ancho
+
+    carpetas = [
+        (transaction_service.CARPETA_ARCHIVOS, clave_de_entrega),
+        (os.path.join(transaction_service.CARPETA_ARCHIVOS, almacen_entregas.CARPETA_BLOBS),
+         clave_de_blob),
+        (transaction_service.CARPETA_REGISTROS, clave_de_registro),
+    ]
+    for carpeta, clave_de in carpetas:
+        resumen = rebalancear(carpeta, clave_de)
+        print(f"  {carpeta:<28} revisados: {resumen['revisados']:>7}   "
+              f"movidos: {resumen['movidos']:>7}")
+
+
+if __name__ == "__main__":
+    main()
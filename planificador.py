@@ -0,0 +1,90 @@
+# =============================================================
+# planificador.py
+# Módulo — Reparto justo de la cola de calificaciones
+# =============================================================
+# Responsabilidad: decidir QUÉ trabajo de cola_trabajos se
+# califica a continuación.
+#
+# Tomar siempre el más antiguo es injusto en la noche de entrega:
+#   - un estudiante que reenvía 50 veces deja esperando a todos
+#   - una tarea con entradas enormes ocupa todos los trabajadores
+#
+# Reglas, en este orden:
+#   1. Carril: las entregas finales van antes que las de práctica
+#   2. Tope por tarea: una tarea no puede tener más de
+#      "max_concurrencia" trabajos ejecutándose a la vez
+#      (guardar_casos(..., max_concurrencia=N), que la deja en
+#       casos_de_prueba/<TAREA>.json; si falta, MAX_CONCURRENCIA_POR_DEFECTO)
+#   3. Estudiantes: gana quien tiene menos trabajos ejecutándose
+#      y, si empatan, quien fue atendido hace más tiempo
+#      (así los estudiantes se turnan, sin importar cuántas
+#       entregas tenga cada uno en la cola)
+#   4. Tareas: gana la que tiene menos trabajos ejecutándose
+#   5. Empate final: el trabajo más antiguo
+#
+# Solo compiten las "cabezas" de la cola: el trabajo más antiguo
+# de cada combinación (carril, estudiante, tarea).
+#
+# No usa librerías externas.
+# =============================================================
+
+from test_case_service import cargar_casos
+
+
+CARRIL_FINAL    = "final"
+CARRIL_PRACTICA = "practica"
+
+# Orden de atención de los carriles (el primero se atiende antes)
+ORDEN_CARRILES = (CARRIL_FINAL, CARRIL_PRACTICA)
+
+# None → sin tope por tarea
+MAX_CONCURRENCIA_POR_DEFECTO = None
+
+
+def max_concurrencia(cod_tarea: str) -> int:
+    """Tope de trabajos simultáneos de la tarea (None = sin tope)."""
+    config = cargar_casos(cod_tarea) or {}
+    return config.get("max_concurrencia", MAX_CONCURRENCIA_POR_DEFECTO)
+
+
+def elegir_siguiente(candidatos: list, ejecutando_por_tarea: dict,
+                     ejecutando_por_estudiante: dict, ultimo_servicio: dict,
+                     topes: dict = None) -> dict:
+    """
+    Elige el próximo trabajo a ejecutar.
+
+    Parámetros:
+        candidatos                (list): cabezas de la cola, dicts con
+                                          id, carril, id_estudiante, cod_tarea
+        ejecutando_por_tarea      (dict): cod_tarea → trabajos en ejecución
+        ejecutando_por_estudiante (dict): id_estudiante → trabajos en ejecución
+        ultimo_servicio           (dict): id_estudiante → cuándo se le tomó
+                                          su último trabajo (time.time())
+        topes                     (dict): cod_tarea → max_concurrencia.
+                                          None → se lee de cada tarea
+
+    Retorna:
+        dict: el candidato elegido
+        None: si no hay candidatos o todas sus tareas están en el tope
+    """
+    if topes is None:
+        topes = {cod: max_concurrencia(cod) for cod in {c["cod_tarea"] for c in candidatos}}
+
+    def tiene_cupo(candidato: dict) -> bool:
+        tope = topes.get(candidato["cod_tarea"])
+        return tope is None or ejecutando_por_tarea.get(candidato["cod_tarea"], 0) < tope
+
+    def prioridad(candidato: dict) -> tuple:
+        carril = candidato["carril"]
+        return (
+            ORDEN_CARRILES.index(carril) if carril in ORDEN_CARRILES else len(ORDEN_CARRILES),
+            ejecutando_por_estudiante.get(candidato["id_estudiante"], 0),
+            ultimo_servicio.get(candidato["id_estudiante"]) or 0.0,
+            ejecutando_por_tarea.get(candidato["cod_tarea"], 0),
+            candidato["id"],
+        )
+
+    disponibles = [c for c in candidatos if tiene_cupo(c)]
+    if not disponibles:
+        return None
+    return min(disponibles, key=prioridad)
@@ -0,0 +1,128 @@
+# =============================================================
+# precompilador.py
+# Módulo — Revisión de sintaxis y precompilación a bytecode
+# =============================================================
+# Responsabilidad: compilar el archivo del estudiante UNA sola vez
+# antes de ejecutar sus casos.
+#
+# Sin esto, cada caso de prueba lanza un Python nuevo que vuelve a
+# leer y compilar el mismo .py. Y si el archivo tiene un error de
+# sintaxis, se obtienen N errores idénticos (uno por caso).
+#
+# Con esto:
+#   - si el archivo no compila → se rechaza con UN solo diagnóstico
+#   - si compila → se guarda el .pyc y cada caso ejecuta el .pyc
+#
+# Los .pyc se guardan por el SHA-256 del contenido y de la ruta del
+# .py (el bytecode lleva esa ruta para __file__ y los tracebacks):
+#   cache_grader/bytecode/<sha256>.cpython-311.pyc
+#
+# "python archivo.pyc" dejaría __file__, sys.argv[0] y sys.path[0]
+# apuntando a la caché. Por eso el .pyc se lanza con comando(): un
+# cargador corto (python -c) que los deja apuntando al .py original,
+# igual que "python archivo.py", y ejecuta el bytecode.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - importlib.util → número mágico y hash de la cabecera del .pyc
+#   - marshal        → guarda el código compilado en el .pyc
+#   - hashlib        → SHA-256 del contenido
+# =============================================================
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import sys
+import traceback
+
+
+CARPETA_BYTECODE = os.path.join("cache_grader", "bytecode")
+
+# Cabecera del .pyc: número mágico, banderas y hash del fuente (16 bytes).
+# Bandera 0b01: validado por hash, sin revisar el fuente al cargarlo.
+_BANDERAS_PYC    = 0b01
+_TAMANO_CABECERA = 16
+
+# Lo que corre "python -c" para ejecutar un .pyc como si fuera
+# "python archivo.py". La ruta del .py es la que guardó compile().
+_CARGADOR = """\
+import marshal, os, sys, traceback, types
+with open(sys.argv[1], "rb") as f:
+    f.seek(%d)
+    codigo = marshal.load(f)
+ruta = codigo.co_filename
+sys.argv = [ruta] + sys.argv[2:]
+sys.path[0] = os.path.dirname(os.path.abspath(ruta))
+modulo = types.ModuleType("__main__")
+modulo.__file__ = os.path.abspath(ruta)
+modulo.__builtins__ = __builtins__
+sys.modules["__main__"] = modulo
+try:
+    exec(codigo, modulo.__dict__)
+except SystemExit:
+    raise
+except BaseException as e:
+    traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    sys.exit(1)
+""" % _TAMANO_CABECERA
+
+
+def _ruta_pyc(hash_contenido: str) -> str:
+    # El nombre incluye la versión de Python: un .pyc de 3.11 no sirve en 3.12
+    return os.path.join(CARPETA_BYTECODE,
+                        f"{hash_contenido}.{sys.implementation.cache_tag}.pyc")
+
+
+def precompilar(ruta_py: str) -> tuple:
+    """
+    Compila el archivo del estudiante (o reutiliza su .pyc si ya existe).
+
+    Parámetros:
+        ruta_py (str): ruta al archivo .py del estudiante
+
+    Retorna:
+        (ruta_pyc, "")          → compiló bien; ejecutar ruta_pyc
+        (None, "diagnóstico")   → no compila; mensaje igual al de Python
+    """
+    with open(ruta_py, "rb") as f:
+        contenido = f.read()
+
+    huella = hashlib.sha256(contenido)
+    huella.update(os.path.abspath(ruta_py).encode("utf-8"))
+    ruta_pyc = _ruta_pyc(huella.hexdigest())
+    if os.path.isfile(ruta_pyc):
+        return ruta_pyc, ""
+
+    try:
+        # La ruta del .py queda en el bytecode: __file__ y tracebacks
+        codigo = compile(contenido, ruta_py, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return None, "".join(traceback.format_exception_only(type(e), e)).strip()
+
+    cabecera = (importlib.util.MAGIC_NUMBER
+                + _BANDERAS_PYC.to_bytes(4, "little")
+                + importlib.util.source_hash(contenido))
+    os.makedirs(CARPETA_BYTECODE, exist_ok=True)
+    temporal = f"{ruta_pyc}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(cabecera + marshal.dumps(codigo))
+    os.replace(temporal, ruta_pyc)
+    return ruta_pyc, ""
+
+
+def comando(interprete: str, ruta: str) -> list:
+    """
+    Comando para ejecutar 'ruta' (.py o .pyc de precompilar()) como
+    "python archivo.py": con un .pyc, __file__, sys.argv[0] y
+    sys.path[0] quedan apuntando al .py original y no a la caché.
+    """
+    if ruta.endswith(".pyc"):
+        return [interprete, "-c", _CARGADOR, ruta]
+    return [interprete, ruta]
+
+
+def cargar_pyc(ruta_pyc: str):
+    """El código de un .pyc de precompilar() (lo que ejecuta el cargador)."""
+    with open(ruta_pyc, "rb") as f:
+        f.seek(_TAMANO_CABECERA)
+        return marshal.load(f)
@@ -0,0 +1,307 @@
+# =============================================================
+# prueba_carga.py
+# Prueba de carga — cientos de estudiantes entregando a la vez
+# =============================================================
+# Responsabilidad: comprobar que el sistema aguanta un cierre de
+# entrega (el docstring de generar_id_transaccion habla de 300
+# estudiantes subiendo al mismo tiempo) y medir dónde se va el
+# tiempo.
+#
+# Cada estudiante simulado es un hilo que repite el mismo camino
+# que main.procesar_entrega + calificar, etapa por etapa:
+#
+#   validar → guardar_archivo → guardar_registro → calificar
+#
+# con entregas de distintos tipos, mezcladas al azar:
+#
+#   correcta    → suma bien                       (nota 100%)
+#   incorrecta  → resta en vez de sumar           (nota 0%)
+#   falla       → lanza una excepción             (nota 0%)
+#   bucle       → while True (se corta por tiempo)(nota 0%)
+#   inunda      → imprime sin parar (se trunca)   (nota 0%)
+#
+# Al final muestra entregas por segundo, p50/p95/p99 de cada
+# etapa, y los errores: excepciones dentro del sistema y notas
+# que no son las que ese tipo de entrega debería sacar.
+#
+# TODO corre dentro de una carpeta temporal (se borra al
+# terminar): no toca las entregas ni las tareas reales.
+#
+# Como ejecutarlo:
+#   python prueba_carga.py
+#   python prueba_carga.py --estudiantes 300 --entregas 2
+#   python prueba_carga.py --mezcla correcta=70,incorrecta=20,bucle=10
+#   python prueba_carga.py --json reporte.json
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - concurrent.futures → un hilo por estudiante simulado
+#   - tempfile           → carpeta temporal para toda la prueba
+#   - random             → mezcla de entregas (con semilla)
+# =============================================================
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import grader
+from file_validator import validar_archivo
+from test_case_service import guardar_casos
+from transaction_service import (
+    generar_id_transaccion, guardar_archivo, guardar_registro,
+)
+
+
+TAREA_CARGA = "CARGA-01"
+
+ETAPAS = ("validar", "guardar_archivo", "guardar_registro", "calificar")
+
+# Programa de cada tipo de entrega y la nota que debería sacar
+PROGRAMAS = {
+    "correcta":   "a, b = map(int, input().split())\nprint(a + b)\n",
+    "incorrecta": "a, b = map(int, input().split())\nprint(a - b)\n",
+    "falla":      "a, b = map(int, input().split())\nraise ValueError('falla a proposito')\n",
+    "bucle":      "while True:\n    pass\n",
+    "inunda":     "while True:\n    print('x' * 1000)\n",
+}
+PORCENTAJE_ESPERADO = {"correcta": 100.0, "incorrecta": 0.0, "falla": 0.0,
+                       "bucle": 0.0, "inunda": 0.0}
+
+MEZCLA_POR_DEFECTO = {"correcta": 60, "incorrecta": 20, "falla": 10,
+                      "bucle": 5, "inunda": 5}
+
+CASOS_CARGA = [
+    {"id": 1, "entrada": "2 3",   "esperado": "5",  "puntaje": 1.0},
+    {"id": 2, "entrada": "10 -4", "esperado": "6",  "puntaje": 1.0},
+    {"id": 3, "entrada": "0 7",   "esperado": "7",  "puntaje": 1.0},
+]
+
+# Con el límite normal (5 s) cada entrega "bucle" tarda 5 s
+TIEMPO_LIMITE_POR_DEFECTO = 2
+
+
+@contextlib.contextmanager
+def _carpeta_temporal():
+    """Corre el bloque dentro de una carpeta temporal vacía (y la borra al salir)."""
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="prueba_carga_") as carpeta:
+        os.chdir(carpeta)
+        try:
+            yield carpeta
+        finally:
+            os.chdir(anterior)
+
+
+def _percentil(ordenados: list, p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def _estadisticas(segundos: list) -> dict:
+    ordenados = sorted(segundos)
+    return {
+        "cantidad": len(ordenados),
+        "p50":      _percentil(ordenados, 50),
+        "p95":      _percentil(ordenados, 95),
+        "p99":      _percentil(ordenados, 99),
+        "maximo":   ordenados[-1] if ordenados else None,
+    }
+
+
+def _entregar(id_estudiante: str, numero: int, tipo: str) -> dict:
+    """
+    Una entrega completa, midiendo cada etapa.
+    Retorna {"tipo", "tiempos": {etapa: segundos}, "porcentaje", "error"}.
+    """
+    entrega = {"tipo": tipo, "tiempos": {}, "porcentaje": None, "error": None}
+    # Cada archivo es distinto, como en un curso real (si no, todo saldría de la caché)
+    contenido = f"# {id_estudiante} entrega {numero}\n{PROGRAMAS[tipo]}".encode("utf-8")
+    nombre    = "tarea.py"
+    etapa     = ETAPAS[0]
+    try:
+        inicio = time.perf_counter()
+        es_valido, mensaje = validar_archivo(nombre, len(contenido))
+        entrega["tiempos"]["validar"] = time.perf_counter() - inicio
+        if not es_valido:
+            raise ValueError(mensaje)
+
+        etapa  = "guardar_archivo"
+        inicio = time.perf_counter()
+        id_transaccion = generar_id_transaccion()
+        guardado = guardar_archivo(id_transaccion, nombre, contenido)
+        ruta = guardado["ruta"]
+        entrega["tiempos"]["guardar_archivo"] = time.perf_counter() - inicio
+
+        etapa  = "guardar_registro"
+        inicio = time.perf_counter()
+        guardar_registro(id_transaccion, nombre, len(contenido), id_estudiante,
+                         hash_archivo=guardado["sha256"])
+        entrega["tiempos"]["guardar_registro"] = time.perf_counter() - inicio
+
+        etapa  = "calificar"
+        inicio = time.perf_counter()
+        calificacion = grader.calificar(ruta, TAREA_CARGA)
+        entrega["tiempos"]["calificar"] = time.perf_counter() - inicio
+        if "error" in calificacion:
+            raise RuntimeError(calificacion["error"])
+        entrega["porcentaje"] = calificacion["porcentaje"]
+    except Exception as e:
+        entrega["error"] = f"{etapa}: {type(e).__name__}: {e}"
+    return entrega
+
+
+def _sortear_tipos(cantidad: int, mezcla: dict, semilla) -> list:
+    azar = random.Random(semilla)
+    tipos = [tipo for tipo, peso in mezcla.items() if peso > 0]
+    return azar.choices(tipos, weights=[mezcla[t] for t in tipos], k=cantidad)
+
+
+def ejecutar_carga(estudiantes: int = 50, entregas_por_estudiante: int = 1,
+                   mezcla: dict = None, tiempo_limite: float = TIEMPO_LIMITE_POR_DEFECTO,
+                   semilla: int = 0) -> dict:
+    """
+    Simula 'estudiantes' entregando a la vez, cada uno
+    'entregas_por_estudiante' veces seguidas.
+
+    Parámetros:
+        mezcla        (dict): tipo de entrega → peso. None → MEZCLA_POR_DEFECTO
+        tiempo_limite (float): segundos por caso (grader.TIEMPO_LIMITE_SEGUNDOS)
+        semilla       (int):  para repetir exactamente la misma mezcla
+
+    Retorna dict con:
+        - entregas, segundos, entregas_por_segundo
+        - etapas        (dict): etapa → {cantidad, p50, p95, p99, maximo} en segundos
+        - por_tipo      (dict): tipo → cantidad de entregas
+        - errores       (int):  entregas con una excepción dentro del sistema
+        - notas_erradas (int):  entregas cuya nota no es la de su tipo
+        - tasa_errores  (float): (errores + notas_erradas) / entregas
+        - detalle_errores (list): los primeros mensajes de error
+    """
+    mezcla = mezcla or MEZCLA_POR_DEFECTO
+    desconocidos = set(mezcla) - set(PROGRAMAS)
+    if desconocidos:
+        raise ValueError(f"Tipos de entrega desconocidos: {', '.join(sorted(desconocidos))}")
+
+    total = estudiantes * entregas_por_estudiante
+    tipos = _sortear_tipos(total, mezcla, semilla)
+
+    limite_original = grader.TIEMPO_LIMITE_SEGUNDOS
+    metricas_original = grader.REGISTRAR_METRICAS
+    with _carpeta_temporal():
+        grader.TIEMPO_LIMITE_SEGUNDOS = tiempo_limite
+        grader.REGISTRAR_METRICAS = False
+        try:
+            guardar_casos(TAREA_CARGA, "PROF-CARGA", CASOS_CARGA)
+
+            # Todos arrancan juntos, como en el último minuto antes del cierre
+            salida = threading.Barrier(estudiantes)
+
+            def estudiante(indice: int) -> list:
+                salida.wait()
+                id_estudiante = f"STU-{indice:04d}"
+                return [_entregar(id_estudiante, k, tipos[indice * entregas_por_estudiante + k])
+                        for k in range(entregas_por_estudiante)]
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=estudiantes) as pool:
+                entregas = [e for lista in pool.map(estudiante, range(estudiantes)) for e in lista]
+            segundos = time.perf_counter() - inicio
+        finally:
+            grader.TIEMPO_LIMITE_SEGUNDOS = limite_original
+            grader.REGISTRAR_METRICAS = metricas_original
+
+    errores = [e for e in entregas if e["error"]]
+    erradas = [e for e in entregas if not e["error"]
+               and e["porcentaje"] != PORCENTAJE_ESPERADO[e["tipo"]]]
+    por_tipo = {}
+    for e in entregas:
+        por_tipo[e["tipo"]] = por_tipo.get(e["tipo"], 0) + 1
+
+    return {
+        "estudiantes":          estudiantes,
+        "entregas":             total,
+        "segundos":             round(segundos, 3),
+        "entregas_por_segundo": round(total / segundos, 2) if segundos > 0 else None,
+        "etapas": {etapa: _estadisticas([e["tiempos"][etapa] for e in entregas
+                                         if etapa in e["tiempos"]])
+                   for etapa in ETAPAS},
+        "por_tipo":        por_tipo,
+        "errores":         len(errores),
+        "notas_erradas":   len(erradas),
+        "tasa_errores":    round((len(errores) + len(erradas)) / total, 4) if total else 0.0,
+        "detalle_errores": [e["error"] for e in errores[:10]]
+                           + [f"{e['tipo']}: nota {e['porcentaje']}%" for e in erradas[:10]],
+    }
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def _leer_mezcla(texto: str) -> dict:
+    """'correcta=70,bucle=30' → {"correcta": 70, "bucle": 30}"""
+    mezcla = {}
+    for parte in texto.split(","):
+        tipo, _, peso = parte.partition("=")
+        mezcla[tipo.strip()] = float(peso)
+    return mezcla
+
+
+def _ms(segundos) -> str:
+    return "     -" if segundos is None else f"{segundos * 1000:8.1f}"
+
+
+def mostrar_reporte(reporte: dict):
+    print()
+    print("=" * 64)
+    print(f"  PRUEBA DE CARGA — {reporte['estudiantes']} estudiantes, "
+          f"{reporte['entregas']} entregas")
+    print("=" * 64)
+    print(f"  Tiempo total      : {reporte['segundos']} s")
+    print(f"  Rendimiento       : {reporte['entregas_por_segundo']} entregas/s")
+    print(f"  Mezcla            : " + ", ".join(f"{t}={n}" for t, n in reporte["por_tipo"].items()))
+    print("-" * 64)
+    print(f"  {'Etapa':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for etapa, datos in reporte["etapas"].items():
+        print(f"  {etapa:<18}{_ms(datos['p50']):>10}{_ms(datos['p95']):>10}"
+              f"{_ms(datos['p99']):>10}{_ms(datos['maximo']):>10}")
+    print("-" * 64)
+    print(f"  Errores del sistema : {reporte['errores']}")
+    print(f"  Notas equivocadas   : {reporte['notas_erradas']}")
+    print(f"  Tasa de errores     : {reporte['tasa_errores'] * 100:.2f}%")
+    for mensaje in reporte["detalle_errores"]:
+        print(f"    - {mensaje}")
+    print("=" * 64)
+
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Simula muchos estudiantes entregando y calificando a la vez.")
+    parser.add_argument("--estudiantes", type=int, default=50)
+    parser.add_argument("--entregas", type=int, default=1,
+                        help="entregas seguidas de cada estudiante")
+    parser.add_argument("--mezcla", type=_leer_mezcla, default=None,
+                        help="ej: correcta=60,incorrecta=20,falla=10,bucle=5,inunda=5")
+    parser.add_argument("--tiempo-limite", type=float, default=TIEMPO_LIMITE_POR_DEFECTO,
+                        help="segundos por caso antes de cortar un programa")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", help="guardar el reporte en este archivo")
+    args = parser.parse_args(argumentos)
+
+    reporte = ejecutar_carga(args.estudiantes, args.entregas, args.mezcla,
+                             args.tiempo_limite, args.semilla)
+    mostrar_reporte(reporte)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
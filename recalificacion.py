@@ -0,0 +1,170 @@
+# =============================================================
+# recalificacion.py
+# Módulo — Recalificación incremental tras editar una tarea
+# =============================================================
+# Responsabilidad: cuando el profesor corrige los casos de una
+# tarea, volver a calificar las entregas SIN repetir los casos
+# que no cambiaron.
+#
+# Cada caso guarda un hash de su contenido (entrada, esperado,
+# puntaje y comparador; ver test_case_service.hash_caso) y cada resultado
+# recuerda el hash del caso que lo produjo. Al recalificar:
+#   - caso con el mismo hash     → se reutiliza el resultado
+#   - caso nuevo o modificado    → se ejecuta
+#   - caso eliminado             → desaparece de la calificación
+# y la nota y el porcentaje se vuelven a sumar.
+#
+# Corregir un error de tipeo en una tarea de 30 casos ejecuta
+# 1 caso por entrega, no 30.
+#
+# Ojo: el hash no incluye los límites ni el tiempo máximo. Si se
+# cambiaron, hay que recalificar con --completa.
+#
+# Como ejecutarlo (recalifica las entregas terminadas en la cola,
+# ver cola_trabajos.py):
+#   python recalificacion.py TAREA-01
+#   python recalificacion.py TAREA-01 --completa
+#
+# No usa librerías externas.
+# =============================================================
+
+import argparse
+import os
+
+import cola_trabajos
+from grader import calificar
+from test_case_service import cargar_casos
+from transaction_service import guardar_calificacion
+
+
+def diferencia_casos(resultados_previos: list, casos: list) -> dict:
+    """
+    Compara los resultados de una calificación anterior con los casos actuales.
+
+    Parámetros:
+        resultados_previos (list): "resultados" de la calificación anterior
+        casos              (list): casos actuales de la tarea (con "hash")
+
+    Retorna dict con:
+        - reutilizables (dict): caso_id actual → resultado anterior
+        - a_ejecutar    (list): ids de casos nuevos o modificados
+        - descartados   (list): caso_id anteriores que no se reutilizan
+                                (el caso cambió o se eliminó)
+    """
+    # Solo sirven resultados de casos que de verdad se ejecutaron.
+    # Los timeouts tampoco: dependen de la carga de la máquina
+    por_hash = {
+        r["hash_caso"]: r for r in resultados_previos
+        if r.get("hash_caso") and not r.get("omitido") and not r.get("timeout")
+    }
+    hashes_actuales = {caso["hash"] for caso in casos}
+
+    reutilizables = {}
+    a_ejecutar    = []
+    for caso in casos:
+        previo = por_hash.get(caso["hash"])
+        if previo is None:
+            a_ejecutar.append(caso["id"])
+        else:
+            # El profesor pudo renumerar los casos: manda el id actual
+            reutilizables[caso["id"]] = dict(previo, caso_id=caso["id"])
+
+    descartados = [r["caso_id"] for r in resultados_previos
+                   if r.get("hash_caso") not in hashes_actuales]
+    return {
+        "reutilizables": reutilizables,
+        "a_ejecutar":    a_ejecutar,
+        "descartados":   descartados,
+    }
+
+
+def recalificar(calificacion_previa: dict, ruta_py: str, cod_tarea: str,
+                completa: bool = False) -> dict:
+    """
+    Vuelve a calificar una entrega ejecutando solo los casos que cambiaron.
+
+    Parámetros:
+        calificacion_previa (dict): lo que retornó calificar() antes
+        ruta_py             (str):  archivo del estudiante
+        cod_tarea           (str):  tarea (ya con los casos nuevos)
+        completa            (bool): ignorar lo anterior y ejecutar todo
+
+    Retorna el mismo dict que calificar(), más:
+        - casos_reutilizados (int): casos que no se volvieron a ejecutar
+        - casos_ejecutados   (int): casos que sí
+    """
+    config = cargar_casos(cod_tarea)
+    if config is None:
+        return {"error": f"No existe configuracion para la tarea '{cod_tarea}'"}
+
+    if completa or "error_compilacion" in calificacion_previa:
+        reutilizables = {}
+    else:
+        reutilizables = diferencia_casos(calificacion_previa.get("resultados", []),
+                                         config["casos"])["reutilizables"]
+
+    # completa: tampoco sirve una calificación del cache
+    calificacion = calificar(ruta_py, cod_tarea, previos=reutilizables,
+                             usar_cache=False if completa else None)
+    if "error" not in calificacion:
+        # Si vino del cache (otra entrega idéntica ya se recalificó) no se ejecutó nada
+        reutilizados = len(config["casos"]) if calificacion.get("desde_cache") else len(reutilizables)
+        calificacion["casos_reutilizados"] = reutilizados
+        calificacion["casos_ejecutados"]   = len(config["casos"]) - reutilizados
+    return calificacion
+
+
+def recalificar_tarea(cod_tarea: str, completa: bool = False):
+    """
+    Recalifica todas las entregas terminadas de la tarea en cola_trabajos
+    y guarda allí las calificaciones nuevas.
+
+    Es un generador: produce (trabajo, calificacion_nueva) por cada entrega.
+    """
+    for trabajo in cola_trabajos.listar_terminados(cod_tarea):
+        calificacion = recalificar(trabajo["calificacion"], trabajo["ruta"],
+                                   cod_tarea, completa)
+        if "error" not in calificacion:
+            calificacion["id_transaccion"] = trabajo["id_transaccion"]
+            cola_trabajos.actualizar_calificacion(trabajo["id"], calificacion)
+            guardar_calificacion(trabajo["id_transaccion"], calificacion)
+        yield trabajo, calificacion
+
+
+# ── Línea de comandos ─────────────────────────────────────────
+
+def main(argumentos: list = None):
+    parser = argparse.ArgumentParser(
+        description="Recalifica las entregas de una tarea tras editar sus casos.")
+    parser.add_argument("cod_tarea", help="codigo de la tarea, ej: TAREA-01")
+    parser.add_argument("--completa", action="store_true",
+                        help="ejecutar todos los casos (por ejemplo, si cambiaron los limites)")
+    args = parser.parse_args(argumentos)
+
+    cod_tarea = args.cod_tarea.strip().upper().replace(" ", "-")
+    print()
+    print("=" * 60)
+    print(f"  RECALIFICACION — {cod_tarea}")
+    print("=" * 60)
+
+    ejecutados   = 0
+    reutilizados = 0
+    for trabajo, calificacion in recalificar_tarea(cod_tarea, args.completa):
+        nombre = os.path.basename(trabajo["ruta"])
+        if "error" in calificacion:
+            print(f"  [ERROR] {nombre}: {calificacion['error']}")
+            continue
+        ejecutados   += calificacion["casos_ejecutados"]
+        reutilizados += calificacion["casos_reutilizados"]
+        anterior = trabajo["calificacion"]["porcentaje"]
+        print(f"  {nombre}  {anterior}% → {calificacion['porcentaje']}%  "
+              f"({calificacion['casos_ejecutados']} casos ejecutados)")
+
+    print("-" * 60)
+    print(f"  Casos ejecutados   : {ejecutados}")
+    print(f"  Casos reutilizados : {reutilizados}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# =============================================================
+# registro_segmentado.py
+# Módulo — Registro de entregas en segmentos de solo-agregar
+# =============================================================
+# Responsabilidad: guardar los registros de las entregas sin
+# crear un archivo JSON por cada una. Con decenas de miles de
+# entregas por semestre, un archivo por entrega significa
+# decenas de miles de inodos, un listdir lento y un
+# abrir/escribir/cerrar por registro.
+#
+# Cada registro es UNA línea JSON compacta que se agrega al
+# final del segmento activo. Cuando el segmento pasa de
+# TAMANO_MAXIMO_SEGMENTO se empieza el siguiente:
+#
+#     registros_entregas/segmentos/000001.jsonl   ← cerrado
+#     registros_entregas/segmentos/000001.idx     ← su índice
+#     registros_entregas/segmentos/000002.jsonl   ← activo
+#
+# Nada se reescribe nunca: un segmento cerrado no cambia más
+# (bueno para la auditoría de la Historia #3).
+#
+# Índice: en memoria se guarda id_transaccion → (segmento,
+# posición, largo), así buscar() hace un solo pread. Al cerrar
+# un segmento su parte del índice se guarda en el .idx; al
+# abrir el registro solo hay que leer los .idx y recorrer el
+# segmento activo.
+#
+# Fsync por grupos: agregar() no retorna hasta que el registro
+# está en disco, pero si varios hilos agregan a la vez, UN solo
+# os.fsync cubre a todos los que escribieron antes que él (el
+# primero en llegar sincroniza, los demás ven que ya quedó).
+#
+# Varios procesos pueden agregar al mismo segmento (O_APPEND,
+# una sola escritura por línea, igual que metricas.py). Si un
+# id no está en el índice de este proceso, se relee lo que
+# otros hayan agregado antes de responder None.
+#
+# Como migrar los registros antiguos (un JSON por entrega):
+#   python registro_segmentado.py --migrar
+#   python registro_segmentado.py --migrar --borrar
+#       → borra cada JSON antiguo después de importarlo
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - json      → una línea JSON compacta por registro
+#   - threading → candados del fsync por grupos
+#   - argparse  → opciones de la migración
+# =============================================================
+
+import argparse
+import json
+import os
+import threading
+
+import particiones
+
+
+CARPETA_SEGMENTOS = "segmentos"
+
+TAMANO_MAXIMO_SEGMENTO = 64 * 1024 * 1024   # 64 MB
+
+# False solo para pruebas: los registros quedan en el caché del sistema
+SINCRONIZAR = True
+
+_EXTENSION_SEGMENTO = ".jsonl"
+_EXTENSION_INDICE   = ".idx"
+
+_abiertos = {}
+_candado_abiertos = threading.Lock()
+
+
+def _nombre_segmento(numero: int) -> str:
+    return f"{numero:06d}"
+
+
+class RegistroSegmentado:
+    """Registros de entregas en segmentos .jsonl con índice por id_transaccion."""
+
+    def __init__(self, carpeta: str, tamano_maximo: int = None,
+                 sincronizar: bool = None):
+        self.carpeta = os.path.join(carpeta, CARPETA_SEGMENTOS)
+        self.tamano_maximo = tamano_maximo or TAMANO_MAXIMO_SEGMENTO
+        self.sincronizar = SINCRONIZAR if sincronizar is None else sincronizar
+        os.makedirs(self.carpeta, exist_ok=True)
+
+        self._candado        = threading.Lock()   # escritura e índice
+        self._candado_fsync  = threading.Lock()   # un solo fsync a la vez
+        self._indice         = {}                 # id → (segmento, posición, largo)
+        self._leido_hasta    = {}                 # segmento → bytes ya indexados
+        self._escritos       = 0
+        self._sincronizados  = 0
+        self._fd             = None
+        self._segmento       = None
+
+        with self._candado:
+            self._actualizar_indice()
+            self._abrir_segmento(max(self._segmentos(), default=1))
+
+    # ── Archivos ─────────────────────────────────────────────
+    def _ruta(self, numero: int, extension: str = _EXTENSION_SEGMENTO) -> str:
+        return os.path.join(self.carpeta, _nombre_segmento(numero) + extension)
+
+    def _segmentos(self) -> list:
+        return sorted(int(nombre[:-len(_EXTENSION_SEGMENTO)])
+                      for nombre in os.listdir(self.carpeta)
+                      if nombre.endswith(_EXTENSION_SEGMENTO)
+                      and nombre[:-len(_EXTENSION_SEGMENTO)].isdigit())
+
+    def _abrir_segmento(self, numero: int):
+        fd = os.open(self._ruta(numero), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        tamano = os.fstat(fd).st_size
+        if tamano:
+            # Un corte a mitad de escritura deja la última línea sin "\n":
+            # se cierra para que el próximo registro no quede pegado a ella
+            with open(self._ruta(numero), "rb") as archivo:
+                archivo.seek(tamano - 1)
+                if archivo.read(1) != b"\n":
+                    os.write(fd, b"\n")
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd, self._segmento = fd, numero
+
+    def _rotar(self):
+        """Cierra el segmento activo (con su índice en disco) y empieza otro."""
+        if self.sincronizar:
+            os.fsync(self._fd)
+        self._sincronizados = self._escritos
+        self._recorrer_segmento(self._segmento)   # lo que agregaron otros procesos
+        self._guardar_indice_segmento(self._segmento)
+        self._abrir_segmento(self._segmento + 1)
+
+    # ── Índice ───────────────────────────────────────────────
+    def _guardar_indice_segmento(self, numero: int):
+        parte = {id_t: [posicion, largo]
+                 for id_t, (segmento, posicion, largo) in self._indice.items()
+                 if segmento == numero}
+        temporal = self._ruta(numero, _EXTENSION_INDICE) + f".{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump({"bytes": self._leido_hasta.get(numero, 0), "registros": parte},
+                      archivo, separators=(",", ":"))
+        os.replace(temporal, self._ruta(numero, _EXTENSION_INDICE))
+
+    def _cargar_indice_segmento(self, numero: int) -> bool:
+        try:
+            with open(self._ruta(numero, _EXTENSION_INDICE), "r", encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            return False
+        for id_t, (posicion, largo) in datos["registros"].items():
+            self._indice[id_t] = (numero, posicion, largo)
+        self._leido_hasta[numero] = datos["bytes"]
+        return True
+
+    def _recorrer_segmento(self, numero: int):
+        """Indexa las líneas del segmento que todavía no estaban indexadas."""
+        posicion = self._leido_hasta.get(numero, 0)
+        with open(self._ruta(numero), "rb") as archivo:
+            archivo.seek(posicion)
+            for linea in archivo:
+                if not linea.endswith(b"\n"):
+                    break   # otro proceso la está escribiendo
+                try:
+                    id_t = json.loads(linea)["id_transaccion"]
+                except (ValueError, KeyError, TypeError):
+                    id_t = None   # línea dañada: se salta
+                if id_t is not None:
+                    self._indice[id_t] = (numero, posicion, len(linea))
+                posicion += len(linea)
+        self._leido_hasta[numero] = posicion
+
+    def _actualizar_indice(self):
+        """
+        Pone al día el índice con los segmentos del disco (propios o de
+        otros procesos). Un segmento cerrado puede haber crecido después
+        de guardar su .idx (otro proceso le escribió justo antes de ver
+        la rotación): lo que pase de "bytes" se recorre y el .idx se
+        vuelve a guardar.
+        """
+        segmentos = self._segmentos()
+        for numero in segmentos:
+            cerrado = numero != segmentos[-1]
+            if numero not in self._leido_hasta and cerrado:
+                self._cargar_indice_segmento(numero)
+            leido = self._leido_hasta.get(numero)
+            if leido is not None and os.path.getsize(self._ruta(numero)) <= leido:
+                continue
+            self._recorrer_segmento(numero)
+            if cerrado:
+                self._guardar_indice_segmento(numero)
+
+    # ── Públicas ─────────────────────────────────────────────
+    def agregar(self, registro: dict, esperar_disco: bool = True):
+        """
+        Agrega un registro al segmento activo. Retorna cuando ya está
+        en disco (si sincronizar está activo y esperar_disco es True;
+        con False, el próximo fsync lo cubre).
+        """
+        linea = (json.dumps(registro, ensure_ascii=False, separators=(",", ":"))
+                 + "\n").encode("utf-8")
+        with self._candado:
+            if os.fstat(self._fd).st_size >= self.tamano_maximo:
+                # Otro proceso pudo haber rotado antes: se sigue en el último
+                ultimo = max(self._segmentos())
+                if ultimo > self._segmento:
+                    # Lo escrito en el segmento viejo tiene que llegar al
+                    # disco antes de soltarlo: hay hilos esperándolo
+                    if self.sincronizar:
+                        os.fsync(self._fd)
+                    self._sincronizados = self._escritos
+                    self._abrir_segmento(ultimo)
+                else:
+                    self._rotar()
+            os.write(self._fd, linea)
+            fin = os.lseek(self._fd, 0, os.SEEK_CUR)
+            self._indice[registro["id_transaccion"]] = (self._segmento, fin - len(linea), len(linea))
+            if self._leido_hasta.get(self._segmento, 0) == fin - len(linea):
+                self._leido_hasta[self._segmento] = fin
+            self._escritos += 1
+            mi_numero = self._escritos
+
+        if self.sincronizar and esperar_disco:
+            self._esperar_disco(mi_numero)
+
+    def sincronizar_pendientes(self):
+        """Un fsync que cubre todo lo agregado hasta ahora."""
+        if self.sincronizar:
+            with self._candado:
+                ultimo = self._escritos
+            self._esperar_disco(ultimo)
+
+    def _esperar_disco(self, mi_numero: int):
+        with self._candado_fsync:
+            if self._sincronizados >= mi_numero:
+                return   # el fsync de otro hilo ya cubrió este registro
+            with self._candado:
+                objetivo = self._escritos
+                fd = os.dup(self._fd)   # sigue válido aunque se rote mientras tanto
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._sincronizados = max(self._sincronizados, objetivo)
+
+    def buscar(self, id_transaccion: str) -> dict:
+        """El registro con ese id, o None si no existe."""
+        with self._candado:
+            ubicacion = self._indice.get(id_transaccion)
+            if ubicacion is None:
+                self._actualizar_indice()
+                ubicacion = self._indice.get(id_transaccion)
+        if ubicacion is None:
+            return None
+        segmento, posicion, largo = ubicacion
+        fd = os.open(self._ruta(segmento), os.O_RDONLY)
+        try:
+            return json.loads(os.pread(fd, largo, posicion))
+        finally:
+            os.close(fd)
+
+    def contiene(self, id_transaccion: str) -> bool:
+        with self._candado:
+            if id_transaccion not in self._indice:
+                self._actualizar_indice()
+            return id_transaccion in self._indice
+
+    def registros(self):
+        """Generador: todos los registros, en el orden en que se agregaron."""
+        with self._candado:
+            self._actualizar_indice()
+            segmentos = self._segmentos()
+            hasta = dict(self._leido_hasta)
+        for numero in segmentos:
+            with open(self._ruta(numero), "rb") as archivo:
+                restante = hasta.get(numero, 0)
+                for linea in archivo:
+                    restante -= len(linea)
+                    if restante < 0:
+                        break
+                    try:
+                        yield json.loads(linea)
+                    except ValueError:
+                        continue
+
+    def __len__(self) -> int:
+        with self._candado:
+            self._actualizar_indice()
+            return len(self._indice)
+
+    def cerrar(self):
+        with self._candado:
+            if self._fd is not None:
+                if self.sincronizar:
+                    os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+
+
+def abrir(carpeta: str) -> RegistroSegmentado:
+    """
+    El registro de esa carpeta, compartido por todo el proceso
+    (así el índice se arma una sola vez).
+    """
+    clave = (os.path.abspath(carpeta), os.getpid())
+    with _candado_abiertos:
+        registro = _abiertos.get(clave)
+        if registro is None or not os.path.isdir(registro.carpeta):
+            if registro is not None:
+                registro.cerrar()   # la carpeta se borró (p. ej. una carpeta temporal)
+            registro = _abiertos[clave] = RegistroSegmentado(carpeta)
+        return registro
+
+
+def migrar(carpeta: str, borrar: bool = False) -> dict:
+    """
+    Importa los registros antiguos (un <id>.json por entrega) de la
+    carpeta al registro segmentado. Los que ya estaban se saltan, así
+    que se puede correr varias veces o mientras llegan entregas.
+
+    Retorna:
+        dict con importados, ya_estaban, danados y borrados
+    """
+    registro = abrir(carpeta)
+    resumen = {"importados": 0, "ya_estaban": 0, "danados": 0, "borrados": 0}
+    importados = []
+    for ruta in particiones.recorrer(carpeta):
+        if not ruta.endswith(".json"):
+            continue
+        try:
+            with open(ruta, "r", encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+            id_t = datos["id_transaccion"]
+        except (OSError, ValueError, KeyError, TypeError):
+            resumen["danados"] += 1
+            continue
+        if registro.contiene(id_t):
+            resumen["ya_estaban"] += 1
+        else:
+            # Sin fsync por registro: uno solo al final cubre a todos
+            registro.agregar(datos, esperar_disco=False)
+            resumen["importados"] += 1
+        importados.append(ruta)
+
+    registro.sincronizar_pendientes()
+    if borrar:
+        for ruta in importados:
+            os.remove(ruta)
+            resumen["borrados"] += 1
+    return resumen
+
+
+def main(argumentos: list = None):
+    from transaction_service import CARPETA_REGISTROS
+
+    parser = argparse.ArgumentParser(
+        description="Registro de entregas en segmentos de solo-agregar.")
+    parser.add_argument("--migrar", action="store_true",
+                        help="importa los registros antiguos (un JSON por entrega)")
+    parser.add_argument("--borrar", action="store_true",
+                        help="con --migrar: borra cada JSON antiguo ya importado")
+    parser.add_argument("--carpeta", default=CARPETA_REGISTROS,
+                        help=f"carpeta de los registros (por defecto: {CARPETA_REGISTROS})")
+    args = parser.parse_args(argumentos)
+
+    if args.migrar:
+        resumen = migrar(args.carpeta, borrar=args.borrar)
+        print(f"  Importados: {resumen['importados']}   Ya estaban: {resumen['ya_estaban']}"
+              f"   Dañados: {resumen['danados']}   Borrados: {resumen['borrados']}")
+    registro = abrir(args.carpeta)
+    print(f"  {len(registro)} registro(s) en {len(registro._segmentos())} segmento(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# =============================================================
+# registro_sqlite.py
+# Módulo — Registro de entregas y calificaciones en SQLite
+# =============================================================
+# Responsabilidad: guardar las entregas y sus calificaciones en
+# una base con índices, para poder preguntar cosas como
+#   - todas las entregas del estudiante X
+#   - la última entrega de cada estudiante en la tarea Y
+#   - todo lo entregado en la última hora
+# sin abrir cada registro (las consultas están en consultas.py).
+#
+# Es opcional: se activa con
+#     transaction_service.ALMACEN_REGISTROS = "sqlite"
+# y entonces guardar_registro / cargar_registro / listar_registros
+# usan esta base, y guardar_calificacion guarda aquí lo que
+# retornó calificar().
+#
+# Archivo: registros_entregas/registros.db (modo WAL: muchos
+# lectores mientras una entrega se escribe).
+#
+# Cada hilo abre UNA conexión por base y la reutiliza en todas las
+# llamadas; el esquema se crea una sola vez por proceso. Así guardar
+# o consultar una entrega no paga abrir la base, el PRAGMA y el
+# CREATE TABLE cada vez. cerrar() las cierra (antes de borrar la base).
+#
+# Tablas:
+#   entregas       → una fila por entrega, con el registro completo
+#                    en "datos" (JSON) para no perder campos nuevos
+#   calificaciones → la última calificación de cada (entrega, tarea);
+#                    copia id_estudiante y fecha_entrega de la entrega
+#                    para que "por tarea y estudiante" use un solo índice
+#
+# Como pasar los registros que ya existen (segmentos o un JSON por
+# entrega) a la base:
+#   python registro_sqlite.py --importar
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - sqlite3   → base de datos en un solo archivo, con índices
+#   - threading → una conexión reutilizable por hilo
+#   - json      → registro y calificación completos en una columna
+#   - argparse  → opciones de la importación
+# =============================================================
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+ARCHIVO_BASE = "registros.db"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entregas (
+    id_transaccion TEXT PRIMARY KEY,
+    id_estudiante  TEXT NOT NULL,
+    nombre_archivo TEXT NOT NULL,
+    tamano_bytes   INTEGER NOT NULL,
+    fecha_hora     TEXT NOT NULL,
+    estado         TEXT NOT NULL,
+    datos          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entregas_estudiante
+    ON entregas (id_estudiante, fecha_hora, id_transaccion);
+CREATE INDEX IF NOT EXISTS entregas_fecha
+    ON entregas (fecha_hora, id_transaccion);
+CREATE TABLE IF NOT EXISTS calificaciones (
+    id_transaccion TEXT NOT NULL,
+    cod_tarea      TEXT NOT NULL,
+    id_estudiante  TEXT,
+    fecha_entrega  TEXT,
+    fecha_hora     TEXT NOT NULL,
+    nota_obtenida  REAL,
+    nota_maxima    REAL,
+    porcentaje     REAL,
+    calificacion   TEXT NOT NULL,
+    PRIMARY KEY (id_transaccion, cod_tarea)
+);
+CREATE INDEX IF NOT EXISTS calificaciones_tarea
+    ON calificaciones (cod_tarea, id_estudiante, fecha_entrega);
+"""
+
+
+def ruta_base(carpeta: str) -> str:
+    return os.path.join(carpeta, ARCHIVO_BASE)
+
+
+# Conexiones de cada hilo: {ruta de la base: conexión}
+_locales = threading.local()
+
+# Bases a las que este proceso ya les creó el esquema
+_con_esquema = set()
+
+
+def _conexiones() -> dict:
+    # Tras un fork() las conexiones heredadas no se pueden usar
+    if getattr(_locales, "pid", None) != os.getpid():
+        _locales.conexiones = {}
+        _locales.pid        = os.getpid()
+    return _locales.conexiones
+
+
+def conectar(carpeta: str) -> sqlite3.Connection:
+    """
+    Conexión de este hilo a la base de registros de la carpeta (la crea
+    si no existe). Se reutiliza entre llamadas: no hay que cerrarla.
+    isolation_level=None: cada operación decide su propia transacción.
+    """
+    ruta       = os.path.abspath(ruta_base(carpeta))
+    conexiones = _conexiones()
+    conexion   = conexiones.get(ruta)
+    if conexion is not None:
+        if os.path.isfile(ruta):
+            return conexion
+        # Borraron la base: se abre (y se crea) otra vez
+        conexion.close()
+        _con_esquema.discard(ruta)
+
+    os.makedirs(carpeta, exist_ok=True)
+    nueva    = not os.path.isfile(ruta)
+    conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None)
+    conexion.row_factory = sqlite3.Row
+    if nueva or ruta not in _con_esquema:
+        conexion.execute("PRAGMA journal_mode=WAL")   # queda guardado en la base
+        conexion.executescript(_ESQUEMA)
+        _con_esquema.add(ruta)
+    conexiones[ruta] = conexion
+    return conexion
+
+
+def cerrar(carpeta: str = None):
+    """Cierra las conexiones de este hilo (a la base de 'carpeta' o a todas)."""
+    conexiones = _conexiones()
+    rutas = list(conexiones) if carpeta is None else [os.path.abspath(ruta_base(carpeta))]
+    for ruta in rutas:
+        conexion = conexiones.pop(ruta, None)
+        if conexion is not None:
+            conexion.close()
+
+
+def _fila_entrega(registro: dict) -> tuple:
+    return (registro["id_transaccion"], registro.get("id_estudiante", ""),
+            registro.get("nombre_archivo", ""), registro.get("tamano_bytes", 0),
+            registro.get("fecha_hora", ""), registro.get("estado", ""),
+            json.dumps(registro, ensure_ascii=False))
+
+
+_INSERTAR_ENTREGA = ("INSERT {} INTO entregas (id_transaccion, id_estudiante, nombre_archivo, "
+                     "tamano_bytes, fecha_hora, estado, datos) VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def guardar_entrega(carpeta: str, registro: dict):
+    """Guarda (o reemplaza) el registro de una entrega."""
+    conectar(carpeta).execute(_INSERTAR_ENTREGA.format("OR REPLACE"), _fila_entrega(registro))
+
+
+def cargar_entrega(carpeta: str, id_transaccion: str) -> dict:
+    """El registro de la entrega, o None si no está en la base."""
+    if not os.path.isfile(ruta_base(carpeta)):
+        return None
+    fila = conectar(carpeta).execute("SELECT datos FROM entregas WHERE id_transaccion = ?",
+                                     (id_transaccion,)).fetchone()
+    return json.loads(fila["datos"]) if fila else None
+
+
+def listar_entregas(carpeta: str):
+    """Generador: todos los registros, ordenados por id_transaccion."""
+    if not os.path.isfile(ruta_base(carpeta)):
+        return
+    for fila in conectar(carpeta).execute("SELECT datos FROM entregas ORDER BY id_transaccion"):
+        yield json.loads(fila["datos"])
+
+
+def guardar_calificacion(carpeta: str, id_transaccion: str, calificacion: dict):
+    """
+    Guarda lo que retornó calificar() para una entrega. Si la entrega
+    ya tenía calificación en esa tarea (una recalificación), se reemplaza.
+    """
+    conexion = conectar(carpeta)
+    entrega = conexion.execute(
+        "SELECT id_estudiante, fecha_hora FROM entregas WHERE id_transaccion = ?",
+        (id_transaccion,)).fetchone()
+    conexion.execute(
+        "INSERT OR REPLACE INTO calificaciones (id_transaccion, cod_tarea, id_estudiante, "
+        "fecha_entrega, fecha_hora, nota_obtenida, nota_maxima, porcentaje, calificacion) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (id_transaccion, calificacion["cod_tarea"],
+         entrega["id_estudiante"] if entrega else None,
+         entrega["fecha_hora"] if entrega else None,
+         datetime.now().isoformat(),
+         calificacion.get("nota_obtenida"), calificacion.get("nota_maxima"),
+         calificacion.get("porcentaje"),
+         json.dumps(calificacion, ensure_ascii=False)))
+
+
+def importar(carpeta: str, registros) -> dict:
+    """
+    Agrega a la base registros que ya existen (los que ya estaban se
+    saltan). Todo en una sola transacción.
+
+    Retorna:
+        dict con importados y ya_estaban
+    """
+    conexion = conectar(carpeta)
+    resumen = {"importados": 0, "ya_estaban": 0}
+    try:
+        conexion.execute("BEGIN IMMEDIATE")
+        for registro in registros:
+            cursor = conexion.execute(_INSERTAR_ENTREGA.format("OR IGNORE"),
+                                      _fila_entrega(registro))
+            resumen["importados" if cursor.rowcount else "ya_estaban"] += 1
+        conexion.execute("COMMIT")
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    return resumen
+
+
+def main(argumentos: list = None):
+    import transaction_service
+
+    parser = argparse.ArgumentParser(
+        description="Registro de entregas y calificaciones en SQLite.")
+    parser.add_argument("--importar", action="store_true",
+                        help="pasa a la base los registros de los segmentos y los JSON antiguos")
+    parser.add_argument("--carpeta", default=transaction_service.CARPETA_REGISTROS,
+                        help=f"carpeta de los registros "
+                             f"(por defecto: {transaction_service.CARPETA_REGISTROS})")
+    args = parser.parse_args(argumentos)
+
+    if args.importar:
+        # listar_registros con el almacén segmentado lee segmentos y JSON antiguos
+        transaction_service.CARPETA_REGISTROS = args.carpeta
+        transaction_service.ALMACEN_REGISTROS = "segmentado"
+        resumen = importar(args.carpeta, transaction_service.listar_registros())
+        print(f"  Importados: {resumen['importados']}   Ya estaban: {resumen['ya_estaban']}")
+
+    conexion = conectar(args.carpeta)
+    entregas = conexion.execute("SELECT COUNT(*) FROM entregas").fetchone()[0]
+    calificaciones = conexion.execute("SELECT COUNT(*) FROM calificaciones").fetchone()[0]
+    print(f"  {entregas} entrega(s) y {calificaciones} calificacion(es) en {ruta_base(args.carpeta)}.")
+
+
+if __name__ == "__main__":
+    main()
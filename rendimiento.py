@@ -0,0 +1,243 @@
+# =============================================================
+# rendimiento.py
+# Módulo — Puntaje por eficiencia (tiempo de CPU y memoria)
+# =============================================================
+# Responsabilidad: en tareas de algoritmos, dar puntos extra a los
+# programas que además de correctos son eficientes.
+#
+# El profesor lo activa en el JSON de la tarea (o con
+# test_case_service.guardar_casos(..., rendimiento={...})):
+#
+#     "rendimiento": {
+#         "referencia":    "soluciones_referencia/TAREA-01.py",
+#         "repeticiones":  5,       ← opcional
+#         "calentamiento": 1,       ← opcional
+#         "niveles": {
+#             "exigente": {
+#                 "puntaje": 2.0,
+#                 "escala":  [[1.5, 1.0], [3.0, 0.5], [6.0, 0.25]]
+#             }
+#         }
+#     }
+#
+# y marca qué casos se miden:  {"id": 3, ..., "nivel_rendimiento": "exigente"}
+#
+# Para cada caso medido (y que el programa resolvió bien):
+#   1. Se ejecuta "calentamiento" veces sin medir (caché del disco,
+#      CPU despierta) y luego "repeticiones" veces midiendo
+#   2. Se descartan las muestras atípicas (lejos de la mediana)
+#      y se toma la mediana de CPU y de memoria pico
+#   3. Se divide por lo mismo medido con la solución de referencia
+#      EN ESTA MÁQUINA → razón (1.0 = igual de rápido)
+#   4. "escala": [razón máxima, fracción]. Con la escala de arriba,
+#      hasta 1.5 veces la referencia → 100% del puntaje, hasta 3
+#      veces → 50%, hasta 6 → 25%, más lento → 0. Cuenta la peor
+#      de las dos razones (CPU o memoria).
+#
+# Las mediciones de la referencia se guardan por máquina en
+# cache_grader/referencias: se miden una sola vez.
+#
+# Ojo: el arranque de Python (~15 ms de CPU) está incluido en
+# cada medición; para que la razón signifique algo, los casos
+# medidos deben tardar bastante más que eso.
+#
+# Librerías usadas (incluidas en Python, sin instalar nada):
+#   - statistics → mediana
+#   - platform   → huella de la máquina
+# =============================================================
+
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+
+import almacen_blobs
+import cache_resultados
+import limites_recursos
+import precompilador
+
+
+CARPETA_REFERENCIAS = os.path.join("cache_grader", "referencias")
+
+REPETICIONES_POR_DEFECTO  = 5
+CALENTAMIENTO_POR_DEFECTO = 1
+
+# Una muestra a más de esto × MAD (desviación absoluta mediana)
+# de la mediana se considera ruido y se descarta
+DESVIACIONES_ATIPICAS = 3.0
+
+# Evita dividir por (casi) cero con referencias muy rápidas
+_PISO_CPU_SEGUNDOS = 0.001
+
+
+def huella_maquina() -> str:
+    """Identifica la máquina y el Python: las mediciones solo valen aquí."""
+    return cache_resultados.hash_datos({
+        "host":       socket.gethostname(),
+        "maquina":    platform.machine(),
+        "procesador": platform.processor(),
+        "nucleos":    os.cpu_count(),
+        "python":     sys.version,
+    })
+
+
+def _mediana_sin_atipicos(valores: list) -> tuple:
+    """Retorna (mediana de las muestras buenas, cuántas se descartaron)."""
+    mediana = statistics.median(valores)
+    mad     = statistics.median(abs(v - mediana) for v in valores)
+    if mad == 0:
+        return mediana, 0
+    buenos = [v for v in valores if abs(v - mediana) <= DESVIACIONES_ATIPICAS * mad]
+    return statistics.median(buenos), len(valores) - len(buenos)
+
+
+def _ejecutar(ejecutor, ruta_py: str, caso: dict, limites: dict) -> dict:
+    # Si la entrada está en un blob, cada ejecución lo vuelve a abrir
+    with almacen_blobs.abrir_entrada(caso) as entrada:
+        if limites_recursos.hay_limites(limites):
+            return ejecutor(ruta_py, entrada, limites=limites)
+        return ejecutor(ruta_py, entrada)
+
+
+def medir(ejecutor, ruta_py: str, caso: dict, limites: dict = None,
+          repeticiones: int = REPETICIONES_POR_DEFECTO,
+          calentamiento: int = CALENTAMIENTO_POR_DEFECTO) -> dict:
+    """
+    Ejecuta el programa varias veces con la entrada del caso.
+
+    Retorna dict con:
+        - cpu_segundos    (float): mediana de CPU (usuario + sistema)
+        - memoria_pico_kb (int):   mediana de la memoria pico
+        - muestras        (int):   ejecuciones medidas
+        - descartadas     (int):   muestras de CPU descartadas por atípicas
+    o None si alguna ejecución falló o el ejecutor no mide CPU.
+    """
+    for _ in range(calentamiento):
+        _ejecutar(ejecutor, ruta_py, caso, limites)
+
+    cpus, memorias = [], []
+    for _ in range(max(1, repeticiones)):
+        ejecucion = _ejecutar(ejecutor, ruta_py, caso, limites)
+        recursos  = ejecucion.get("recursos") or {}
+        if ejecucion["timeout"] or ejecucion["excepcion"] or recursos.get("cpu_usuario") is None:
+            return None
+        cpus.append(recursos["cpu_usuario"] + (recursos.get("cpu_sistema") or 0.0))
+        memorias.append(recursos.get("memoria_pico_kb") or 0)
+
+    cpu, descartadas = _mediana_sin_atipicos(cpus)
+    return {
+        "cpu_segundos":    round(cpu, 4),
+        "memoria_pico_kb": int(statistics.median(memorias)),
+        "muestras":        len(cpus),
+        "descartadas":     descartadas,
+    }
+
+
+def medir_referencia(config_rendimiento: dict, caso: dict, ejecutor,
+                     limites: dict = None) -> dict:
+    """
+    Medición de la solución de referencia para un caso, en esta máquina.
+    Se guarda en CARPETA_REFERENCIAS y se reutiliza mientras no cambien
+    la referencia, la entrada ni los parámetros de medición.
+    Retorna None si la referencia no existe, no compila o falla.
+    """
+    ruta_referencia = config_rendimiento["referencia"]
+    try:
+        hash_referencia = cache_resultados.hash_archivo(ruta_referencia)
+    except OSError:
+        return None
+
+    repeticiones  = config_rendimiento.get("repeticiones", REPETICIONES_POR_DEFECTO)
+    calentamiento = config_rendimiento.get("calentamiento", CALENTAMIENTO_POR_DEFECTO)
+    clave = cache_resultados.hash_datos({
+        "maquina":       huella_maquina(),
+        "referencia":    hash_referencia,
+        "entrada":       caso["entrada"],
+        "entrada_blob":  (caso.get("entrada_blob") or {}).get("sha256"),
+        "repeticiones":  repeticiones,
+        "calentamiento": calentamiento,
+        "limites":       limites_recursos.normalizar(limites),
+    })
+    ruta_guardada = os.path.join(CARPETA_REFERENCIAS, f"{clave}.json")
+    if os.path.isfile(ruta_guardada):
+        with open(ruta_guardada, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    ruta_pyc, diagnostico = precompilador.precompilar(ruta_referencia)
+    if diagnostico:
+        return None
+    medicion = medir(ejecutor, ruta_pyc, caso, limites, repeticiones, calentamiento)
+    if medicion is None:
+        return None
+
+    os.makedirs(CARPETA_REFERENCIAS, exist_ok=True)
+    temporal = f"{ruta_guardada}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(medicion, f)
+    os.replace(temporal, ruta_guardada)
+    return medicion
+
+
+def fraccion_por_razon(razon: float, escala: list) -> float:
+    """Fracción del puntaje según la escala [[razón máxima, fracción], ...]."""
+    for razon_maxima, fraccion in sorted(escala):
+        if razon <= razon_maxima:
+            return fraccion
+    return 0.0
+
+
+def puntuar(ruta_ejecutable: str, config: dict, resultados: list, ejecutor,
+            limites: dict = None) -> list:
+    """
+    Agrega "rendimiento" a los resultados de los casos con nivel_rendimiento.
+
+    Cada uno recibe un dict con puntaje_posible, puntaje_obtenido, las
+    medianas del estudiante y de la referencia, y las razones. Un caso
+    que no pasó (o que falló al medirse) tiene 0 puntos de rendimiento.
+    Si la referencia no se pudo medir, el caso queda sin "rendimiento":
+    no se castiga al estudiante por un problema de la tarea.
+    """
+    config_rendimiento = config["rendimiento"]
+    niveles = config_rendimiento.get("niveles", {})
+    casos   = {caso["id"]: caso for caso in config["casos"]}
+    repeticiones  = config_rendimiento.get("repeticiones", REPETICIONES_POR_DEFECTO)
+    calentamiento = config_rendimiento.get("calentamiento", CALENTAMIENTO_POR_DEFECTO)
+
+    for resultado in resultados:
+        caso  = casos.get(resultado["caso_id"])
+        nivel = niveles.get((caso or {}).get("nivel_rendimiento"))
+        if nivel is None or "rendimiento" in resultado:
+            continue   # sin nivel, o reutilizado de una calificación anterior
+        referencia = medir_referencia(config_rendimiento, caso, ejecutor, limites)
+        if referencia is None:
+            continue
+
+        detalle = {
+            "nivel":            caso["nivel_rendimiento"],
+            "puntaje_posible":  nivel["puntaje"],
+            "puntaje_obtenido": 0.0,
+            "referencia":       referencia,
+            "medicion":         None,
+            "razon_cpu":        None,
+            "razon_memoria":    None,
+        }
+        resultado["rendimiento"] = detalle
+        if not resultado["paso"]:
+            continue
+
+        medicion = medir(ejecutor, ruta_ejecutable, caso, limites,
+                         repeticiones, calentamiento)
+        if medicion is None:
+            continue
+        razon_cpu = medicion["cpu_segundos"] / max(referencia["cpu_segundos"], _PISO_CPU_SEGUNDOS)
+        razon_memoria = medicion["memoria_pico_kb"] / max(referencia["memoria_pico_kb"], 1)
+        fraccion = min(fraccion_por_razon(razon_cpu, nivel["escala"]),
+                       fraccion_por_razon(razon_memoria, nivel["escala"]))
+
+        detalle["medicion"]         = medicion
+        detalle["razon_cpu"]        = round(razon_cpu, 3)
+        detalle["razon_memoria"]    = round(razon_memoria, 3)
+        detalle["puntaje_obtenido"] = round(nivel["puntaje"] * fraccion, 2)
+    return resultados
@@ -17,10 +17,27 @@
 #             "id": 1,
 #             "entrada":  "2 3",
 #             "esperado": "5",
-#             "puntaje":  2.5
+#             "puntaje":  2.5,
+#             "hash":     "9f2c..."     ← lo calcula guardar_casos
+#         },
+#         {
+#             "id": 2,
+#             "entrada":  "",             ← entrada de varios MB: va aparte
+#             "entrada_blob": {"sha256": "...", "bytes": 4194304,
+#                              "comprimido": false},   (ver almacen_blobs.py)
+#             "esperado": "42",
+#             "puntaje":  2.5,
+#             "hash":     "c07a..."
 #         }
 #     ],
-#     "puntaje_total": 2.5
+#     "puntaje_total": 2.5,
+#     "limites": {                      ← opcional (ver limites_recursos.py)
+#         "cpu_segundos": 2,
+#         "memoria_mb":   256
+#     },
+#     "comparador": "tokens",           ← opcional (ver comparadores.py)
+#     "max_concurrencia": 4,            ← opcional (ver planificador.py)
+#     "rendimiento": {...}              ← opcional (ver rendimiento.py)
 # }
 #
 # Librerías usadas (incluidas en Python, sin instalar nada):
@@ -33,6 +50,9 @@ import json
 import os
 from datetime import datetime
 
+import almacen_blobs
+import cache_resultados
+
 
 CARPETA_PRUEBAS = "casos_de_prueba"   # carpeta donde se guardan los JSON
 
@@ -42,7 +62,35 @@ def _asegurar_carpeta():
     os.makedirs(CARPETA_PRUEBAS, exist_ok=True)
 
 
-def guardar_casos(cod_tarea: str, id_profesor: str, casos: list) -> dict:
+def hash_caso(caso: dict, comparador_tarea=None) -> str:
+    """
+    Huella estable del contenido de un caso: entrada, esperado, puntaje,
+    la forma de compararlo (la del caso o la de la tarea) y su nivel de
+    rendimiento, si se mide.
+    No depende del id ni del orden, así que si el profesor edita la tarea,
+    los casos que no cambiaron conservan su hash (ver recalificacion.py).
+    """
+    datos = {
+        "entrada":  caso["entrada"],
+        "esperado": caso["esperado"],
+        "puntaje":  float(caso["puntaje"]),
+    }
+    # Los casos sin blobs, comparador ni rendimiento conservan el mismo hash de siempre
+    for campo in ("entrada_blob", "esperado_blob"):
+        if caso.get(campo):
+            datos[campo] = caso[campo]["sha256"]
+    if caso.get("nivel_rendimiento") is not None:
+        datos["nivel_rendimiento"] = caso["nivel_rendimiento"]
+    comparador = caso.get("comparador", comparador_tarea)
+    if comparador is not None:
+        datos["comparador"] = comparador
+    return cache_resultados.hash_datos(datos)
+
+
+def guardar_casos(cod_tarea: str, id_profesor: str, casos: list,
+                  limites: dict = None, comprimir_blobs: bool = None,
+                  comparador=None, rendimiento: dict = None,
+                  max_concurrencia: int = None) -> dict:
     """
     Guarda los casos de prueba de una tarea en un archivo JSON.
 
@@ -50,20 +98,44 @@ def guardar_casos(cod_tarea: str, id_profesor: str, casos: list) -> dict:
         cod_tarea   (str):  código único de la tarea, ej: "TAREA-01"
         id_profesor (str):  ID del profesor que la configura
         casos       (list): lista de diccionarios con los casos de prueba
+        limites     (dict): límites de recursos para los programas de esta
+                            tarea (cpu_segundos, memoria_mb, ...). Opcional.
+        comprimir_blobs (bool): guardar con gzip las entradas/salidas que
+                            van al almacén de blobs. Opcional.
+        comparador  (str|dict): cómo comparar la salida en todos los casos,
+                            ej: "tokens" (ver comparadores.py). Opcional;
+                            un caso puede traer su propio "comparador".
+        rendimiento (dict): puntaje por eficiencia (ver rendimiento.py).
+                            None → se conserva el que ya tenía la tarea
+                            (así volver a guardarla no lo borra); {} lo quita.
+        max_concurrencia (int): tope de calificaciones simultáneas de la
+                            tarea en la cola (ver planificador.py).
+                            None → se conserva el que ya tenía; 0 lo quita.
 
     Cada caso en la lista debe tener:
         - entrada   (str):   lo que se le enviará al programa del estudiante
         - esperado  (str):   lo que el programa debe imprimir
         - puntaje   (float): puntos que vale este caso
+    En vez de entrada/esperado puede traer "entrada_archivo"/"esperado_archivo"
+    (ruta a un archivo): esos, y los textos muy largos, se guardan en el
+    almacén de blobs (ver almacen_blobs.py).
+    A cada caso se le agrega su "hash" (ver hash_caso).
 
     Retorna:
         dict: la configuración completa guardada
     """
     _asegurar_carpeta()
+    anterior = _configuracion_guardada(cod_tarea)
+    if rendimiento is None:
+        rendimiento = anterior.get("rendimiento")
+    if max_concurrencia is None:
+        max_concurrencia = anterior.get("max_concurrencia")
 
     # Calculamos el puntaje total sumando todos los casos
     # round(..., 2) evita errores de punto flotante como 2.5000000001
     puntaje_total = round(sum(caso["puntaje"] for caso in casos), 2)
+    casos = [almacen_blobs.externalizar(caso, comprimir_blobs) for caso in casos]
+    casos = [dict(caso, hash=hash_caso(caso, comparador)) for caso in casos]
 
     configuracion = {
         "cod_tarea":       cod_tarea,
@@ -73,15 +145,35 @@ def guardar_casos(cod_tarea: str, id_profesor: str, casos: list) -> dict:
         "puntaje_total":   puntaje_total,
         "casos":           casos
     }
+    if limites:
+        configuracion["limites"] = limites
+    if comparador is not None:
+        configuracion["comparador"] = comparador
+    if rendimiento:
+        configuracion["rendimiento"] = rendimiento
+    if max_concurrencia:
+        configuracion["max_concurrencia"] = max_concurrencia
 
     # Nombre del archivo: "TAREA-01.json"
     ruta_json = os.path.join(CARPETA_PRUEBAS, f"{cod_tarea}.json")
     with open(ruta_json, "w", encoding="utf-8") as f:
         json.dump(configuracion, f, indent=4, ensure_ascii=False)
 
+    # Las calificaciones guardadas de esta tarea ya no sirven
+    cache_resultados.invalidar_tarea(cod_tarea)
+
     return configuracion
 
 
+def _configuracion_guardada(cod_tarea: str) -> dict:
+    """El JSON de la tarea tal como está en disco, o {} si no existe."""
+    try:
+        with open(os.path.join(CARPETA_PRUEBAS, f"{cod_tarea}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
 def cargar_casos(cod_tarea: str) -> dict:
     """
     Carga los casos de prueba de una tarea desde su JSON.
@@ -100,7 +192,13 @@ def cargar_casos(cod_tarea: str) -> dict:
         return None
 
     with open(ruta_json, "r", encoding="utf-8") as f:
-        return json.load(f)
+        configuracion = json.load(f)
+
+    # Las tareas guardadas antes de existir el hash lo calculan al cargar
+    for caso in configuracion["casos"]:
+        if "hash" not in caso:
+            caso["hash"] = hash_caso(caso, configuracion.get("comparador"))
+    return configuracion
 
 
 def listar_tareas() -> list:
@@ -10,7 +10,8 @@
 #   1. Pedir código de tarea
 #   2. Ver tareas ya existentes
 #   3. Agregar casos uno por uno (entrada, esperado, puntaje)
-#   4. Confirmar y guardar
+#   4. Límites y forma de comparar la salida (opcionales)
+#   5. Confirmar y guardar
 # =============================================================
 
 from test_case_service import guardar_casos, cargar_casos, listar_tareas
@@ -130,6 +131,86 @@ def pedir_caso(numero: int) -> dict:
     }
 
 
+def pedir_limites() -> dict:
+    """
+    Pregunta (opcionalmente) los límites de recursos de la tarea.
+    Dejar un valor vacío significa "sin límite".
+
+    Retorna:
+        dict con los límites escritos, o None si no se configuró ninguno
+    """
+    print()
+    respuesta = input("  ¿Configurar limites de recursos (memoria, CPU...)? (s/n): ").strip().lower()
+    if respuesta != "s":
+        return None
+
+    preguntas = [
+        ("cpu_segundos",      "Segundos de CPU por caso       (ej: 2)"),
+        ("memoria_mb",        "Memoria maxima en MB           (ej: 256)"),
+        ("archivos_abiertos", "Archivos abiertos a la vez     (ej: 32)"),
+        ("procesos",          "Procesos del usuario           (ej: 64)"),
+        ("tamano_archivo_mb", "Tamano maximo de archivo en MB (ej: 1)"),
+    ]
+    print("  Deja vacio para no limitar.")
+    limites = {}
+    for clave, texto in preguntas:
+        while True:
+            valor = input(f"  {texto}: ").strip().replace(",", ".")
+            if not valor:
+                break
+            try:
+                numero = float(valor)
+                if numero <= 0:
+                    print("  ⚠  Debe ser mayor a 0.")
+                    continue
+                limites[clave] = int(numero) if numero.is_integer() else numero
+                break
+            except ValueError:
+                print("  ⚠  Escribe solo un numero.")
+    return limites or None
+
+
+def pedir_comparador():
+    """
+    Pregunta (opcionalmente) cómo comparar la salida de los programas.
+
+    Retorna:
+        el comparador elegido (ver comparadores.py), o None para usar
+        el de siempre (sin distinguir mayúsculas ni espacios del borde)
+    """
+    print()
+    respuesta = input("  ¿Cambiar la forma de comparar la salida? (s/n): ").strip().lower()
+    if respuesta != "s":
+        return None
+
+    opciones = [
+        ("exacto",           "Exacta (distingue mayusculas)"),
+        ("tokens",           "Mismas palabras, sin importar los espacios"),
+        ("numerico",         "Mismas palabras, numeros con tolerancia"),
+        ("regex",            "Cada linea esperada es una expresion regular"),
+        ("lineas_sin_orden", "Mismas lineas en cualquier orden"),
+    ]
+    for i, (_, texto) in enumerate(opciones, start=1):
+        print(f"    {i}. {texto}")
+    while True:
+        eleccion = input("  Opcion: ").strip()
+        if eleccion.isdigit() and 1 <= int(eleccion) <= len(opciones):
+            break
+        print(f"  ⚠  Escribe un numero del 1 al {len(opciones)}.")
+
+    tipo = opciones[int(eleccion) - 1][0]
+    if tipo != "numerico":
+        return tipo
+    while True:
+        valor = input("  Tolerancia (ej: 0.001, vacio = 0.000001): ").strip().replace(",", ".")
+        if not valor:
+            return tipo
+        try:
+            return {"tipo": tipo, "eps_abs": float(valor)}
+        except ValueError:
+            print("  ⚠  Escribe solo un numero.")
+
+
 def preguntar_agregar_otro() -> bool:
     """Pregunta si el profesor quiere agregar otro caso."""
     print()
@@ -161,6 +242,11 @@ def mostrar_exito_configuracion(config: dict):
     print(f"  Tarea          : {config['cod_tarea']}")
     print(f"  Casos creados  : {config['total_casos']}")
     print(f"  Puntaje total  : {config['puntaje_total']} pts")
+    if config.get("limites"):
+        limites = ", ".join(f"{k}={v}" for k, v in config["limites"].items())
+        print(f"  Limites        : {limites}")
+    if config.get("comparador"):
+        print(f"  Comparacion    : {config['comparador']}")
     print(f"  Guardado en    : casos_de_prueba/{config['cod_tarea']}.json")
     print()
     print("✅ " * 18)
@@ -221,8 +307,11 @@ def ejecutar_panel_profesor():
         mostrar_error("No ingresaste ningun caso. No se guardo nada.")
         return
 
+    limites    = pedir_limites()
+    comparador = pedir_comparador()
+
     if confirmar_guardado(cod_tarea, casos):
-        config = guardar_casos(cod_tarea, id_profesor, casos)
+        config = guardar_casos(cod_tarea, id_profesor, casos, limites, comparador=comparador)
         mostrar_exito_configuracion(config)
     else:
         print()
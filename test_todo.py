@@ -8,6 +8,9 @@
 
 import os
 import json
+import hashlib
+import shutil
+import tempfile
 
 # Contador global de resultados
 total_pruebas = 0
@@ -35,6 +38,13 @@ def seccion(titulo: str):
     print("=" * 56)
 
 
+def carpeta_temporal(nombre: str) -> str:
+    """Carpeta nueva y vacía dentro de temp_tests: cada ejecución usa otra."""
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    os.makedirs(carpeta_temp, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{nombre}_", dir=carpeta_temp)
+
+
 # =============================================================
 # PRUEBAS: file_validator.py
 # =============================================================
@@ -87,7 +97,8 @@ def probar_file_validator():
 def probar_transaction_service():
     seccion("transaction_service.py")
     from transaction_service import (
-        generar_id_transaccion, guardar_registro, guardar_archivo_fisico
+        generar_id_transaccion, guardar_registro, guardar_archivo_fisico,
+        cargar_registro, listar_registros
     )
 
     id1 = generar_id_transaccion()
@@ -106,13 +117,28 @@ def probar_transaction_service():
     prueba("El estado es RECIBIDO",            registro["estado"] == "RECIBIDO")
     prueba("El id_estudiante es correcto",     registro["id_estudiante"] == "STU-TEST")
 
-    ruta_json = os.path.join("registros_entregas", f"{id_t}.json")
-    prueba("El archivo JSON existe en disco", os.path.isfile(ruta_json))
+    carpeta_segmentos = os.path.join("registros_entregas", "segmentos")
+    prueba("El registro se guardo en un segmento",
+           any(n.endswith(".jsonl") for n in os.listdir(carpeta_segmentos)))
+    prueba("No se crea un JSON por entrega",
+           not os.path.isfile(os.path.join("registros_entregas", f"{id_t}.json")))
 
-    if os.path.isfile(ruta_json):
-        with open(ruta_json, "r") as f:
-            datos = json.load(f)
-        prueba("El JSON contiene el id correcto", datos["id_transaccion"] == id_t)
+    datos = cargar_registro(id_t)
+    prueba("El registro guardado contiene el id correcto",
+           datos is not None and datos["id_transaccion"] == id_t)
+    prueba("cargar_registro de un id inexistente es None",
+           cargar_registro("TXN-NO-EXISTE") is None)
+
+    # Un registro antiguo (un JSON por entrega) se sigue leyendo
+    id_antiguo = generar_id_transaccion()
+    with open(os.path.join("registros_entregas", f"{id_antiguo}.json"), "w") as f:
+        json.dump({"id_transaccion": id_antiguo, "id_estudiante": "STU-VIEJO"}, f)
+    prueba("cargar_registro lee el formato antiguo",
+           (cargar_registro(id_antiguo) or {}).get("id_estudiante") == "STU-VIEJO")
+    ids_listados = [r["id_transaccion"] for r in listar_registros()]
+    prueba("listar_registros incluye ambos formatos",
+           id_t in ids_listados and id_antiguo in ids_listados)
+    os.remove(os.path.join("registros_entregas", f"{id_antiguo}.json"))
 
     contenido_prueba = b"print('hola mundo')\n"
     ruta_guardada    = guardar_archivo_fisico(id_t, "tarea_test.py", contenido_prueba)
@@ -212,11 +238,1511 @@ def probar_grader():
     prueba("Los resultados tienen campo error",
            any(r["error"] for r in resultado["resultados"]))
 
+    # -- ejecucion en paralelo vs uno tras otro --
+    paralelo  = calificar(ruta_parcial, "TEST-GRADER", trabajadores=4)
+    secuencia = calificar(ruta_parcial, "TEST-GRADER", trabajadores=1)
+    prueba("En paralelo los casos conservan su orden",
+           [r["caso_id"] for r in paralelo["resultados"]] == [1, 2])
+    prueba("Paralelo y secuencial dan la misma nota",
+           paralelo["nota_obtenida"] == secuencia["nota_obtenida"])
+
+    # -- politicas de corte --
+    ruta_sintaxis = os.path.join(carpeta_temp, "test_sintaxis.py")
+    with open(ruta_sintaxis, "w") as f:
+        f.write("print(\n")
+
+    resultado = calificar(ruta_sintaxis, "TEST-GRADER", usar_cache=False,
+                          precompilar=False,
+                          politica={"abortar_si_no_compila": True})
+    omitidos  = [r["omitido"] for r in resultado["resultados"]]
+    prueba("Si no compila solo se ejecuta el primer caso", omitidos == [False, True])
+    prueba("El caso omitido explica el motivo",
+           "no compila" in resultado["resultados"][1]["motivo_omision"])
+
+    resultado = calificar(ruta_error, "TEST-GRADER", usar_cache=False,
+                          politica={"abortar_si_no_compila": True})
+    prueba("Un error en ejecucion no corta la calificacion",
+           not any(r["omitido"] for r in resultado["resultados"]))
+
+    # -- precompilacion --
+    resultado = calificar(ruta_sintaxis, "TEST-GRADER", usar_cache=False)
+    prueba("Si no compila hay un unico diagnostico",
+           "SyntaxError" in resultado.get("error_compilacion", ""))
+    prueba("Si no compila no se ejecuta ningun caso",
+           all(r["omitido"] for r in resultado["resultados"]))
+
+    from precompilador import precompilar
+    ruta_pyc, diagnostico = precompilar(ruta_correcto)
+    prueba("Un archivo valido genera su .pyc",
+           diagnostico == "" and os.path.isfile(ruta_pyc))
+    prueba("El mismo contenido reutiliza el mismo .pyc",
+           precompilar(ruta_correcto)[0] == ruta_pyc)
+
+    from grader import ejecutar_programa
+    ruta_rutas = os.path.join(carpeta_temp, "test_rutas.py")
+    with open(ruta_rutas, "w") as f:
+        f.write("import sys\nprint(__file__)\nprint(sys.argv[0])\nprint(sys.path[0])\n")
+    ejecucion = ejecutar_programa(precompilar(ruta_rutas)[0], "")
+    prueba("Con el .pyc, __file__, argv[0] y path[0] son los del .py",
+           ejecucion["salida"].splitlines() == [os.path.abspath(ruta_rutas), ruta_rutas,
+                                                os.path.dirname(os.path.abspath(ruta_rutas))],
+           ejecucion["salida"] + ejecucion["error"])
+
+    resultado = calificar(ruta_error, "TEST-GRADER", usar_cache=False)
+    prueba("El traceback del .pyc muestra el .py original",
+           "test_error.py" in resultado["resultados"][0]["error"])
+
+    # -- salida con tope de bytes --
+    import captura_limitada
+    from grader import ejecutar_programa
+    ruta_inunda = os.path.join(carpeta_temp, "test_inunda.py")
+    with open(ruta_inunda, "w") as f:
+        f.write("while True:\n    print('x' * 100)\n")
+
+    limite_original = captura_limitada.LIMITE_SALIDA_BYTES
+    captura_limitada.LIMITE_SALIDA_BYTES = 10000
+    try:
+        ejecucion = ejecutar_programa(ruta_inunda, "")
+    finally:
+        captura_limitada.LIMITE_SALIDA_BYTES = limite_original
+    prueba("Imprimir sin fin se corta por tamano, no por tiempo",
+           ejecucion["truncado"] and not ejecucion["timeout"])
+    prueba("La salida guardada respeta el tope", len(ejecucion["salida"]) <= 10000)
+
+    ruta_dormilon = os.path.join(carpeta_temp, "test_dormilon.py")
+    with open(ruta_dormilon, "w") as f:
+        f.write("import time\ntime.sleep(3)\n")
+    ejecucion = ejecutar_programa(ruta_dormilon, "", tiempo_limite=0.5)
+    prueba("tiempo_limite se pasa sin tocar el global",
+           ejecucion["timeout"] and "0.5" in ejecucion["error"])
+    prueba("Una salida normal no se marca truncada",
+           not ejecutar_programa(ruta_correcto, "2 3")["truncado"])
+
+    # -- consumo de recursos --
+    resultado = calificar(ruta_correcto, "TEST-GRADER", usar_cache=False)
+    recursos  = resultado["resultados"][0]["recursos"]
+    prueba("Cada caso mide su tiempo de reloj", recursos["segundos_reales"] > 0)
+    if hasattr(os, "wait4"):
+        prueba("Cada caso mide su memoria maxima", recursos["memoria_pico_kb"] > 0)
+    prueba("La entrega trae el consumo total",
+           resultado["recursos"]["casos_medidos"] == 2)
+
     # -- tarea inexistente --
     resultado = calificar(ruta_correcto, "TAREA-FANTASMA")
     prueba("Tarea inexistente retorna error", "error" in resultado)
 
 
+# =============================================================
+# PRUEBAS: limites_recursos.py
+# =============================================================
+def probar_limites_recursos():
+    seccion("limites_recursos.py")
+    import signal
+    import limites_recursos
+    from test_case_service import guardar_casos, cargar_casos
+    from grader import calificar
+
+    normalizados = limites_recursos.normalizar({"memoria_mb": 64, "otra_cosa": 1})
+    prueba("normalizar completa las claves que faltan",
+           normalizados["cpu_segundos"] is None and normalizados["memoria_mb"] == 64)
+    prueba("normalizar ignora claves desconocidas", "otra_cosa" not in normalizados)
+    prueba("Sin limites el comando no se envuelve",
+           limites_recursos.comando(["python", "x.py"], None, "python") == ["python", "x.py"])
+
+    if not limites_recursos.LIMITES_DISPONIBLES:
+        print("  (resource no disponible en este sistema, se omite el resto)")
+        return
+
+    prueba("SIGXCPU se reconoce como limite de CPU",
+           limites_recursos.detectar({"cpu_segundos": 1}, -signal.SIGXCPU, "") == "cpu")
+    prueba("Un error comun no es un limite",
+           limites_recursos.detectar({"memoria_mb": 64}, 1, "NameError: x") is None)
+
+    config = guardar_casos("TEST-LIMITES", "PROF-TEST",
+                           [{"id": 1, "entrada": "", "esperado": "ok", "puntaje": 1.0}],
+                           limites={"memoria_mb": 200})
+    prueba("Los limites se guardan junto a los casos",
+           cargar_casos("TEST-LIMITES")["limites"] == {"memoria_mb": 200})
+
+    ruta_memoria = os.path.join(os.getcwd(), "temp_tests", "test_memoria.py")
+    with open(ruta_memoria, "w") as f:
+        f.write("x = bytearray(1024 * 1024 * 1024)\nprint('ok')\n")
+
+    resultado = calificar(ruta_memoria, "TEST-LIMITES", usar_cache=False)
+    caso = resultado["resultados"][0]
+    prueba("Reservar 1 GB con limite de 200 MB marca 'memoria'",
+           caso["limite_excedido"] == "memoria")
+    prueba("El error explica el limite", "memoria" in caso["error"].lower())
+
+    from grader import ejecutar_programa
+    from precompilador import precompilar
+    ruta_limite = os.path.join(os.getcwd(), "temp_tests", "test_ver_limite.py")
+    with open(ruta_limite, "w") as f:
+        f.write("import resource, sys\n"
+                "print(resource.getrlimit(resource.RLIMIT_NOFILE)[0], sys.argv[0])\n")
+    ejecucion = ejecutar_programa(precompilar(ruta_limite)[0], "",
+                                  limites={"archivos_abiertos": 64})
+    prueba("El envoltorio aplica el limite antes de ejecutar el .pyc",
+           ejecucion["salida"] == f"64 {ruta_limite}", ejecucion["salida"] + ejecucion["error"])
+
+    os.remove(os.path.join("casos_de_prueba", "TEST-LIMITES.json"))
+
+
+# =============================================================
+# PRUEBAS: metricas.py
+# =============================================================
+def probar_metricas():
+    seccion("metricas.py")
+    from metricas import registrar_calificacion, cargar_metricas, resumen_por_tarea
+
+    calificacion = {
+        "cod_tarea": "TEST-METRICAS", "nombre_archivo": "tarea.py", "porcentaje": 50.0,
+        "segundos_calificacion": 0.2,
+        "recursos": {"casos_medidos": 1, "segundos_reales": 0.1, "cpu_usuario": 0.05,
+                     "cpu_sistema": 0.01, "memoria_pico_kb": 9000},
+        "resultados": [{"caso_id": 1, "timeout": False, "recursos": None}],
+    }
+    registrar_calificacion(calificacion)
+    registrar_calificacion(calificacion)
+
+    registros = cargar_metricas("TEST-METRICAS")
+    prueba("Se guarda una linea por calificacion", len(registros) >= 2)
+
+    resumen = resumen_por_tarea(registros)["TEST-METRICAS"]
+    prueba("El resumen suma la CPU de la tarea", resumen["cpu_total"] >= 0.12)
+    prueba("El resumen guarda la memoria maxima", resumen["memoria_pico_kb"] == 9000)
+
+    from metricas import resumen_por_estudiante
+    registrar_calificacion(calificacion, "STU-METRICAS")
+    registrar_calificacion(calificacion, "STU-METRICAS")
+    por_estudiante = resumen_por_estudiante(cargar_metricas("TEST-METRICAS"))
+    prueba("El resumen por estudiante suma sus calificaciones",
+           por_estudiante["STU-METRICAS"]["calificaciones"] == 2
+           and por_estudiante["STU-METRICAS"]["cpu_total"] >= 0.12, str(por_estudiante))
+
+    import subprocess
+    import sys
+    codigo = ("import metricas\n"
+              "c = {'cod_tarea': 'TEST-METRICAS-PAR', 'nombre_archivo': 'x' * 5000,\n"
+              "     'porcentaje': 0.0, 'resultados': []}\n"
+              "for _ in range(50):\n"
+              "    metricas.registrar_calificacion(c, 'STU-PAR')\n")
+    procesos = [subprocess.Popen([sys.executable, "-c", codigo]) for _ in range(4)]
+    for proceso in procesos:
+        proceso.wait()
+    prueba("Las lineas de varios procesos no se mezclan",
+           len(cargar_metricas("TEST-METRICAS-PAR")) >= 200)
+
+
+# =============================================================
+# PRUEBAS: cache_resultados.py
+# =============================================================
+def probar_cache_resultados():
+    seccion("cache_resultados.py")
+    import cache_resultados
+    from test_case_service import guardar_casos
+    from grader import calificar
+
+    casos = [
+        {"id": 1, "entrada": "2 3",  "esperado": "5",  "puntaje": 5.0},
+        {"id": 2, "entrada": "10 5", "esperado": "15", "puntaje": 5.0},
+    ]
+    guardar_casos("TEST-CACHE", "PROF-TEST", casos)
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    ruta_a = os.path.join(carpeta_temp, "test_cache_a.py")
+    ruta_b = os.path.join(carpeta_temp, "test_cache_b.py")
+    for ruta in (ruta_a, ruta_b):
+        with open(ruta, "w") as f:
+            f.write("a, b = map(int, input().split())\nprint(a + b)\n")
+
+    primera = calificar(ruta_a, "TEST-CACHE")
+    prueba("La primera calificacion se ejecuta", not primera["desde_cache"])
+
+    copia = calificar(ruta_b, "TEST-CACHE")
+    prueba("Un archivo identico sale de la cache", copia["desde_cache"])
+    prueba("La copia conserva su propio nombre", copia["nombre_archivo"] == "test_cache_b.py")
+    prueba("La copia tiene la misma nota", copia["nota_obtenida"] == primera["nota_obtenida"])
+
+    sin_cache = calificar(ruta_b, "TEST-CACHE", usar_cache=False)
+    prueba("usar_cache=False ejecuta de nuevo", not sin_cache["desde_cache"])
+
+    guardar_casos("TEST-CACHE", "PROF-TEST", casos)
+    prueba("guardar_casos invalida la cache de la tarea",
+           not calificar(ruta_a, "TEST-CACHE")["desde_cache"])
+
+    clave_1 = cache_resultados.calcular_clave("abc", casos, {"tiempo_limite": 5})
+    clave_2 = cache_resultados.calcular_clave("abc", casos, {"tiempo_limite": 9})
+    prueba("Cambiar los ajustes cambia la clave", clave_1 != clave_2)
+
+    # La caché solo se recorre cuando la cuenta de bytes pasa del límite
+    cache_resultados.invalidar_tarea("TEST-CACHE")
+    mediciones = []
+    expulsar_original = cache_resultados._expulsar_si_hace_falta
+    limite_original   = cache_resultados.LIMITE_BYTES_CACHE
+    def expulsar_contado():
+        mediciones.append(1)
+        return expulsar_original()
+    cache_resultados._expulsar_si_hace_falta = expulsar_contado
+    cache_resultados._cuenta.update(bytes=None, escrituras=0)
+    try:
+        cache_resultados.LIMITE_BYTES_CACHE = 10 ** 9
+        for i in range(10):
+            cache_resultados.guardar("TEST-CACHE", f"clave-{i}", {"relleno": "x" * 1000})
+        prueba("Guardar no recorre la cache en cada escritura", len(mediciones) == 1,
+               str(len(mediciones)))
+        cache_resultados.LIMITE_BYTES_CACHE = 5000
+        cache_resultados.guardar("TEST-CACHE", "clave-final", {"relleno": "x" * 1000})
+        quedan = os.listdir(os.path.join(cache_resultados.CARPETA_CACHE, "TEST-CACHE"))
+        prueba("Al pasar el limite se expulsa lo menos usado",
+               len(mediciones) == 2 and 0 < len(quedan) <= 5, str(quedan))
+    finally:
+        cache_resultados._expulsar_si_hace_falta = expulsar_original
+        cache_resultados.LIMITE_BYTES_CACHE      = limite_original
+        cache_resultados._cuenta.update(bytes=None, escrituras=0)
+
+    cache_resultados.invalidar_tarea("TEST-CACHE")
+    os.remove(os.path.join("casos_de_prueba", "TEST-CACHE.json"))
+
+
+# =============================================================
+# PRUEBAS: grader_lote.py
+# =============================================================
+def probar_grader_lote():
+    seccion("grader_lote.py")
+    from grader_lote import calificar_lote, rutas_de_registros
+
+    carpeta_temp  = os.path.join(os.getcwd(), "temp_tests")
+    ruta_correcto = os.path.join(carpeta_temp, "test_correcto.py")
+    ruta_error    = os.path.join(carpeta_temp, "test_error.py")
+
+    resultados = list(calificar_lote("TEST-GRADER", [ruta_correcto, ruta_error], procesos=2))
+    prueba("El lote entrega un resultado por archivo", len(resultados) == 2)
+
+    por_ruta = {r["ruta"]: r for r in resultados}
+    prueba("El correcto saca 10.0 en el lote", por_ruta[ruta_correcto]["nota_obtenida"] == 10.0)
+    prueba("El erroneo saca 0.0 en el lote",   por_ruta[ruta_error]["nota_obtenida"] == 0.0)
+    prueba("Cada resultado trae su tiempo",    all("segundos" in r for r in resultados))
+
+    prueba("Lote vacio no produce resultados", list(calificar_lote("TEST-GRADER", [])) == [])
+    prueba("Transaccion inexistente se ignora",
+           rutas_de_registros(["TXN-NO-EXISTE"]) == [])
+
+
+# =============================================================
+# PRUEBAS: grader_async.py
+# =============================================================
+def probar_grader_async():
+    seccion("grader_async.py")
+    import asyncio
+    import grader
+    from grader_async import calificar_async, calificar_lote_async, ejecutar_programa_async
+
+    carpeta_temp  = os.path.join(os.getcwd(), "temp_tests")
+    ruta_correcto = os.path.join(carpeta_temp, "test_correcto.py")
+    ruta_parcial  = os.path.join(carpeta_temp, "test_parcial.py")
+    ruta_lento    = os.path.join(carpeta_temp, "test_lento.py")
+    with open(ruta_lento, "w") as f:
+        f.write("while True:\n    pass\n")
+
+    resultado = asyncio.run(calificar_async(ruta_correcto, "TEST-GRADER", usar_cache=False))
+    prueba("calificar_async da 10.0 al correcto", resultado["nota_obtenida"] == 10.0)
+    prueba("calificar_async conserva el orden",
+           [r["caso_id"] for r in resultado["resultados"]] == [1, 2])
+
+    lote = asyncio.run(calificar_lote_async("TEST-GRADER", [ruta_correcto, ruta_parcial]))
+    prueba("El lote async respeta el orden de las rutas",
+           [c["nombre_archivo"] for c in lote] == ["test_correcto.py", "test_parcial.py"])
+
+    limite_original = grader.TIEMPO_LIMITE_SEGUNDOS
+    grader.TIEMPO_LIMITE_SEGUNDOS = 1
+    try:
+        ejecucion = asyncio.run(ejecutar_programa_async(ruta_lento, ""))
+    finally:
+        grader.TIEMPO_LIMITE_SEGUNDOS = limite_original
+    prueba("Un bucle infinito termina en timeout", ejecucion["timeout"])
+
+    resultado = asyncio.run(calificar_async(ruta_correcto, "TAREA-FANTASMA"))
+    prueba("Tarea inexistente retorna error (async)", "error" in resultado)
+
+    import grader_async
+    import threading
+    hilos = []
+    cargar_original = grader_async.cargar_casos
+    def cargar_espiado(cod_tarea):
+        hilos.append(threading.current_thread())
+        return cargar_original(cod_tarea)
+    grader_async.cargar_casos = cargar_espiado
+    try:
+        asyncio.run(calificar_async(ruta_correcto, "TEST-GRADER"))
+    finally:
+        grader_async.cargar_casos = cargar_original
+    prueba("cargar_casos no corre en el hilo del event loop",
+           hilos and threading.main_thread() not in hilos)
+
+
+# =============================================================
+# PRUEBAS: fork_server.py
+# =============================================================
+def probar_fork_server():
+    seccion("fork_server.py")
+    from fork_server import ServidorFork, FORK_DISPONIBLE
+    from grader import calificar
+
+    if not FORK_DISPONIBLE:
+        print("  (fork no disponible en este sistema, se omite)")
+        return
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    os.makedirs(carpeta_temp, exist_ok=True)
+    ruta_correcto = os.path.join(carpeta_temp, "test_fork.py")
+    ruta_salida   = os.path.join(carpeta_temp, "test_fork_exit.py")
+    with open(ruta_correcto, "w") as f:
+        f.write("a, b = map(int, input().split())\nprint(a + b)\n")
+    with open(ruta_salida, "w") as f:
+        f.write("import sys\nprint('hola')\nsys.exit(3)\n")
+
+    with ServidorFork() as servidor:
+        resultado = calificar(ruta_correcto, "TEST-GRADER",
+                              ejecutor=servidor.ejecutar_programa)
+        prueba("Con fork-server la nota es 10.0", resultado["nota_obtenida"] == 10.0)
+
+        ejecucion = servidor.ejecutar_programa(ruta_salida, "")
+        prueba("Captura la salida antes de sys.exit", ejecucion["salida"] == "hola")
+        prueba("sys.exit(3) cuenta como excepcion",  ejecucion["excepcion"])
+
+        from precompilador import precompilar
+        ruta_rutas = os.path.join(carpeta_temp, "test_fork_rutas.py")
+        with open(ruta_rutas, "w") as f:
+            f.write("import sys\nprint(__file__)\nprint(sys.argv[0])\n")
+        ejecucion = servidor.ejecutar_programa(precompilar(ruta_rutas)[0], "")
+        prueba("Con fork-server y .pyc, __file__ y argv[0] son los del .py",
+               ejecucion["salida"].splitlines() == [os.path.abspath(ruta_rutas), ruta_rutas],
+               ejecucion["salida"] + ejecucion["error"])
+
+
+# =============================================================
+# PRUEBAS: cola_trabajos.py
+# =============================================================
+def probar_cola_trabajos():
+    seccion("cola_trabajos.py")
+    import cola_trabajos
+    from transaction_service import (
+        generar_id_transaccion, guardar_registro, guardar_archivo_fisico
+    )
+
+    carpeta_original = cola_trabajos.CARPETA_COLA
+    carpeta = cola_trabajos.CARPETA_COLA = carpeta_temporal("cola")
+    try:
+        id_t = generar_id_transaccion()
+        guardar_registro(id_t, "cola.py", 40, "STU-COLA")
+        guardar_archivo_fisico(id_t, "cola.py", b"# cola\na, b = map(int, input().split())\nprint(a + b)\n")
+
+        id_trabajo = cola_trabajos.encolar(id_t, "TEST-GRADER")
+        prueba("Encolar retorna el id del trabajo", isinstance(id_trabajo, int))
+        prueba("Encolar dos veces no duplica",
+               cola_trabajos.encolar(id_t, "TEST-GRADER") == id_trabajo)
+        prueba("Entrega inexistente no se encola",
+               cola_trabajos.encolar("TXN-NO-EXISTE", "TEST-GRADER") is None)
+
+        # Simula un trabajador que murio tras terminar el caso 1
+        trabajo = cola_trabajos.tomar_trabajo("otra-maquina:1")
+        prueba("Tomar trabajo lo pasa a ejecutando",
+               cola_trabajos.obtener_trabajo(id_t, "TEST-GRADER")["estado"] == cola_trabajos.EJECUTANDO)
+        prueba("Un trabajo tomado no se entrega dos veces", cola_trabajos.tomar_trabajo() is None)
+
+        from test_case_service import cargar_casos, hash_caso
+        caso_1 = cargar_casos("TEST-GRADER")["casos"][0]
+        cola_trabajos.guardar_checkpoint(trabajo["id"], caso_1, {
+            "caso_id": 1, "entrada": "2 3", "esperado": "5", "obtenido": "DEL CHECKPOINT",
+            "paso": True, "puntaje_posible": 5.0, "puntaje_obtenido": 5.0, "error": "",
+            "timeout": False, "omitido": False,
+        })
+        prueba("Con latido reciente no se recupera", cola_trabajos.recuperar_trabajos_huerfanos() == 0)
+        prueba("Un checkpoint con otro comparador de tarea no se reutiliza",
+               cola_trabajos.casos_terminados(
+                   trabajo["id"], [dict(caso_1, hash=hash_caso(caso_1, "tokens"))]) == {})
+
+        # Un caso largo (sin checkpoints) igual mantiene vivo el latido
+        import threading
+        import time
+        conexion = cola_trabajos._conectar()
+        conexion.execute("UPDATE trabajos SET latido = 0 WHERE id = ?", (trabajo["id"],))
+        intervalo_original = cola_trabajos.INTERVALO_LATIDO_SEGUNDOS
+        cola_trabajos.INTERVALO_LATIDO_SEGUNDOS = 0.05
+        listo = threading.Event()
+        hilo  = threading.Thread(target=cola_trabajos._latir, args=(trabajo["id"], listo))
+        hilo.start()
+        time.sleep(0.3)
+        listo.set()
+        hilo.join()
+        cola_trabajos.INTERVALO_LATIDO_SEGUNDOS = intervalo_original
+        latido = conexion.execute("SELECT latido FROM trabajos WHERE id = ?",
+                                  (trabajo["id"],)).fetchone()["latido"]
+        conexion.close()
+        prueba("El hilo de latido lo renueva sin esperar a un caso", latido > 0)
+
+        latido_original = cola_trabajos.LATIDO_VENCIDO_SEGUNDOS
+        cola_trabajos.LATIDO_VENCIDO_SEGUNDOS = -1
+        try:
+            prueba("Con latido vencido vuelve a la cola",
+                   cola_trabajos.recuperar_trabajos_huerfanos() == 1)
+        finally:
+            cola_trabajos.LATIDO_VENCIDO_SEGUNDOS = latido_original
+
+        procesados = list(cola_trabajos.trabajar())
+        prueba("El trabajador procesa el trabajo retomado", len(procesados) == 1)
+        calificacion = cola_trabajos.obtener_trabajo(id_t, "TEST-GRADER")["calificacion"]
+        prueba("El trabajo queda terminado",
+               cola_trabajos.obtener_trabajo(id_t, "TEST-GRADER")["estado"] == cola_trabajos.TERMINADO)
+        prueba("El caso con checkpoint no se vuelve a ejecutar",
+               calificacion["resultados"][0]["obtenido"] == "DEL CHECKPOINT")
+        prueba("El caso sin checkpoint si se ejecuta",
+               calificacion["resultados"][1]["obtenido"] == "15")
+        prueba("La calificacion final es 10.0", calificacion["nota_obtenida"] == 10.0)
+        prueba("contar_por_estado cuenta el terminado",
+               cola_trabajos.contar_por_estado("TEST-GRADER")[cola_trabajos.TERMINADO] == 1)
+    finally:
+        cola_trabajos.CARPETA_COLA = carpeta_original
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# =============================================================
+# PRUEBAS: planificador.py
+# =============================================================
+def probar_planificador():
+    seccion("planificador.py")
+    import cola_trabajos
+    from planificador import elegir_siguiente, CARRIL_FINAL, CARRIL_PRACTICA
+
+    def cabeza(id_trabajo, estudiante, tarea="T1", carril=CARRIL_FINAL):
+        return {"id": id_trabajo, "id_estudiante": estudiante,
+                "cod_tarea": tarea, "carril": carril}
+
+    elegido = elegir_siguiente(
+        [cabeza(1, "A", carril=CARRIL_PRACTICA), cabeza(2, "B")], {}, {}, {}, topes={})
+    prueba("La entrega final va antes que la de practica", elegido["id"] == 2)
+
+    elegido = elegir_siguiente(
+        [cabeza(1, "SPAM"), cabeza(9, "B")], {}, {}, {"SPAM": 100.0}, topes={})
+    prueba("Gana el estudiante atendido hace mas tiempo", elegido["id"] == 9)
+
+    elegido = elegir_siguiente(
+        [cabeza(1, "A"), cabeza(2, "B")], {}, {"A": 1}, {}, topes={})
+    prueba("Gana el estudiante con menos trabajos ejecutando", elegido["id"] == 2)
+
+    elegido = elegir_siguiente(
+        [cabeza(1, "A", "GRANDE"), cabeza(2, "B", "CHICA")], {"GRANDE": 2}, {}, {},
+        topes={"GRANDE": 2})
+    prueba("Una tarea en su tope no se elige", elegido["id"] == 2)
+    prueba("Sin cupo en ninguna tarea no se elige nada",
+           elegir_siguiente([cabeza(1, "A", "GRANDE")], {"GRANDE": 2}, {}, {},
+                            topes={"GRANDE": 2}) is None)
+
+    # Un estudiante encola 3 entregas antes que otro encole 1:
+    # la del segundo no espera a las 3
+    carpeta_original = cola_trabajos.CARPETA_COLA
+    carpeta = cola_trabajos.CARPETA_COLA = carpeta_temporal("cola_justa")
+    try:
+        ruta = os.path.join(os.getcwd(), "temp_tests", "test_correcto.py")
+        for numero in range(3):
+            cola_trabajos.encolar(f"TXN-SPAM-{numero}", "TEST-GRADER", ruta, id_estudiante="SPAM")
+        cola_trabajos.encolar("TXN-OTRO", "TEST-GRADER", ruta, id_estudiante="OTRO")
+
+        primero = cola_trabajos.tomar_trabajo()
+        segundo = cola_trabajos.tomar_trabajo()
+        prueba("La cola alterna entre estudiantes",
+               [primero["id_transaccion"], segundo["id_transaccion"]] == ["TXN-SPAM-0", "TXN-OTRO"])
+
+        estadisticas = cola_trabajos.estadisticas_cola()
+        prueba("estadisticas_cola reporta la profundidad",
+               estadisticas["profundidad"][CARRIL_FINAL] == 2)
+        prueba("estadisticas_cola reporta lo que se ejecuta",
+               estadisticas["ejecutando_por_tarea"] == {"TEST-GRADER": 2})
+        prueba("estadisticas_cola mide la espera", estadisticas["espera_promedio"] is not None)
+
+        conexion = cola_trabajos._conectar()
+        atendidos = {fila["id_estudiante"] for fila in conexion.execute(
+            "SELECT id_estudiante FROM atencion_estudiantes")}
+        conexion.close()
+        prueba("Se recuerda cuando se atendio a cada estudiante", atendidos == {"SPAM", "OTRO"})
+
+        # max_concurrencia se define al guardar la tarea y sobrevive a volver a guardarla
+        from test_case_service import guardar_casos, cargar_casos
+        casos_tope = [{"id": 1, "entrada": "2 3", "esperado": "5", "puntaje": 5.0}]
+        guardar_casos("TEST-TOPE", "PROF-TEST", casos_tope, max_concurrencia=1)
+        guardar_casos("TEST-TOPE", "PROF-TEST", casos_tope)
+        prueba("Volver a guardar la tarea conserva max_concurrencia",
+               cargar_casos("TEST-TOPE").get("max_concurrencia") == 1)
+        cola_trabajos.encolar("TXN-TOPE-1", "TEST-TOPE", ruta, id_estudiante="T1")
+        cola_trabajos.encolar("TXN-TOPE-2", "TEST-TOPE", ruta, id_estudiante="T2")
+        tomados = [cola_trabajos.tomar_trabajo() for _ in range(3)]
+        prueba("La cola respeta el max_concurrencia de la tarea",
+               {t["id_transaccion"] for t in tomados if t} & {"TXN-TOPE-1", "TXN-TOPE-2"}
+               == {"TXN-TOPE-1"}, str(tomados))
+    finally:
+        cola_trabajos.CARPETA_COLA = carpeta_original
+        shutil.rmtree(carpeta, ignore_errors=True)
+        ruta_tope = os.path.join("casos_de_prueba", "TEST-TOPE.json")
+        if os.path.exists(ruta_tope):
+            os.remove(ruta_tope)
+
+
+# =============================================================
+# PRUEBAS: recalificacion.py
+# =============================================================
+def probar_recalificacion():
+    seccion("recalificacion.py")
+    from test_case_service import guardar_casos, hash_caso
+    from grader import calificar
+    from recalificacion import recalificar, diferencia_casos
+
+    caso = {"id": 1, "entrada": "2 3", "esperado": "5", "puntaje": 5.0}
+    prueba("El hash no depende del id del caso",
+           hash_caso(caso) == hash_caso(dict(caso, id=7)))
+    prueba("El hash cambia si cambia el esperado",
+           hash_caso(caso) != hash_caso(dict(caso, esperado="6")))
+    prueba("El hash cambia si el caso pasa a medirse por rendimiento",
+           hash_caso(caso) != hash_caso(dict(caso, nivel_rendimiento="exigente")))
+
+    config = guardar_casos("TEST-RECAL", "PROF-TEST", [
+        {"id": 1, "entrada": "2 3",  "esperado": "5",  "puntaje": 5.0},
+        {"id": 2, "entrada": "10 5", "esperado": "99", "puntaje": 5.0},
+        {"id": 3, "entrada": "1 1",  "esperado": "2",  "puntaje": 5.0},
+    ])
+    prueba("guardar_casos agrega el hash a cada caso",
+           all(c["hash"] == hash_caso(c) for c in config["casos"]))
+
+    ruta = os.path.join(os.getcwd(), "temp_tests", "test_correcto.py")
+    previa = calificar(ruta, "TEST-RECAL", usar_cache=False)
+    prueba("Cada resultado recuerda el hash de su caso",
+           [r["hash_caso"] for r in previa["resultados"]] == [c["hash"] for c in config["casos"]])
+    # Marca para saber si el caso 1 se reutilizo o se volvio a ejecutar
+    previa["resultados"][0]["obtenido"] = "REUTILIZADO"
+
+    # El profesor corrige el caso 2, borra el 3 y agrega uno nuevo
+    config = guardar_casos("TEST-RECAL", "PROF-TEST", [
+        {"id": 1, "entrada": "2 3",  "esperado": "5",  "puntaje": 5.0},
+        {"id": 2, "entrada": "10 5", "esperado": "15", "puntaje": 5.0},
+        {"id": 3, "entrada": "4 4",  "esperado": "8",  "puntaje": 2.0},
+    ])
+    diferencia = diferencia_casos(previa["resultados"], config["casos"])
+    prueba("La diferencia detecta los casos a ejecutar", diferencia["a_ejecutar"] == [2, 3])
+    prueba("La diferencia descarta el cambiado y el eliminado",
+           diferencia["descartados"] == [2, 3])
+
+    nueva = recalificar(previa, ruta, "TEST-RECAL")
+    prueba("Solo se ejecutan los casos nuevos o cambiados", nueva["casos_ejecutados"] == 2)
+    prueba("El caso sin cambios se reutiliza",
+           nueva["resultados"][0]["obtenido"] == "REUTILIZADO")
+    prueba("La nota se recalcula con los casos nuevos",
+           nueva["nota_obtenida"] == 12.0 and nueva["nota_maxima"] == 12.0)
+
+    completa = recalificar(previa, ruta, "TEST-RECAL", completa=True)
+    prueba("Con completa=True se ejecuta todo",
+           completa["resultados"][0]["obtenido"] == "5")
+
+    os.remove(os.path.join("casos_de_prueba", "TEST-RECAL.json"))
+
+
+# =============================================================
+# PRUEBAS: grader_distribuido.py
+# =============================================================
+def probar_grader_distribuido():
+    seccion("grader_distribuido.py")
+    import hashlib
+    import socket
+    import subprocess
+    import sys
+    import threading
+    import time
+    import grader_distribuido
+    from grader_distribuido import Coordinador, _enviar, _recibir
+
+    carpeta_temp  = os.path.join(os.getcwd(), "temp_tests")
+    ruta_correcto = os.path.join(carpeta_temp, "test_distribuido.py")
+    ruta_error    = os.path.join(carpeta_temp, "test_error.py")
+    with open(ruta_correcto, "w") as f:
+        f.write("# distribuido\na, b = map(int, input().split())\nprint(a + b)\n")
+    with open(ruta_correcto, "rb") as f:
+        hash_correcto = hashlib.sha256(f.read()).hexdigest()
+
+    def esperar_trabajadores(coordinador, cantidad):
+        limite = time.time() + 15
+        while len(coordinador.trabajadores_conectados()) < cantidad and time.time() < limite:
+            time.sleep(0.05)
+        return len(coordinador.trabajadores_conectados()) >= cantidad
+
+    procesos = []
+    with Coordinador() as coordinador:
+        host, puerto = coordinador.direccion
+
+        # Un trabajador que ya tiene la entrega y muere a la mitad
+        falso = socket.create_connection((host, puerto))
+        _enviar(falso, {"tipo": "hola", "nombre": "falso", "hashes": [hash_correcto]})
+        esperar_trabajadores(coordinador, 1)
+        trabajo = coordinador.enviar(ruta_correcto, "TEST-GRADER", usar_cache=False)
+        pedido  = _recibir(falso)
+        prueba("El coordinador manda los casos de la entrega", len(pedido["casos"]) == 2)
+        prueba("No reenvia el archivo si el trabajador ya lo tiene", "contenido" not in pedido)
+        caso_1 = pedido["casos"][0]
+        _enviar(falso, {"tipo": "resultado", "id": pedido["id"], "resultado": {
+            "caso_id": caso_1["id"], "hash_caso": caso_1["hash"], "entrada": "2 3",
+            "esperado": "5", "obtenido": "DEL FALSO", "paso": True, "puntaje_posible": 5.0,
+            "puntaje_obtenido": 5.0, "error": "", "timeout": False, "omitido": False}})
+        falso.close()
+
+        # Trabajadores que se caen antes de aceptar la entrega: no gastan intentos
+        for i in range(grader_distribuido.MAX_REPARTOS):
+            inactivo = socket.create_connection((host, puerto))
+            inactivo.settimeout(15)
+            _enviar(inactivo, {"tipo": "hola", "nombre": f"inactivo-{i}", "hashes": []})
+            _recibir(inactivo)
+            inactivo.close()
+        prueba("Un trabajador que cae antes de aceptar no gasta intentos",
+               trabajo["repartos"] == 1 and not trabajo["listo"].is_set(),
+               str(trabajo["repartos"]))
+
+        for _ in range(2):
+            procesos.append(subprocess.Popen(
+                [sys.executable, "grader_distribuido.py", "trabajador",
+                 "--coordinador", f"{host}:{puerto}"]))
+        prueba("Los trabajadores se conectan", esperar_trabajadores(coordinador, 2))
+
+        calificacion = coordinador.esperar(trabajo, timeout=30)
+        prueba("La entrega del trabajador caido se reasigna",
+               calificacion is not None and calificacion["repartos"] == 2)
+        prueba("Solo se reasignan los casos que faltaban",
+               calificacion["resultados"][0]["obtenido"] == "DEL FALSO")
+        prueba("La calificacion reasignada es correcta", calificacion["nota_obtenida"] == 10.0)
+
+        lote = coordinador.calificar_lote("TEST-GRADER", [ruta_correcto, ruta_error])
+        prueba("El lote distribuido respeta el orden",
+               [c["nombre_archivo"] for c in lote] == ["test_distribuido.py", "test_error.py"])
+        prueba("El erroneo saca 0.0 en un trabajador remoto", lote[1]["nota_obtenida"] == 0.0)
+
+        import cache_resultados
+        import grader
+        from test_case_service import cargar_casos
+        config   = cargar_casos("TEST-GRADER")
+        politica = dict(grader.POLITICA_POR_DEFECTO)
+        clave    = grader._clave_cache(ruta_error, config, Coordinador, politica)
+        prueba("El coordinador no comparte la clave de cache de grader.calificar",
+               clave != grader._clave_cache(ruta_error, config, grader.ejecutar_programa, politica))
+        guardada = cache_resultados.buscar("TEST-GRADER", clave)
+        prueba("El cache distribuido no guarda quien la califico",
+               guardada is not None and "trabajador" not in guardada)
+
+    for proceso in procesos:
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+    prueba("Los trabajadores terminan al cerrarse el coordinador",
+           all(p.returncode is not None for p in procesos))
+
+    # Un pedido cuyo contenido no calza con su hash no tumba al trabajador
+    import base64
+    servidor = socket.create_server(("127.0.0.1", 0))
+    servidor.settimeout(15)
+    hilo = threading.Thread(target=grader_distribuido.ejecutar_trabajador,
+                            args=(servidor.getsockname(), "prueba-falla"), daemon=True)
+    hilo.start()
+    conexion, _ = servidor.accept()
+    conexion.settimeout(15)
+    _recibir(conexion)   # "hola"
+    with open(ruta_correcto, "rb") as f:
+        contenido = f.read()
+    pedido = {"tipo": "trabajo", "id": 1, "hash": "0" * 64, "casos": config["casos"],
+              "limites": None, "comparador": None, "politica": politica,
+              "tiempo_limite": grader.TIEMPO_LIMITE_SEGUNDOS,
+              "contenido": base64.b64encode(contenido).decode("ascii")}
+    _enviar(conexion, pedido)
+    aviso = _recibir(conexion)
+    prueba("Un pedido con hash incorrecto responde 'falla'",
+           aviso is not None and aviso["tipo"] == "falla" and aviso["id"] == 1, str(aviso))
+    _enviar(conexion, dict(pedido, id=2, hash=hash_correcto))
+    tipos = []
+    while not tipos or tipos[-1] not in ("terminado", "falla"):
+        mensaje = _recibir(conexion)
+        if mensaje is None:
+            break
+        tipos.append(mensaje["tipo"])
+    prueba("El trabajador sigue atendiendo despues de una falla",
+           tipos[-1:] == ["terminado"] and tipos.count("resultado") == 2, str(tipos))
+    conexion.close()
+    servidor.close()
+    hilo.join(timeout=10)
+    prueba("El trabajador termina al cerrarse la conexion", not hilo.is_alive())
+
+
+# =============================================================
+# PRUEBAS: rendimiento.py
+# =============================================================
+def probar_rendimiento():
+    seccion("rendimiento.py")
+    import rendimiento
+    from test_case_service import guardar_casos, cargar_casos
+    from grader import calificar
+    from limites_recursos import LIMITES_DISPONIBLES
+
+    escala = [[2.0, 1.0], [4.0, 0.5]]
+    prueba("Razon dentro del primer tramo da 100%", rendimiento.fraccion_por_razon(1.3, escala) == 1.0)
+    prueba("Razon en el segundo tramo da 50%",      rendimiento.fraccion_por_razon(3.0, escala) == 0.5)
+    prueba("Razon fuera de la escala da 0",         rendimiento.fraccion_por_razon(9.0, escala) == 0.0)
+
+    mediana, descartadas = rendimiento._mediana_sin_atipicos([0.10, 0.11, 0.10, 0.12, 0.90])
+    prueba("La muestra atipica se descarta", descartadas == 1 and abs(mediana - 0.105) < 1e-9)
+
+    if not LIMITES_DISPONIBLES:
+        print("  (el sistema no mide CPU, se omite la calificacion por eficiencia)")
+        return
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    ruta_referencia = os.path.join(carpeta_temp, "referencia.py")
+    ruta_rapido     = os.path.join(carpeta_temp, "test_rapido.py")
+    ruta_lento      = os.path.join(carpeta_temp, "test_lento_rend.py")
+    trabajo = "n = int(input())\nprint(sum(range(n)) * 0 + n)\n"
+    with open(ruta_referencia, "w") as f:
+        f.write(trabajo)
+    with open(ruta_rapido, "w") as f:
+        f.write("# rapido\n" + trabajo)
+    with open(ruta_lento, "w") as f:
+        f.write("n = int(input())\nfor _ in range(12):\n    sum(range(n))\nprint(n)\n")
+
+    casos_rend = [
+        {"id": 1, "entrada": "2000000", "esperado": "2000000", "puntaje": 5.0,
+         "nivel_rendimiento": "exigente"},
+    ]
+    config_rend = {"referencia": ruta_referencia, "repeticiones": 3, "calentamiento": 0,
+                   "niveles": {"exigente": {"puntaje": 5.0, "escala": escala}}}
+    # Solo se cuentan (y se borran al final) las mediciones de esta prueba
+    def referencias():
+        if not os.path.isdir(rendimiento.CARPETA_REFERENCIAS):
+            return set()
+        return set(os.listdir(rendimiento.CARPETA_REFERENCIAS))
+
+    previas = referencias()
+    try:
+        guardar_casos("TEST-REND", "PROF-TEST", casos_rend, rendimiento=config_rend)
+
+        rapido = calificar(ruta_rapido, "TEST-REND", usar_cache=False)
+        prueba("La nota maxima incluye los puntos de eficiencia", rapido["nota_maxima"] == 10.0)
+        prueba("Igual de eficiente que la referencia: puntaje completo",
+               rapido["nota_obtenida"] == 10.0)
+        prueba("Se guarda la medicion de la referencia",
+               len(referencias() - previas) == 1)
+
+        lento = calificar(ruta_lento, "TEST-REND", usar_cache=False)
+        prueba("El lento es correcto pero pierde los puntos de eficiencia",
+               lento["resultados"][0]["paso"] and lento["nota_obtenida"] == 5.0)
+        prueba("La razon de CPU refleja la lentitud",
+               lento["resultados"][0]["rendimiento"]["razon_cpu"] > 4.0)
+        prueba("La referencia no se vuelve a medir",
+               len(referencias() - previas) == 1)
+
+        guardar_casos("TEST-REND", "PROF-TEST", casos_rend)
+        prueba("Volver a guardar la tarea conserva su rendimiento",
+               cargar_casos("TEST-REND").get("rendimiento") == config_rend)
+        guardar_casos("TEST-REND", "PROF-TEST", casos_rend, rendimiento={})
+        prueba("rendimiento={} lo quita", "rendimiento" not in cargar_casos("TEST-REND"))
+    finally:
+        for nombre in referencias() - previas:
+            os.remove(os.path.join(rendimiento.CARPETA_REFERENCIAS, nombre))
+        os.remove(os.path.join("casos_de_prueba", "TEST-REND.json"))
+
+
+def probar_almacen_blobs():
+    seccion("almacen_blobs.py / comparadores.py")
+    import asyncio
+    import almacen_blobs
+    import captura_limitada
+    import comparadores
+    from test_case_service import guardar_casos, cargar_casos
+    from grader import calificar
+    from grader_async import calificar_async
+
+    # Al final se borran los blobs de esta prueba (y la carpeta, si queda vacia)
+    def blobs():
+        if not os.path.isdir(almacen_blobs.CARPETA_BLOBS):
+            return set()
+        return set(os.listdir(almacen_blobs.CARPETA_BLOBS))
+
+    blobs_previos = blobs()
+
+    ref1 = almacen_blobs.guardar_texto("mismo contenido")
+    ref2 = almacen_blobs.guardar_texto("mismo contenido")
+    prueba("Dos textos iguales comparten el blob",
+           ref1 == ref2 and os.path.isfile(almacen_blobs.ruta_blob(ref1)))
+
+    ref_gz = almacen_blobs.guardar_texto("abc" * 1000, comprimir=True)
+    with almacen_blobs.abrir(ref_gz) as f:
+        prueba("El blob comprimido se lee descomprimido", f.read() == b"abc" * 1000)
+    prueba("El blob comprimido ocupa menos",
+           os.path.getsize(almacen_blobs.ruta_blob(ref_gz)) < ref_gz["bytes"])
+
+    grande = "x" * (almacen_blobs.UMBRAL_BLOB_BYTES + 1)
+    caso = almacen_blobs.externalizar({"entrada": grande, "esperado": "1"})
+    prueba("Una entrada mas larga que el umbral va al almacen",
+           caso["entrada"] == "" and caso["entrada_blob"]["bytes"] == len(grande))
+    prueba("Un esperado corto se queda en el JSON",
+           caso["esperado"] == "1" and "esperado_blob" not in caso)
+
+    def comparar(esperado, bloques):
+        comparador = comparadores.ComparadorNormalizado(esperado)
+        for bloque in bloques:
+            comparador.alimentar(bloque)
+        return comparador.terminar()
+
+    prueba("Comparador: mismo texto partido en bloques",
+           comparar("hola mundo\n", [b"ho", b"la mu", b"ndo\n"]))
+    prueba("Comparador: \\r\\n partido entre bloques y mayusculas",
+           comparar("A\nB", [b"a\r", b"\nb\r\n"]))
+    prueba("Comparador: espacios al inicio y al final no cuentan",
+           comparar("uno dos", [b"  \n uno", b" ", b"dos", b"  \n\n"]))
+    prueba("Comparador: la 'a' con tilde partida entre bloques",
+           comparar("á", ["á".encode("utf-8")[:1], "á".encode("utf-8")[1:]]))
+    prueba("Comparador: salida incompleta no coincide", not comparar("uno dos", [b"uno"]))
+    prueba("Comparador: salida de mas no coincide", not comparar("uno", [b"uno dos"]))
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    ruta_eco  = os.path.join(carpeta_temp, "test_eco_blob.py")
+    ruta_malo = os.path.join(carpeta_temp, "test_eco_malo.py")
+    ruta_datos = os.path.join(carpeta_temp, "datos_grandes.txt")
+    with open(ruta_eco, "w") as f:
+        f.write("import sys\nsys.stdout.write(sys.stdin.read().upper())\n")
+    with open(ruta_malo, "w") as f:
+        f.write("import sys\nsys.stdin.read()\nprint('nada')\n")
+    lineas = "".join(f"linea {i}\n" for i in range(20000))
+    with open(ruta_datos, "w") as f:
+        f.write(lineas)
+
+    guardar_casos("TEST-BLOB", "PROF-TEST", [
+        {"id": 1, "entrada_archivo": ruta_datos, "esperado": lineas, "puntaje": 5.0},
+        {"id": 2, "entrada": "hola", "esperado_archivo": ruta_datos, "puntaje": 5.0},
+    ])
+    config = cargar_casos("TEST-BLOB")
+    prueba("guardar_casos mueve archivos y textos largos al almacen",
+           config["casos"][0]["entrada"] == "" and config["casos"][0]["esperado"] == ""
+           and "esperado_blob" in config["casos"][1])
+
+    # El eco imprime ~200 KB: con un tope de 10 KB igual se compara completo
+    limite_original = captura_limitada.LIMITE_SALIDA_BYTES
+    captura_limitada.LIMITE_SALIDA_BYTES = 10000
+    try:
+        bien = calificar(ruta_eco, "TEST-BLOB", usar_cache=False)
+        mal  = calificar(ruta_malo, "TEST-BLOB", usar_cache=False)
+        en_async = asyncio.run(calificar_async(ruta_eco, "TEST-BLOB", usar_cache=False))
+    finally:
+        captura_limitada.LIMITE_SALIDA_BYTES = limite_original
+    prueba("Caso con blobs: la salida correcta pasa aunque supere el tope",
+           bien["resultados"][0]["paso"] and not bien["resultados"][0]["truncado"])
+    prueba("Caso con blobs: la salida incorrecta falla",
+           not mal["resultados"][0]["paso"] and not mal["resultados"][1]["paso"])
+    prueba("Caso con blobs: el motor asincrono compara igual",
+           en_async["resultados"][0]["paso"])
+    prueba("El resultado recuerda el blob para la interfaz",
+           bien["resultados"][0]["entrada_blob"]["bytes"] == len(lineas))
+
+    os.remove(os.path.join("casos_de_prueba", "TEST-BLOB.json"))
+    for nombre in blobs() - blobs_previos:
+        os.remove(os.path.join(almacen_blobs.CARPETA_BLOBS, nombre))
+    if not os.listdir(almacen_blobs.CARPETA_BLOBS):
+        os.rmdir(almacen_blobs.CARPETA_BLOBS)
+
+
+def probar_comparadores():
+    seccion("comparadores.py")
+    import comparadores
+    from test_case_service import guardar_casos, cargar_casos, hash_caso
+    from grader import calificar
+
+    def compara(especificacion, esperado, *bloques):
+        comparador = comparadores.para_caso({"id": 1, "esperado": esperado}, especificacion)
+        for bloque in bloques:
+            comparador.alimentar(bloque)
+        return comparador.terminar()
+
+    prueba("normalizado: ignora mayusculas y bordes", compara(None, "Hola", b"  HO", b"LA\n"))
+    prueba("exacto: distingue mayusculas",            not compara("exacto", "Hola", b"hola"))
+    prueba("exacto: igual con salto final",           compara("exacto", "Hola", b"Hola\n"))
+    prueba("tokens: cualquier espacio entre palabras", compara("tokens", "1 2\n3", b"1\n", b"2   3"))
+    prueba("tokens: palabra partida entre bloques",   compara("tokens", "abc", b"a", b"bc"))
+    prueba("tokens: una palabra de mas falla",        not compara("tokens", "1 2", b"1 2 3"))
+    prueba("numerico: dentro de la tolerancia",
+           compara({"tipo": "numerico", "eps_abs": 0.01}, "pi 3.14", b"pi 3.141", b"59"))
+    prueba("numerico: fuera de la tolerancia",        not compara("numerico", "3.14", b"3.15"))
+    prueba("numerico: las palabras se comparan igual", not compara("numerico", "x 1", b"y 1"))
+    prueba("regex: cada linea calza completa",        compara("regex", "\\d+\nfin.*", b"42\nfinal\n"))
+    prueba("regex: calce parcial no sirve",           not compara("regex", "\\d+", b"42a"))
+    prueba("lineas_sin_orden: otro orden coincide",   compara("lineas_sin_orden", "a\nb\nc", b"c\na", b"\nb"))
+    prueba("lineas_sin_orden: linea repetida falla",  not compara("lineas_sin_orden", "a\nb", b"a\na"))
+
+    try:
+        comparadores.compilar({"id": 1, "esperado": ""}, "inventado")
+        prueba("Un comparador desconocido se rechaza", False)
+    except ValueError:
+        prueba("Un comparador desconocido se rechaza", True)
+
+    caso = {"entrada": "", "esperado": "1", "puntaje": 1.0}
+    prueba("El comparador cambia el hash del caso",
+           hash_caso(caso) != hash_caso(caso, "tokens") == hash_caso(dict(caso, comparador="tokens")))
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    ruta = os.path.join(carpeta_temp, "test_comparadores.py")
+    with open(ruta, "w") as f:
+        f.write("a, b = map(float, input().split())\nprint('Resultado:', a / b)\n")
+    guardar_casos("TEST-COMP", "PROF-TEST", [
+        {"id": 1, "entrada": "1 3", "esperado": "Resultado:\n0.3333", "puntaje": 1.0,
+         "comparador": {"tipo": "numerico", "eps_abs": 0.001}},
+        {"id": 2, "entrada": "4 2", "esperado": "Resultado:   2.0", "puntaje": 1.0},
+        {"id": 3, "entrada": "4 2", "esperado": "resultado: 2.0", "puntaje": 1.0},
+    ], comparador="tokens")
+    calificacion = calificar(ruta, "TEST-COMP", usar_cache=False)
+    pasos = [r["paso"] for r in calificacion["resultados"]]
+    prueba("Comparador por caso y por tarea al calificar", pasos == [True, True, False])
+
+    config = cargar_casos("TEST-COMP")
+    prueba("Las reglas de la tarea se preparan una sola vez",
+           comparadores.preparar_tarea(config) is comparadores.preparar_tarea(cargar_casos("TEST-COMP")))
+
+    hasheados = []
+    hash_original = comparadores.cache_resultados.hash_datos
+    comparadores.cache_resultados.hash_datos = lambda datos: hasheados.append(datos) or hash_original(datos)
+    try:
+        comparadores.preparar_tarea(cargar_casos("TEST-COMP"))
+    finally:
+        comparadores.cache_resultados.hash_datos = hash_original
+    prueba("Con los hash de cargar_casos no se vuelve a hashear el esperado", hasheados == [])
+    otra = dict(config, casos=[dict(config["casos"][0], esperado="otro", hash="otro")])
+    prueba("Un caso con otro hash tiene otras reglas",
+           comparadores.preparar_tarea(otra)[1] is not comparadores.preparar_tarea(config)[1])
+
+    config["comparador"] = "inventado"
+    with open(os.path.join("casos_de_prueba", "TEST-COMP.json"), "w") as f:
+        json.dump(config, f)
+    prueba("Una tarea con comparador invalido da error",
+           "error" in calificar(ruta, "TEST-COMP", usar_cache=False))
+
+    os.remove(os.path.join("casos_de_prueba", "TEST-COMP.json"))
+
+
+def probar_diferencias():
+    seccion("diferencias.py")
+    import almacen_blobs
+    import diferencias
+    from test_case_service import guardar_casos
+    from grader import calificar
+
+    ventana = diferencias.primera_diferencia("a\nb\nc\nd\ne".split("\n"),
+                                             "A\nb\nc\nX\ne".split("\n"))
+    prueba("Encuentra la primera linea distinta", ventana["linea"] == 4)
+    prueba("Guarda solo unas lineas de contexto",
+           ventana["desde"] == 2 and ventana["comunes"] == ["b", "c"]
+           and ventana["esperado"] == ["d", "e"] and ventana["obtenido"] == ["X", "e"])
+    prueba("Lineas en blanco al final no son diferencia",
+           diferencias.primera_diferencia(["a"], ["a", "", ""]) is None)
+    prueba("Salida que termina antes: ventana vacia de ese lado",
+           diferencias.primera_diferencia(["a", "b"], ["a"])["obtenido"] == [])
+    prueba("Con comparador exacto, las mayusculas cuentan",
+           diferencias.primera_diferencia(["a"], ["A"], ignorar_mayusculas=False)["linea"] == 1)
+
+    # La ventana compara cada línea con el comparador de la tarea
+    ventana = diferencias.para_caso({"esperado": "a b\nc"}, "a   b\nd", "tokens")
+    prueba("Con tokens, los espacios de mas no son la diferencia",
+           ventana is not None and ventana["linea"] == 2, str(ventana))
+    ventana = diferencias.para_caso({"esperado": "0.3333 x\n2.0\n5"}, "0.33334 x\n2\n6",
+                                    {"tipo": "numerico", "eps_abs": 0.001})
+    prueba("Con numerico, los valores dentro de la tolerancia no son la diferencia",
+           ventana is not None and ventana["linea"] == 3, str(ventana))
+    ventana = diferencias.para_caso({"esperado": "\\d+\nhola"}, "42\nchao", "regex")
+    prueba("Con regex, una linea que calza con su patron no es la diferencia",
+           ventana is not None and ventana["linea"] == 2, str(ventana))
+    prueba("Con lineas_sin_orden no hay ventana",
+           diferencias.para_caso({"esperado": "a\nb"}, "c\na", "lineas_sin_orden") is None)
+
+    carpeta_temp = os.path.join(os.getcwd(), "temp_tests")
+    ruta = os.path.join(carpeta_temp, "test_diferencia_larga.py")
+    with open(ruta, "w") as f:
+        f.write("for i in range(30000):\n    print(i if i != 20000 else 'error')\n")
+    esperado = "\n".join(str(i) for i in range(30000))
+    # El esperado supera el umbral y va al almacen de blobs: se borra al final
+    blobs_previos = set(os.listdir(almacen_blobs.CARPETA_BLOBS)) \
+        if os.path.isdir(almacen_blobs.CARPETA_BLOBS) else set()
+    guardar_casos("TEST-DIFF", "PROF-TEST", [
+        {"id": 1, "entrada": "", "esperado": esperado, "puntaje": 1.0},
+    ])
+    resultado = calificar(ruta, "TEST-DIFF", usar_cache=False)["resultados"][0]
+    prueba("El caso largo falla en la linea correcta",
+           not resultado["paso"] and resultado["diferencia"]["linea"] == 20001)
+    prueba("La ventana muestra lo esperado y lo obtenido",
+           resultado["diferencia"]["esperado"][0] == "20000"
+           and resultado["diferencia"]["obtenido"][0] == "error")
+    prueba("El resultado no guarda las salidas enteras",
+           len(resultado["obtenido"]) < 2100 and len(resultado["esperado"]) < 2100)
+    os.remove(os.path.join("casos_de_prueba", "TEST-DIFF.json"))
+    for nombre in set(os.listdir(almacen_blobs.CARPETA_BLOBS)) - blobs_previos:
+        os.remove(os.path.join(almacen_blobs.CARPETA_BLOBS, nombre))
+    if not os.listdir(almacen_blobs.CARPETA_BLOBS):
+        os.rmdir(almacen_blobs.CARPETA_BLOBS)
+
+    ruta_tokens = os.path.join(carpeta_temp, "test_diferencia_tokens.py")
+    with open(ruta_tokens, "w") as f:
+        f.write("print('total:    3')\nprint('fin', 2)\n")
+    guardar_casos("TEST-DIFF-TOKENS", "PROF-TEST", [
+        {"id": 1, "entrada": "", "esperado": "total: 3\nfin 1", "puntaje": 1.0},
+    ], comparador="tokens")
+    try:
+        resultado = calificar(ruta_tokens, "TEST-DIFF-TOKENS", usar_cache=False)["resultados"][0]
+    finally:
+        os.remove(os.path.join("casos_de_prueba", "TEST-DIFF-TOKENS.json"))
+    prueba("Al calificar, la ventana usa el comparador de la tarea",
+           not resultado["paso"] and resultado["diferencia"]["linea"] == 2,
+           str(resultado["diferencia"]))
+
+
+def probar_prueba_carga():
+    seccion("prueba_carga.py")
+    from prueba_carga import ejecutar_carga, _percentil, TAREA_CARGA
+
+    prueba("Percentil por rango mas cercano",
+           _percentil(list(range(1, 101)), 95) == 95 and _percentil([7], 99) == 7)
+
+    carpeta = os.getcwd()
+    reporte = ejecutar_carga(estudiantes=8, entregas_por_estudiante=1, tiempo_limite=0.5,
+                             mezcla={"correcta": 1, "incorrecta": 1, "falla": 1,
+                                     "bucle": 1, "inunda": 1}, semilla=3)
+    prueba("La carga termina sin errores ni notas equivocadas",
+           reporte["errores"] == 0 and reporte["notas_erradas"] == 0, str(reporte["detalle_errores"]))
+    prueba("Reporta percentiles de cada etapa",
+           all(reporte["etapas"][e]["cantidad"] == 8 for e in reporte["etapas"])
+           and reporte["etapas"]["calificar"]["p99"] >= reporte["etapas"]["calificar"]["p50"])
+    prueba("Corre en una carpeta temporal",
+           os.getcwd() == carpeta
+           and not os.path.exists(os.path.join("casos_de_prueba", f"{TAREA_CARGA}.json")))
+
+
+def probar_benchmark_todo():
+    seccion("benchmark_todo.py")
+    import benchmark_todo
+
+    datos = benchmark_todo.medir(lambda: sum(range(100)), repeticiones=3, calentamiento=1)
+    prueba("medir reporta estadisticas por llamada",
+           datos["repeticiones"] == 3 and datos["lote"] >= 1
+           and datos["minimo"] <= datos["mediana"] <= datos["maximo"])
+
+    resultados = benchmark_todo.ejecutar_benchmarks("validar_archivo", repeticiones=2,
+                                                    calentamiento=1)
+    prueba("Se puede elegir que benchmarks correr",
+           list(resultados["benchmarks"]) == ["file_validator.validar_archivo"])
+
+    base   = {"benchmarks": {"a": {"mediana": 1.0}, "b": {"mediana": 1.0}}}
+    actual = {"benchmarks": {"a": {"mediana": 1.1}, "b": {"mediana": 1.5}, "c": {"mediana": 9}}}
+    regresiones = [nombre for nombre, _, es in benchmark_todo.comparar(actual, base, 0.25) if es]
+    prueba("El modo regresion marca solo lo que empeoro mas del umbral", regresiones == ["b"])
+
+
+# =============================================================
+# PRUEBAS: registro_segmentado.py
+# =============================================================
+def probar_registro_segmentado():
+    seccion("registro_segmentado.py")
+    import threading
+    import registro_segmentado
+    from registro_segmentado import RegistroSegmentado
+
+    carpeta = carpeta_temporal("registro_segmentado")
+    carpeta_antigua = carpeta_temporal("registro_antiguo")
+    try:
+        registro = RegistroSegmentado(carpeta, tamano_maximo=2000)
+        for i in range(40):
+            registro.agregar({"id_transaccion": f"TXN-{i:03d}", "id_estudiante": f"STU-{i % 3}"})
+
+        segmentos = [n for n in os.listdir(registro.carpeta) if n.endswith(".jsonl")]
+        prueba("Un segmento lleno rota al siguiente", len(segmentos) > 1, str(segmentos))
+        prueba("Los segmentos cerrados tienen su indice",
+               len([n for n in os.listdir(registro.carpeta) if n.endswith(".idx")]) == len(segmentos) - 1)
+        prueba("buscar encuentra un registro de un segmento cerrado",
+               registro.buscar("TXN-002") == {"id_transaccion": "TXN-002", "id_estudiante": "STU-2"})
+        prueba("buscar encuentra un registro del segmento activo",
+               registro.buscar("TXN-039")["id_estudiante"] == "STU-0")
+        prueba("buscar un id inexistente es None", registro.buscar("TXN-999") is None)
+        prueba("registros() respeta el orden de llegada",
+               [r["id_transaccion"] for r in registro.registros()] == [f"TXN-{i:03d}" for i in range(40)])
+        registro.cerrar()
+
+        # Una línea cortada (corte de luz) no estropea el siguiente registro
+        activo = os.path.join(registro.carpeta, max(segmentos))
+        with open(activo, "ab") as f:
+            f.write(b'{"id_transaccion": "TXN-CORT')
+        reabierto = RegistroSegmentado(carpeta, tamano_maximo=2000)
+        prueba("Al reabrir se recupera el indice", len(reabierto) == 40)
+        reabierto.agregar({"id_transaccion": "TXN-NUEVO", "id_estudiante": "STU-9"})
+        prueba("Tras una linea cortada se sigue agregando",
+               reabierto.buscar("TXN-NUEVO") is not None)
+
+        # Otro "proceso" (otra instancia) ve lo que agrega el primero
+        otro = RegistroSegmentado(carpeta, tamano_maximo=2000)
+        reabierto.agregar({"id_transaccion": "TXN-DESPUES", "id_estudiante": "STU-9"})
+        prueba("Otra instancia encuentra registros agregados despues",
+               otro.buscar("TXN-DESPUES") is not None)
+
+        # Un proceso que no vio la rotación escribe en un segmento ya cerrado
+        with open(os.path.join(registro.carpeta, min(segmentos)), "ab") as f:
+            f.write(b'{"id_transaccion":"TXN-TARDIO"}\n')
+        nuevo = RegistroSegmentado(carpeta, tamano_maximo=2000)
+        prueba("Un registro tardio en un segmento cerrado se encuentra",
+               otro.buscar("TXN-TARDIO") is not None and nuevo.buscar("TXN-TARDIO") is not None)
+        nuevo.cerrar()
+
+        # Fsync por grupos: muchos hilos a la vez, todos quedan
+        def agregar_varios(h):
+            for i in range(25):
+                reabierto.agregar({"id_transaccion": f"TXN-H{h}-{i}", "id_estudiante": "STU-H"})
+        hilos = [threading.Thread(target=agregar_varios, args=(h,)) for h in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        prueba("Escrituras concurrentes: no se pierde ninguna", len(reabierto) == 43 + 200)
+        prueba("Todo lo escrito quedo sincronizado",
+               reabierto._sincronizados == reabierto._escritos)
+        reabierto.cerrar()
+        otro.cerrar()
+
+        # Migración de los registros antiguos
+        for i in range(5):
+            with open(os.path.join(carpeta_antigua, f"TXN-V{i}.json"), "w") as f:
+                json.dump({"id_transaccion": f"TXN-V{i}", "id_estudiante": "STU-V"}, f, indent=4)
+        with open(os.path.join(carpeta_antigua, "TXN-ROTO.json"), "w") as f:
+            f.write("{no es json")
+        resumen = registro_segmentado.migrar(carpeta_antigua)
+        prueba("La migracion importa los registros antiguos",
+               resumen["importados"] == 5 and resumen["danados"] == 1, str(resumen))
+        resumen = registro_segmentado.migrar(carpeta_antigua, borrar=True)
+        prueba("Migrar otra vez no duplica", resumen["ya_estaban"] == 5 and resumen["importados"] == 0)
+        prueba("Con borrar se eliminan los JSON importados",
+               not os.path.exists(os.path.join(carpeta_antigua, "TXN-V0.json"))
+               and registro_segmentado.abrir(carpeta_antigua).buscar("TXN-V0") is not None)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        shutil.rmtree(carpeta_antigua, ignore_errors=True)
+
+
+# =============================================================
+# PRUEBAS: registro_sqlite.py y consultas.py
+# =============================================================
+def probar_registro_sqlite():
+    seccion("registro_sqlite.py / consultas.py")
+    import consultas
+    import registro_sqlite
+    import transaction_service
+
+    carpeta = carpeta_temporal("registro_sqlite")
+    almacen_original = transaction_service.ALMACEN_REGISTROS
+    carpeta_original = transaction_service.CARPETA_REGISTROS
+    transaction_service.ALMACEN_REGISTROS = "sqlite"
+    transaction_service.CARPETA_REGISTROS = carpeta
+    try:
+        ids = []
+        for i in range(7):
+            id_t = transaction_service.generar_id_transaccion()
+            transaction_service.guardar_registro(id_t, f"t{i}.py", 100, f"STU-{i % 2}")
+            ids.append(id_t)
+        prueba("La base se crea en la carpeta de registros",
+               os.path.isfile(registro_sqlite.ruta_base(carpeta)))
+        prueba("cargar_registro lee de la base",
+               transaction_service.cargar_registro(ids[3])["nombre_archivo"] == "t3.py")
+        prueba("listar_registros lee de la base",
+               len(transaction_service.listar_registros()) == 7)
+
+        conexion = registro_sqlite.conectar(carpeta)
+        modo = conexion.execute("PRAGMA journal_mode").fetchone()[0]
+        plan = " ".join(fila[3] for fila in conexion.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM entregas WHERE id_estudiante = ? "
+            "ORDER BY fecha_hora DESC", ("STU-0",)))
+        prueba("La base usa WAL", modo == "wal")
+        prueba("Buscar por estudiante usa un indice", "entregas_estudiante" in plan, plan)
+
+        import threading
+        otra = []
+        def en_otro_hilo():
+            otra.append(registro_sqlite.conectar(carpeta))
+            registro_sqlite.cerrar(carpeta)
+        hilo = threading.Thread(target=en_otro_hilo)
+        hilo.start()
+        hilo.join()
+        prueba("conectar reutiliza la conexion del hilo",
+               registro_sqlite.conectar(carpeta) is conexion)
+        prueba("Otro hilo tiene su propia conexion", otra[0] is not conexion)
+
+        # Paginación: STU-0 tiene 4 entregas (0, 2, 4, 6)
+        pagina_1 = consultas.entregas_de_estudiante("STU-0", limite=3, carpeta=carpeta)
+        pagina_2 = consultas.entregas_de_estudiante("STU-0", limite=3,
+                                                    despues=pagina_1["siguiente"], carpeta=carpeta)
+        vistos = [r["id_transaccion"] for r in pagina_1["registros"] + pagina_2["registros"]]
+        prueba("Las paginas cubren todas las entregas sin repetir",
+               vistos == [ids[6], ids[4], ids[2], ids[0]], str(vistos))
+        prueba("La ultima pagina no tiene siguiente", pagina_2["siguiente"] is None)
+
+        recientes = consultas.entregas_recientes(minutos=60, limite=100, carpeta=carpeta)
+        prueba("Entregas recientes incluye las de recien", len(recientes["registros"]) == 7)
+        prueba("Nada es de 'manana'",
+               consultas.entregas_recientes(desde="9999-01-01", carpeta=carpeta)["registros"] == [])
+
+        for i, porcentaje in ((0, 40.0), (2, 90.0), (1, 70.0)):
+            transaction_service.guardar_calificacion(
+                ids[i], {"cod_tarea": "TAREA-Q", "nota_obtenida": porcentaje / 10,
+                         "nota_maxima": 10.0, "porcentaje": porcentaje, "resultados": []})
+        transaction_service.guardar_calificacion(ids[3], {"error": "No existe configuracion"})
+        ultimas = consultas.ultimas_por_estudiante("TAREA-Q", carpeta=carpeta)["registros"]
+        prueba("Una fila por estudiante con su ultima entrega",
+               [(r["id_estudiante"], r["id_transaccion"]) for r in ultimas]
+               == [("STU-0", ids[2]), ("STU-1", ids[1])], str(ultimas))
+        prueba("La ultima entrega trae su nota", ultimas[0]["porcentaje"] == 90.0)
+        prueba("Una calificacion con error no se guarda",
+               consultas.calificacion_de(ids[3], "TAREA-Q", carpeta=carpeta) is None)
+
+        # Recalificar reemplaza la calificación anterior
+        transaction_service.guardar_calificacion(
+            ids[2], {"cod_tarea": "TAREA-Q", "porcentaje": 95.0, "resultados": []})
+        prueba("Recalificar reemplaza la calificacion",
+               consultas.calificacion_de(ids[2], "TAREA-Q", carpeta=carpeta)["porcentaje"] == 95.0)
+
+        resumen = registro_sqlite.importar(carpeta, [
+            {"id_transaccion": ids[0], "id_estudiante": "STU-0"},
+            {"id_transaccion": "TXN-IMPORTADO", "id_estudiante": "STU-9",
+             "nombre_archivo": "v.py", "tamano_bytes": 1, "fecha_hora": "2020-01-01T00:00:00",
+             "estado": "RECIBIDO"},
+        ])
+        prueba("Importar salta los registros que ya estaban",
+               resumen == {"importados": 1, "ya_estaban": 1}, str(resumen))
+    finally:
+        transaction_service.ALMACEN_REGISTROS = almacen_original
+        transaction_service.CARPETA_REGISTROS = carpeta_original
+        registro_sqlite.cerrar(carpeta)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# =============================================================
+# PRUEBAS: almacen_entregas.py
+# =============================================================
+def probar_almacen_entregas():
+    seccion("almacen_entregas.py")
+    import almacen_entregas
+    from transaction_service import (
+        generar_id_transaccion, guardar_archivo, nombre_sin_prefijo, CARPETA_ARCHIVOS,
+        ruta_archivo_subido,
+    )
+
+    # Contenido único: la primera entrega de esta ejecución es de verdad la primera
+    contenido = f"# plantilla sin tocar ({generar_id_transaccion()})\nprint(input())\n".encode()
+    primera = guardar_archivo(generar_id_transaccion(), "tarea.py", contenido)
+    segunda = guardar_archivo(generar_id_transaccion(), "tarea.py", contenido)
+    prueba("El hash es el SHA-256 del contenido",
+           primera["sha256"] == hashlib.sha256(contenido).hexdigest())
+    prueba("La primera entrega no es duplicada", not primera["duplicado"])
+    prueba("La segunda entrega identica se detecta como duplicada", segunda["duplicado"])
+    prueba("Las dos entregas son el mismo archivo en disco",
+           os.path.samefile(primera["ruta"], segunda["ruta"]))
+    prueba("El blob cuenta dos referencias",
+           almacen_entregas.referencias(primera["sha256"], CARPETA_ARCHIVOS) == 2)
+    with open(segunda["ruta"], "rb") as f:
+        prueba("El contenido se lee igual por la ruta de la entrega", f.read() == contenido)
+
+    prueba("Se quitan los prefijos TXN anidados",
+           nombre_sin_prefijo("TXN-a27a3054-119c-4298-bf32-81a7323727fa_"
+                              "TXN-0f257042-ffed-409f-b8f8-eeb4febf83fc_Vecino.py") == "Vecino.py")
+    prueba("Un nombre sin prefijo no cambia", nombre_sin_prefijo("TXN_tarea.py") == "TXN_tarea.py")
+
+    # Huérfanos: al borrar las entregas el blob se puede limpiar
+    carpeta = carpeta_temporal("almacen_entregas")
+    try:
+        ruta = os.path.join(carpeta, "TXN-x_a.py")
+        datos = almacen_entregas.guardar(b"x = 1\n", ruta, carpeta)
+        os.remove(ruta)
+        gracia = almacen_entregas.GRACIA_HUERFANOS_SEGUNDOS
+        almacen_entregas.GRACIA_HUERFANOS_SEGUNDOS = -1
+        try:
+            prueba("limpiar_huerfanos borra el blob sin entregas",
+                   almacen_entregas.limpiar_huerfanos(carpeta) == 1
+                   and almacen_entregas.referencias(datos["sha256"], carpeta) == 0)
+        finally:
+            almacen_entregas.GRACIA_HUERFANOS_SEGUNDOS = gracia
+
+        # Deduplicar entregas antiguas guardadas como copias
+        for nombre in ("TXN-1_a.py", "TXN-2_a.py", "TXN-3_b.py"):
+            with open(os.path.join(carpeta, nombre), "wb") as f:
+                f.write(b"print('b')\n" if nombre.endswith("b.py") else b"print('a')\n")
+        resumen = almacen_entregas.deduplicar_existentes(carpeta)
+        prueba("Deduplicar libera las copias repetidas",
+               resumen["revisados"] == 3 and resumen["deduplicados"] == 1, str(resumen))
+        prueba("Tras deduplicar las copias son el mismo archivo",
+               os.path.samefile(os.path.join(carpeta, "TXN-1_a.py"), os.path.join(carpeta, "TXN-2_a.py")))
+
+        # Ingesta en una pasada desde una ruta, un archivo abierto o un flujo
+        import io
+        import tracemalloc
+        from file_validator import TAMANO_MAXIMO_BYTES
+        grande = os.path.join(carpeta, "grande.py")
+        with open(grande, "wb") as f:
+            f.write(b"# relleno\n" * (150 * 1024))   # 1.5 MB
+        with open(grande, "rb") as f:
+            sha_grande = hashlib.sha256(f.read()).hexdigest()
+
+        tracemalloc.start()
+        desde_ruta = guardar_archivo(generar_id_transaccion(), "grande.py", grande)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        prueba("Desde una ruta: hash y tamano correctos",
+               desde_ruta["sha256"] == sha_grande and desde_ruta["bytes"] == 150 * 10240)
+        prueba("Desde una ruta no se carga el archivo a memoria",
+               pico < 256 * 1024, f"pico de {pico} bytes")
+
+        desde_flujo = guardar_archivo(generar_id_transaccion(), "grande.py",
+                                      io.BufferedReader(io.BytesIO(open(grande, "rb").read())))
+        prueba("Desde un flujo cualquiera: mismo hash (duplicado)",
+               desde_flujo["sha256"] == sha_grande and desde_flujo["duplicado"])
+
+        ruta_destino = os.path.join(carpeta, "copia_sin_nucleo.py")
+        originales = os.copy_file_range, os.sendfile
+        def sin_soporte(*args):
+            raise OSError(38, "Function not implemented")
+        os.copy_file_range = os.sendfile = sin_soporte
+        try:
+            with open(grande, "rb") as f:
+                sin_nucleo = almacen_entregas.guardar(f, ruta_destino, os.path.join(carpeta, "otro"))
+        finally:
+            os.copy_file_range, os.sendfile = originales
+        with open(ruta_destino, "rb") as f:
+            prueba("Sin copy_file_range ni sendfile se copia por bloques",
+                   sin_nucleo["sha256"] == sha_grande
+                   and hashlib.sha256(f.read()).hexdigest() == sha_grande)
+
+        enorme = os.path.join(carpeta, "enorme.py")
+        with open(enorme, "wb") as f:
+            f.truncate(TAMANO_MAXIMO_BYTES + 1)
+        blobs_antes = len(os.listdir(os.path.join("archivos_subidos", ".blobs")))
+        id_enorme = generar_id_transaccion()
+        try:
+            guardar_archivo(id_enorme, "enorme.py", enorme)
+            rechazo = ""
+        except ValueError as e:
+            rechazo = str(e)
+        prueba("Un archivo de mas de 2MB se rechaza con el mensaje del validador", "MB" in rechazo, rechazo)
+        try:
+            guardar_archivo(id_enorme, "enorme.py", io.BytesIO(b"x" * (TAMANO_MAXIMO_BYTES + 1)))
+            rechazo = ""
+        except ValueError as e:
+            rechazo = str(e)
+        prueba("Un flujo de mas de 2MB se corta y se rechaza", "MB" in rechazo, rechazo)
+        try:
+            guardar_archivo(id_enorme, "vacio.py", b"")
+            rechazo = ""
+        except ValueError as e:
+            rechazo = str(e)
+        prueba("Un archivo vacio se rechaza", "vac" in rechazo, rechazo)
+        prueba("Los rechazados no dejan nada guardado",
+               len(os.listdir(os.path.join("archivos_subidos", ".blobs"))) == blobs_antes
+               and not os.path.exists(ruta_archivo_subido(id_enorme, "enorme.py")))
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# =============================================================
+# PRUEBAS: particiones.py
+# =============================================================
+def probar_particiones():
+    seccion("particiones.py")
+    import particiones
+    from grader_lote import rutas_de_archivos_subidos
+    from transaction_service import generar_id_transaccion, guardar_archivo
+
+    id_t = "TXN-a3f8c1d2-4e5b-4c3a-9d2e-1f5b8c3d7e9a"
+    prueba("La ruta usa los primeros digitos del UUID",
+           particiones.ruta("base", id_t, "x.py") == os.path.join("base", "a3", "f8", "x.py"))
+    prueba("Una clave no hexadecimal tambien se reparte",
+           len(particiones.clave_hex("TXN-NO-EXISTE")) == 64)
+
+    guardado = guardar_archivo(generar_id_transaccion(), "part.py", b"print('p')\n")
+    relativa = os.path.relpath(guardado["ruta"], "archivos_subidos").split(os.sep)
+    prueba("Las entregas nuevas quedan en subcarpetas", len(relativa) == 3, str(relativa))
+    prueba("grader_lote encuentra las entregas en subcarpetas",
+           os.path.normpath(guardado["ruta"]) in map(os.path.normpath, rutas_de_archivos_subidos()))
+
+    # rebalancear() borra una subcarpeta vacía justo después de que la
+    # entrega la creó: la escritura la vuelve a crear y sigue
+    preparar_original, resolver_original = particiones.preparar, particiones.resolver
+    borradas, buscadas = [], []
+    def preparar_y_borrar(ruta_archivo):
+        preparar_original(ruta_archivo)
+        if len(borradas) < 2:
+            borradas.append(ruta_archivo)
+            os.rmdir(os.path.dirname(ruta_archivo))
+        return ruta_archivo
+    def resolver_contando(carpeta, clave, nombre):
+        buscadas.append(carpeta)
+        return resolver_original(carpeta, clave, nombre)
+    particiones.preparar, particiones.resolver = preparar_y_borrar, resolver_contando
+    try:
+        contenido = f"print('{generar_id_transaccion()}')\n".encode()
+        carrera = guardar_archivo(generar_id_transaccion(), "carrera.py", contenido)
+    finally:
+        particiones.preparar, particiones.resolver = preparar_original, resolver_original
+    with open(carrera["ruta"], "rb") as f:
+        prueba("Si rebalancear borra la subcarpeta recien creada, la entrega se guarda igual",
+               len(borradas) == 2 and f.read() == contenido)
+    prueba("Una entrega nueva no se busca en las demas profundidades",
+           "archivos_subidos" not in buscadas, str(buscadas))
+
+    # Migración de una carpeta plana
+    carpeta = carpeta_temporal("particiones")
+    try:
+        ids = [generar_id_transaccion() for _ in range(20)]
+        for id_p in ids:
+            with open(os.path.join(carpeta, f"{id_p}_t.py"), "w") as f:
+                f.write(id_p)
+        os.link(os.path.join(carpeta, f"{ids[0]}_t.py"), os.path.join(carpeta, "otro_enlace"))
+        prueba("resolver encuentra un archivo aun no migrado",
+               particiones.resolver(carpeta, ids[3], f"{ids[3]}_t.py")
+               == os.path.join(carpeta, f"{ids[3]}_t.py"))
+
+        resumen = particiones.rebalancear(carpeta, particiones.clave_de_entrega)
+        prueba("rebalancear mueve todos los archivos planos",
+               resumen == {"revisados": 20, "movidos": 20}, str(resumen))
+        ruta_nueva = particiones.resolver(carpeta, ids[3], f"{ids[3]}_t.py")
+        with open(ruta_nueva) as f:
+            prueba("Tras migrar se resuelve la ruta nueva con el mismo contenido",
+                   ruta_nueva == particiones.ruta(carpeta, ids[3], f"{ids[3]}_t.py")
+                   and f.read() == ids[3])
+        prueba("Los enlaces duros se conservan al mover",
+               os.stat(particiones.resolver(carpeta, ids[0], f"{ids[0]}_t.py")).st_nlink == 2)
+        prueba("Lo que no tiene clave no se mueve",
+               os.path.isfile(os.path.join(carpeta, "otro_enlace")))
+        prueba("Migrar otra vez no mueve nada",
+               particiones.rebalancear(carpeta, particiones.clave_de_entrega)["movidos"] == 0)
+
+        # Cambio de distribución: los archivos se siguen encontrando antes y después
+        niveles = particiones.NIVELES
+        particiones.NIVELES = 3
+        try:
+            prueba("Con otra profundidad se encuentran los archivos sin migrar",
+                   os.path.isfile(particiones.resolver(carpeta, ids[5], f"{ids[5]}_t.py")))
+            particiones.rebalancear(carpeta, particiones.clave_de_entrega)
+            relativa = os.path.relpath(particiones.resolver(carpeta, ids[5], f"{ids[5]}_t.py"), carpeta)
+            prueba("rebalancear pasa a la nueva profundidad", len(relativa.split(os.sep)) == 4, relativa)
+            prueba("Las subcarpetas vacias se borran",
+                   all(len(nombre) == 2 for nombre in os.listdir(carpeta) if nombre != "otro_enlace")
+                   and not any(os.path.isdir(os.path.join(carpeta, n, m))
+                               and not os.listdir(os.path.join(carpeta, n, m))
+                               for n in os.listdir(carpeta) if n != "otro_enlace"
+                               for m in os.listdir(os.path.join(carpeta, n))))
+        finally:
+            particiones.NIVELES = niveles
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
 # =============================================================
 # RESUMEN FINAL
 # =============================================================
@@ -250,4 +1776,24 @@ if __name__ == "__main__":
     probar_transaction_service()
     probar_test_case_service()
     probar_grader()
+    probar_limites_recursos()
+    probar_metricas()
+    probar_cache_resultados()
+    probar_grader_lote()
+    probar_grader_async()
+    probar_fork_server()
+    probar_cola_trabajos()
+    probar_planificador()
+    probar_recalificacion()
+    probar_grader_distribuido()
+    probar_rendimiento()
+    probar_almacen_blobs()
+    probar_comparadores()
+    probar_diferencias()
+    probar_prueba_carga()
+    probar_benchmark_todo()
+    probar_registro_segmentado()
+    probar_registro_sqlite()
+    probar_almacen_entregas()
+    probar_particiones()
     mostrar_resumen()
\ No newline at end of file
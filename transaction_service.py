@@ -7,23 +7,53 @@
 # el registro en JSON. Esto también alimenta la Historia #3
 # (Auditoría Inalterable).
 #
+# Dónde se guardan los registros (ALMACEN_REGISTROS):
+#   "segmentado" → una línea por entrega en segmentos de solo-agregar
+#                  (ver registro_segmentado.py). Por defecto.
+#   "sqlite"     → base con índices, que guarda también las
+#                  calificaciones (ver registro_sqlite.py y consultas.py)
+#   "archivos"   → un JSON indentado por entrega (formato antiguo)
+# cargar_registro() y listar_registros() leen los dos, así que los
+# registros antiguos siguen visibles antes de migrarlos.
+#
+# Los .py entregados se guardan sin copias repetidas: cada
+# entrega es un enlace a un único archivo por contenido (ver
+# almacen_entregas.py) y el registro guarda su SHA-256.
+#
+# Ni archivos_subidos ni los JSON del almacén "archivos" son
+# carpetas planas: cada archivo va en subcarpetas según su id
+# (archivos_subidos/a3/f8/TXN-a3f8..._tarea.py, ver particiones.py).
+#
 # Librerías usadas (todas incluidas en Python, sin instalar):
+#   - re       → quitar prefijos "TXN-..._" de nombres ya guardados
 #   - uuid     → genera IDs únicos garantizados
 #   - json     → guarda los registros en formato legible
 #   - os       → crea carpetas y maneja rutas de archivos
 #   - datetime → registra la fecha y hora exacta
 # =============================================================
 
+import re
 import uuid
 import json
 import os
 from datetime import datetime
 
+import almacen_entregas
+import particiones
+from file_validator import validar_tamano
+import registro_segmentado
+import registro_sqlite
+
 
 # Carpetas donde se guardarán los datos
 CARPETA_REGISTROS = "registros_entregas"   # archivos JSON de auditoría
 CARPETA_ARCHIVOS  = "archivos_subidos"     # los .py entregados por estudiantes
 
+ALMACEN_REGISTROS = "segmentado"           # o "sqlite", o "archivos" (un JSON por entrega)
+
+_PREFIJO_TRANSACCION = re.compile(
+    r"^(TXN-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_)+")
+
 
 # ── Función auxiliar (privada) ────────────────────────────────
 def _asegurar_carpetas():
@@ -52,17 +82,29 @@ def generar_id_transaccion() -> str:
     return f"TXN-{uuid.uuid4()}"
 
 
+def nombre_sin_prefijo(nombre_archivo: str) -> str:
+    """
+    Quita los prefijos "TXN-uuid4_" de un nombre. Si un estudiante
+    vuelve a entregar un archivo sacado de archivos_subidos, su nombre
+    no termina como "TXN-bbb_TXN-aaa_tarea.py".
+    """
+    return _PREFIJO_TRANSACCION.sub("", nombre_archivo) or nombre_archivo
+
+
 def guardar_registro(id_transaccion: str, nombre_archivo: str,
-                     tamano_bytes: int, id_estudiante: str) -> dict:
+                     tamano_bytes: int, id_estudiante: str,
+                     hash_archivo: str = None) -> dict:
     """
-    Crea un archivo JSON con todos los datos de la entrega.
-    Un archivo JSON por entrega → fácil de buscar, leer y auditar.
+    Guarda todos los datos de la entrega en el almacén de registros
+    (ALMACEN_REGISTROS): una línea en el segmento activo, o un
+    archivo JSON por entrega con el formato antiguo.
 
     Parámetros:
         id_transaccion (str): ID único generado por generar_id_transaccion()
         nombre_archivo (str): nombre original del archivo, ej: "tarea1.py"
         tamano_bytes   (int): peso en bytes
         id_estudiante  (str): identificador del estudiante
+        hash_archivo   (str): SHA-256 del archivo (lo retorna guardar_archivo)
 
     Retorna:
         dict: el registro completo que se guardó
@@ -78,44 +120,149 @@ def guardar_registro(id_transaccion: str, nombre_archivo: str,
         "tamano_legible": f"{tamano_bytes / 1024:.1f} KB",
         "fecha_hora":     datetime.now().isoformat(),   # "2025-02-16T14:30:00.123456"
         "estado":         "RECIBIDO"
-        # Aquí la Historia #3 agregará: ip, hash_archivo, etc.
+        # Aquí la Historia #3 agregará: ip, etc.
     }
+    if hash_archivo:
+        registro["hash_archivo"] = hash_archivo
+
+    if ALMACEN_REGISTROS == "segmentado":
+        registro_segmentado.abrir(CARPETA_REGISTROS).agregar(registro)
+        return registro
+    if ALMACEN_REGISTROS == "sqlite":
+        registro_sqlite.guardar_entrega(CARPETA_REGISTROS, registro)
+        return registro
 
     # Guardamos el diccionario como archivo JSON
     # El nombre del JSON es el mismo ID → fácil de encontrar después
-    ruta_json = os.path.join(CARPETA_REGISTROS, f"{id_transaccion}.json")
-    with open(ruta_json, "w", encoding="utf-8") as archivo_json:
-        json.dump(registro, archivo_json, indent=4, ensure_ascii=False)
-        # indent=4      → el JSON queda indentado y legible para humanos
-        # ensure_ascii  → permite guardar caracteres como tildes
+    def escribir(ruta_json):
+        with open(ruta_json, "w", encoding="utf-8") as archivo_json:
+            json.dump(registro, archivo_json, indent=4, ensure_ascii=False)
+            # indent=4      → el JSON queda indentado y legible para humanos
+            # ensure_ascii  → permite guardar caracteres como tildes
 
+    particiones.crear(particiones.ruta(CARPETA_REGISTROS, id_transaccion,
+                                       f"{id_transaccion}.json"), escribir)
     return registro
 
 
-def guardar_archivo_fisico(id_transaccion: str, nombre_original: str,
-                           contenido: bytes) -> str:
+def guardar_archivo(id_transaccion: str, nombre_original: str, contenido) -> dict:
     """
     Guarda el archivo .py del estudiante en disco con un nombre único.
 
     El problema de guardar solo "tarea.py": si 200 estudiantes
     suben "tarea.py", se sobreescriben entre sí.
     La solución: renombrar a "TXN-uuid4_tarea.py" → siempre único.
+    Si el mismo contenido ya se había entregado, "TXN-uuid4_tarea.py"
+    es un enlace al archivo ya guardado (no ocupa espacio otra vez).
+
+    El tamaño se valida (file_validator.validar_tamano) en la misma
+    pasada que copia y calcula el hash: con una ruta no hace falta
+    leer el archivo antes, ni tenerlo entero en memoria.
 
     Parámetros:
         id_transaccion (str): ID único para el nombre del archivo
         nombre_original (str): nombre original del archivo del estudiante
-        contenido (bytes): contenido binario del archivo
+        contenido (bytes, ruta (str) o archivo binario abierto): el archivo
+
+    Lanza ValueError (con el mensaje para el estudiante) si el tamaño
+    no es válido; en ese caso no queda nada guardado.
+
+    Retorna dict con:
+        - ruta       (str):  ruta completa donde quedó guardado el archivo
+        - sha256     (str):  hash del contenido (para guardar_registro)
+        - bytes      (int)
+        - duplicado  (bool): True si ese contenido ya estaba guardado
+    """
+    _asegurar_carpetas()
+
+    # Una entrega nueva va donde indica la distribución actual: no hace
+    # falta buscarla en las demás (ver particiones.py)
+    ruta_destino = particiones.ruta(CARPETA_ARCHIVOS, id_transaccion,
+                                    _nombre_unico(id_transaccion, nombre_original))
+    datos = almacen_entregas.guardar(contenido, ruta_destino, CARPETA_ARCHIVOS,
+                                     validar=validar_tamano)
+    return {"ruta": ruta_destino, **datos}
+
+
+def guardar_archivo_fisico(id_transaccion: str, nombre_original: str,
+                           contenido: bytes) -> str:
+    """
+    Igual que guardar_archivo, pero retorna solo la ruta donde quedó.
+    """
+    return guardar_archivo(id_transaccion, nombre_original, contenido)["ruta"]
+
+
+def ruta_archivo_subido(id_transaccion: str, nombre_original: str) -> str:
+    """
+    Retorna la ruta donde se guarda (o se guardó) el .py de una entrega.
+    Es la misma regla que usa guardar_archivo_fisico: "TXN-uuid4_tarea.py",
+    dentro de las subcarpetas de su id (o donde esté, si aún no se migró).
+    """
+    return particiones.resolver(CARPETA_ARCHIVOS, id_transaccion,
+                                _nombre_unico(id_transaccion, nombre_original))
+
+
+def _nombre_unico(id_transaccion: str, nombre_original: str) -> str:
+    return f"{id_transaccion}_{nombre_original}"
+
+
+def _ruta_registro_json(id_transaccion: str) -> str:
+    return particiones.resolver(CARPETA_REGISTROS, id_transaccion, f"{id_transaccion}.json")
+
+
+def cargar_registro(id_transaccion: str) -> dict:
+    """
+    Lee el registro JSON de una entrega.
 
     Retorna:
-        str: ruta completa donde quedó guardado el archivo
+        dict: el registro guardado por guardar_registro
+        None: si no existe ninguna entrega con ese ID
+    """
+    if ALMACEN_REGISTROS == "segmentado":
+        registro = registro_segmentado.abrir(CARPETA_REGISTROS).buscar(id_transaccion)
+        if registro is not None:
+            return registro
+    if ALMACEN_REGISTROS == "sqlite":
+        registro = registro_sqlite.cargar_entrega(CARPETA_REGISTROS, id_transaccion)
+        if registro is not None:
+            return registro
+
+    # Formato antiguo (o registro todavía sin migrar)
+    ruta_json = _ruta_registro_json(id_transaccion)
+    if not os.path.isfile(ruta_json):
+        return None
+
+    with open(ruta_json, "r", encoding="utf-8") as archivo_json:
+        return json.load(archivo_json)
+
+
+def listar_registros() -> list:
+    """
+    Retorna todos los registros de entregas guardados.
+    Útil para recalificar a todo un curso.
     """
     _asegurar_carpetas()
 
-    nombre_unico  = f"{id_transaccion}_{nombre_original}"
-    ruta_destino  = os.path.join(CARPETA_ARCHIVOS, nombre_unico)
+    por_id = {}
+    for ruta_json in particiones.recorrer(CARPETA_REGISTROS):
+        if ruta_json.endswith(".json"):
+            with open(ruta_json, "r", encoding="utf-8") as archivo_json:
+                registro = json.load(archivo_json)
+            por_id[registro["id_transaccion"]] = registro
+    if ALMACEN_REGISTROS == "segmentado":
+        for registro in registro_segmentado.abrir(CARPETA_REGISTROS).registros():
+            por_id[registro["id_transaccion"]] = registro
+    if ALMACEN_REGISTROS == "sqlite":
+        for registro in registro_sqlite.listar_entregas(CARPETA_REGISTROS):
+            por_id[registro["id_transaccion"]] = registro
+    return [por_id[id_t] for id_t in sorted(por_id)]
 
-    # Escribimos en modo binario "wb" para no alterar el contenido
-    with open(ruta_destino, "wb") as archivo:
-        archivo.write(contenido)
 
-    return ruta_destino
\ No newline at end of file
+def guardar_calificacion(id_transaccion: str, calificacion: dict):
+    """
+    Guarda junto al registro de la entrega lo que retornó calificar().
+    Solo el almacén "sqlite" guarda calificaciones (para consultas.py);
+    con los demás no hace nada. Las calificaciones con "error" no se guardan.
+    """
+    if ALMACEN_REGISTROS == "sqlite" and "error" not in calificacion:
+        registro_sqlite.guardar_calificacion(CARPETA_REGISTROS, id_transaccion, calificacion)